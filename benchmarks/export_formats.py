@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+EduBot Export Format Comparison
+Renders the same course with every export renderer and reports throughput
+and speed relative to the ReportLab PDF path:
+
+    python -m benchmarks.export_formats
+    python -m benchmarks.export_formats --modules 10 --questions 20 --json export_formats.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.run_benchmarks import Benchmark, sample_education_dict, time_benchmark
+
+
+def measure(modules_count: int, num_questions: int, min_time: float) -> List[Dict[str, Any]]:
+    from services.export_service import EXPORT_FORMATS, get_renderer
+    from services.llm_providers import FakeProvider
+    from services.llm_service import llm_service
+
+    llm_service.set_providers([FakeProvider(latency_mean=0.0, error_rate=0.0)])
+    education_data = sample_education_dict(modules_count, num_questions)
+
+    rows = []
+    loop = asyncio.new_event_loop()
+    try:
+        for name in EXPORT_FORMATS:
+            renderer = get_renderer(name)
+            size = len(renderer.render(education_data))
+            stats = time_benchmark(
+                Benchmark(name, lambda renderer=renderer: renderer.render(education_data)),
+                loop, min_time=min_time, max_iterations=10_000, warmup=2
+            )
+            rows.append({"format": name, "size_bytes": size, **stats,
+                         "renders_per_second": 1 / stats["median_s"]})
+    finally:
+        loop.close()
+
+    pdf_median = next(row["median_s"] for row in rows if row["format"] == "pdf")
+    for row in rows:
+        row["speedup_vs_pdf"] = pdf_median / row["median_s"]
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare export renderer throughput")
+    parser.add_argument("--modules", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to spend per format")
+    parser.add_argument("--json", dest="json_path", help="Also write the rows here")
+    args = parser.parse_args(argv)
+
+    rows = measure(args.modules, args.questions, args.min_time)
+    print(f"Course with {args.modules} modules and {args.questions} questions\n")
+    print(f"{'format':<10} {'median ms':>10} {'renders/s':>10} {'size KB':>9} {'vs pdf':>8}")
+    for row in rows:
+        print(f"{row['format']:<10} {row['median_s'] * 1000:>10.2f} {row['renders_per_second']:>10.1f} "
+              f"{row['size_bytes'] / 1024:>9.1f} {row['speedup_vs_pdf']:>7.1f}x")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+EduBot Load Test Harness
+Drives the REST and GraphQL endpoints at a target request rate and reports
+throughput, p50/p95/p99 latency and event-loop lag.
+
+By default the app is served in-process against the fake LLM provider, so
+the numbers measure EduBot's own overhead and are repeatable offline:
+
+    python -m benchmarks.load_test --rps 50 --duration 20 --scenario graphql_summarize
+
+Pass --base-url to target a running server instead (start it with
+LLM_PROVIDERS=fake for an offline baseline). In that mode the reported
+event-loop lag is the load generator's own, not the server's.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+TEST_TEXT = (
+    "Artificial Intelligence (AI) is a branch of computer science that aims to create "
+    "intelligent machines that work and react like humans. Machine learning, a subset of AI, "
+    "enables computers to learn and improve from experience without being explicitly programmed."
+)
+
+GRAPHQL_QUERIES = {
+    "health": "query { health { status message version timestamp } }",
+    "topics": "query { topics { topics { id topic created_at provider_used modules_count } total } }",
+    "summarize": """
+mutation($input: SummarizeInput!) {
+  summarize(input: $input) {
+    ... on SummarizeResponse { summary original_length summary_length provider_used }
+    ... on Error { code message details }
+  }
+}""",
+    "explain": """
+mutation($input: ExplainInput!) {
+  explain(input: $input) {
+    ... on ExplainResponse { explanation concept level provider_used }
+    ... on Error { code message details }
+  }
+}""",
+    "generateQuiz": """
+mutation($input: QuizInput!) {
+  generateQuiz(input: $input) {
+    ... on QuizResponse { questions { question options correct_answer explanation } total_questions }
+    ... on Error { code message details }
+  }
+}""",
+    "educate": """
+mutation($input: EducateInput!) {
+  educate(input: $input) {
+    ... on EducateResponse {
+      topic
+      syllabus { overview modules { title description } }
+      modules { title content key_points estimated_duration }
+      quiz { questions { question options correct_answer } total_questions }
+    }
+    ... on Error { code message details }
+  }
+}""",
+}
+
+
+def _graphql(operation: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
+    return {"method": "POST", "path": "/graphql/",
+            "json": {"query": GRAPHQL_QUERIES[operation], "variables": variables or {}}}
+
+
+def build_scenarios(api_key: str) -> Dict[str, Dict[str, Any]]:
+    """Request templates keyed by scenario name"""
+    summarize_input = {"text": TEST_TEXT, "api_key": api_key, "max_length": 50}
+    explain_input = {"concept": "Neural Networks", "api_key": api_key}
+    quiz_input = {"topic": "Python Programming", "api_key": api_key, "num_questions": 5}
+    educate_input = {"topic": "Introduction to GraphQL", "api_key": api_key, "modules_count": 3}
+    return {
+        "rest_health": {"method": "GET", "path": "/health"},
+        "rest_topics": {"method": "GET", "path": "/api/v1/topics"},
+        "rest_summarize": {"method": "POST", "path": "/api/v1/summarize", "json": summarize_input},
+        "rest_explain": {"method": "POST", "path": "/api/v1/explain",
+                         "json": {**explain_input, "level": "beginner"}},
+        "rest_quiz": {"method": "POST", "path": "/api/v1/quiz",
+                      "json": {**quiz_input, "difficulty": "easy"}},
+        "rest_educate": {"method": "POST", "path": "/api/v1/educate", "json": educate_input},
+        "graphql_health": _graphql("health"),
+        "graphql_topics": _graphql("topics"),
+        "graphql_summarize": _graphql("summarize", {"input": summarize_input}),
+        "graphql_explain": _graphql("explain", {"input": {**explain_input, "level": "BEGINNER"}}),
+        "graphql_quiz": _graphql("generateQuiz", {"input": {**quiz_input, "difficulty": "EASY"}}),
+        "graphql_educate": _graphql("educate", {"input": educate_input}),
+    }
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _is_success(response: httpx.Response) -> bool:
+    if response.status_code >= 400:
+        return False
+    if response.headers.get("content-type", "").startswith("application/json"):
+        body = response.json()
+        if isinstance(body, dict) and body.get("errors"):
+            return False
+        # GraphQL union results report failures as Error objects with a code
+        data = body.get("data") if isinstance(body, dict) else None
+        if isinstance(data, dict) and any(isinstance(v, dict) and "code" in v for v in data.values()):
+            return False
+    return True
+
+
+def _is_shed(response: httpx.Response) -> bool:
+    """Rejected by admission control: a 503, or a GraphQL OVERLOADED error"""
+    if response.status_code == 503:
+        return True
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return False
+    data = response.json().get("data")
+    return isinstance(data, dict) and any(isinstance(v, dict) and v.get("code") == "OVERLOADED"
+                                          for v in data.values())
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+async def run_load(client: httpx.AsyncClient, templates: List[Dict[str, Any]], rps: float,
+                   duration: float, timeout: float) -> Dict[str, Any]:
+    """Issue requests open-loop at a fixed rate and collect latency statistics"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    failures = 0
+    total = max(1, int(rps * duration))
+
+    async def send(template: Dict[str, Any]):
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            response = await client.request(template["method"], template["path"],
+                                            json=template.get("json"), timeout=timeout)
+            ok = _is_success(response)
+            key = "shed" if not ok and _is_shed(response) else str(response.status_code)
+        except httpx.HTTPError as e:
+            ok = False
+            key = type(e).__name__
+        latencies.append(time.perf_counter() - started)
+        statuses[key] = statuses.get(key, 0) + 1
+        if not ok:
+            failures += 1
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    tasks = []
+    started = time.perf_counter()
+    for i in range(total):
+        # Open-loop schedule: a slow response never delays the next request
+        delay = started + i / rps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(templates[i % len(templates)])))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "requests": total,
+        "failures": failures,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "target_rps": rps,
+        "throughput_rps": round(total / elapsed, 2),
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(max(latencies) if latencies else None),
+        },
+        "loop_lag_ms": {
+            "p50": ms(percentile(monitor.samples, 50)),
+            "p99": ms(percentile(monitor.samples, 99)),
+            "max": ms(max(monitor.samples) if monitor.samples else None),
+        },
+    }
+
+
+def _in_process_client(args) -> httpx.AsyncClient:
+    from services.llm_providers import FakeProvider
+    from services.llm_service import llm_service
+    import main
+
+    llm_service.set_providers([FakeProvider(
+        latency_distribution=args.fake_latency_distribution,
+        latency_mean=args.fake_latency,
+        latency_stddev=args.fake_latency_stddev,
+        error_rate=args.fake_error_rate,
+    )])
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://testserver")
+
+
+async def main_async(args) -> Dict[str, Any]:
+    scenarios = build_scenarios(args.api_key)
+    unknown = [name for name in args.scenario if name not in scenarios]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}. "
+                         f"Available: {', '.join(sorted(scenarios))}")
+    templates = [scenarios[name] for name in args.scenario]
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url,
+                                   limits=httpx.Limits(max_connections=args.max_connections))
+    else:
+        client = _in_process_client(args)
+
+    async with client:
+        report = await run_load(client, templates, args.rps, args.duration, args.timeout)
+    report["scenarios"] = args.scenario
+    report["target"] = args.base_url or "in-process"
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="EduBot load test harness")
+    parser.add_argument("--scenario", action="append",
+                        help="Scenario to run; repeat to mix several (default: graphql_summarize)")
+    parser.add_argument("--rps", type=float, default=20.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Test duration in seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--api-key", default="load-test-key")
+    parser.add_argument("--fake-latency", type=float, default=0.0,
+                        help="Mean fake LLM latency in seconds (in-process only)")
+    parser.add_argument("--fake-latency-stddev", type=float, default=0.0)
+    parser.add_argument("--fake-latency-distribution", default="constant",
+                        choices=["constant", "uniform", "normal", "lognormal"])
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or ["graphql_summarize"]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(main_async(args))
+
+    print("📊 EduBot Load Test")
+    print("=" * 40)
+    print(f"Target:      {report['target']}")
+    print(f"Scenarios:   {', '.join(report['scenarios'])}")
+    print(f"Requests:    {report['requests']} ({report['failures']} failed) {report['statuses']}")
+    print(f"Throughput:  {report['throughput_rps']} req/s (target {report['target_rps']})")
+    latency = report["latency_ms"]
+    print(f"Latency ms:  p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} max={latency['max']}")
+    lag = report["loop_lag_ms"]
+    print(f"Loop lag ms: p50={lag['p50']} p99={lag['p99']} max={lag['max']}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["failures"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
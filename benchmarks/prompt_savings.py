@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+EduBot Prompt Size Report
+Renders every prompt template for each level/difficulty both as written in
+source and as compiled (whitespace compacted), and reports the estimated
+token savings per call:
+
+    python -m benchmarks.prompt_savings
+    python -m benchmarks.prompt_savings --json prompt_savings.json
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.load_test import TEST_TEXT
+
+SAMPLE_VALUES = {
+    "summarize": {"text": TEST_TEXT, "max_length": 150},
+    "explain": {"concept": "Neural Networks"},
+    "quiz": {"num_questions": 10, "content_source": "Topic: Python"},
+    "syllabus": {"topic": "Introduction to GraphQL", "modules_count": 5},
+    "module": {"topic": "Introduction to GraphQL", "module_title": "Schemas and Types",
+               "module_description": "Defining object types, scalars and enums"},
+}
+
+
+def measure() -> List[Dict[str, Any]]:
+    from services.prompts import prompts
+
+    rows = []
+    for template in prompts:
+        for variant in template.variants:
+            values = SAMPLE_VALUES[template.name]
+            before = template.render_uncompacted(variant, **values)
+            after = template.render(variant, **values)
+            rows.append({
+                "operation": template.name,
+                "variant": variant or "-",
+                "chars_before": len(before.system_prompt) + len(before.prompt),
+                "chars_after": len(after.system_prompt) + len(after.prompt),
+                "tokens_before": before.estimated_tokens,
+                "tokens_after": after.estimated_tokens,
+            })
+    for row in rows:
+        row["tokens_saved"] = row["tokens_before"] - row["tokens_after"]
+        row["saving"] = round(row["tokens_saved"] / row["tokens_before"], 3)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EduBot prompt size report")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    rows = measure()
+    print(f"{'operation':<12}{'variant':<14}{'tokens before':>14}{'tokens after':>14}{'saved':>8}")
+    for row in rows:
+        print(f"{row['operation']:<12}{row['variant']:<14}{row['tokens_before']:>14}"
+              f"{row['tokens_after']:>14}{row['saving']:>8.1%}")
+
+    # A 10-module educate call renders 1 syllabus, 10 module and 1 medium quiz prompt
+    by_key = {(row["operation"], row["variant"]): row for row in rows}
+    educate = [by_key[("syllabus", "-")]] + [by_key[("module", "-")]] * 10 + [by_key[("quiz", "medium")]]
+    before = sum(row["tokens_before"] for row in educate)
+    after = sum(row["tokens_after"] for row in educate)
+    print(f"\neducate (10 modules): {before} -> {after} estimated prompt tokens "
+          f"({(before - after) / before:.1%} saved)")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"prompts": rows, "educate_10_modules": {"before": before, "after": after}},
+                      f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+EduBot Resolver Allocation Benchmark
+Measures the memory allocated per `educate` request by the GraphQL layer:
+the dict copies resolvers used to build with `__dict__`, and resolving
+fields directly from the EducateResponse model the content service returns:
+
+    python -m benchmarks.resolver_allocations
+    python -m benchmarks.resolver_allocations --modules 10 --questions 20 --json allocations.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from benchmarks.run_benchmarks import sample_education_data
+
+QUERY = """
+mutation {
+  educate(input: {topic: "Benchmark", api_key: "benchmark"}) {
+    ... on EducateResponse {
+      topic_id topic provider_used pdf_url generated_at
+      syllabus { topic overview total_duration learning_objectives modules { title description } }
+      modules { title description content key_points estimated_duration }
+      quiz { topic difficulty total_questions provider_used questions { question options correct_answer explanation } }
+    }
+    ... on Error { code message }
+  }
+}
+"""
+
+
+def dict_copy_result(result) -> Dict[str, Any]:
+    """What the educate resolver used to return: nested __dict__ copies"""
+    quiz = result.quiz
+    return {
+        "__typename": "EducateResponse",
+        "topic_id": result.topic_id,
+        "topic": result.topic,
+        "provider_used": result.provider_used,
+        "pdf_url": None,
+        "generated_at": datetime.utcnow(),
+        "syllabus": result.syllabus.__dict__,
+        "modules": [module.__dict__ for module in result.modules],
+        "quiz": {**quiz.__dict__, "questions": [q.__dict__ for q in quiz.questions],
+                 "difficulty": quiz.difficulty.upper()},
+    }
+
+
+def model_result(result):
+    """What the educate resolver returns now: the content service's EducateResponse"""
+    from services.content_service import course_response
+    return course_response(result.topic_id, result.topic, result.syllabus, result.modules, result.quiz,
+                           result.provider_used)
+
+
+def schema_returning(build: Callable[[], Any], bindables: list):
+    """The API schema with `educate` returning build() instead of generating a course"""
+    from ariadne import MutationType, QueryType, make_executable_schema
+    from main import datetime_scalar, type_defs
+    mutation = MutationType()
+
+    @mutation.field("educate")
+    async def resolve_educate(*_, **__):
+        return build()
+
+    return make_executable_schema(type_defs, QueryType(), mutation, datetime_scalar, *bindables)
+
+
+def traced_peak(fn: Callable[[], Any]) -> int:
+    """Bytes allocated at the peak of fn(), beyond what was live before it (tracemalloc must be running)"""
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    fn()
+    return tracemalloc.get_traced_memory()[1] - baseline
+
+
+def make_request(build: Callable[[], Any], bindables: list,
+                 loop: asyncio.AbstractEventLoop) -> Callable[[], bytes]:
+    """One educate request as the HTTP handler runs it: parse, validate, execute, then encode"""
+    from ariadne import graphql
+    import orjson
+
+    schema = schema_returning(build, bindables)
+
+    def request() -> bytes:
+        success, result = loop.run_until_complete(graphql(schema, {"query": QUERY}))
+        if not success or result.get("errors"):
+            raise RuntimeError(f"GraphQL errors: {result.get('errors')}")
+        return orjson.dumps(result)
+
+    return request
+
+
+def measure(modules_count: int, num_questions: int, iterations: int) -> List[Dict[str, Any]]:
+    from resolvers.mutation_resolvers import mutation_types
+    from services.llm_providers import FakeProvider
+    from services.llm_service import llm_service
+
+    llm_service.set_providers([FakeProvider(latency_mean=0.0, error_rate=0.0)])
+    result = sample_education_data(modules_count, num_questions)
+    strategies = (
+        # Dicts carried __typename and enum names, so the schema had no union or enum bindings
+        ("dict copies", lambda: dict_copy_result(result), []),
+        ("models", lambda: model_result(result), mutation_types),
+    )
+    loop = asyncio.new_event_loop()
+    try:
+        rows = []
+        for name, build, bindables in strategies:
+            request = make_request(build, bindables, loop)
+            for _ in range(3):
+                request()
+            tracemalloc.start()
+            try:
+                resolver_peaks = [traced_peak(build) for _ in range(iterations)]
+                request_peaks = [traced_peak(request) for _ in range(iterations)]
+            finally:
+                tracemalloc.stop()
+            rows.append({
+                "strategy": name,
+                "request": request,
+                "resolver_bytes": statistics.median(resolver_peaks),
+                "request_peak_bytes": statistics.median(request_peaks),
+                "times": [],
+            })
+        # Round-robin so drift in machine load affects every strategy alike
+        for _ in range(iterations):
+            for row in rows:
+                started = time.perf_counter()
+                row["request"]()
+                row["times"].append(time.perf_counter() - started)
+    finally:
+        loop.close()
+
+    baseline = rows[0]
+    for row in rows:
+        del row["request"]
+        row["median_s"] = statistics.median(row.pop("times"))
+        row["resolver_reduction"] = 1 - row["resolver_bytes"] / baseline["resolver_bytes"]
+        row["request_reduction"] = 1 - row["request_peak_bytes"] / baseline["request_peak_bytes"]
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare per-request allocations of educate result strategies")
+    parser.add_argument("--modules", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", dest="json_path", help="Also write the rows here")
+    args = parser.parse_args(argv)
+
+    rows = measure(args.modules, args.questions, args.iterations)
+    print(f"educate request with {args.modules} modules and {args.questions} questions\n")
+    print(f"{'strategy':<12} {'resolver KB':>12} {'reduction':>10} {'request KB':>11} {'reduction':>10} {'median ms':>10}")
+    for row in rows:
+        print(f"{row['strategy']:<12} {row['resolver_bytes'] / 1024:>12.2f} {row['resolver_reduction']:>10.0%} "
+              f"{row['request_peak_bytes'] / 1024:>11.1f} {row['request_reduction']:>10.0%} "
+              f"{row['median_s'] * 1000:>10.3f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+EduBot Benchmark Suite
+Times the hot paths (content generation against the fake LLM, PDF rendering,
+HTML/Markdown/EPUB export rendering, GraphQL parse/validate/execute, resolver serialisation and topic-store
+lookups), saves the results as JSON and compares them against a stored
+baseline so performance regressions fail loudly.
+
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+
+Exit status is 1 when any benchmark's median is slower than the baseline by
+more than its threshold.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from graphql import parse, validate, execute
+
+from benchmarks.load_test import GRAPHQL_QUERIES, TEST_TEXT, percentile
+
+API_KEY = "benchmark-key"
+TOPIC_STORE_SIZES = [1_000, 100_000, 1_000_000]
+PDF_MODULE_COUNTS = [3, 5, 10]
+
+# One document per root field in schema.graphql; checked for completeness at startup
+OPERATION_DOCUMENTS = {
+    "health": (GRAPHQL_QUERIES["health"], {}),
+    "topics": (GRAPHQL_QUERIES["topics"], {}),
+    "topic": ("query($id: ID!) { topic(id: $id) { id topic created_at provider_used modules_count } }",
+              {"id": "missing"}),
+    "apiInfo": ("query { apiInfo { name version description endpoints features } }", {}),
+    "usage": ("query { usage { window_seconds total_tokens operations { operation total_tokens } } }",
+              {}),
+    "summarize": (GRAPHQL_QUERIES["summarize"],
+                  {"input": {"text": TEST_TEXT, "api_key": API_KEY, "max_length": 50}}),
+    "explain": (GRAPHQL_QUERIES["explain"],
+                {"input": {"concept": "Neural Networks", "api_key": API_KEY, "level": "BEGINNER"}}),
+    "generateQuiz": (GRAPHQL_QUERIES["generateQuiz"],
+                     {"input": {"topic": "Python", "api_key": API_KEY, "num_questions": 10}}),
+    "educate": (GRAPHQL_QUERIES["educate"],
+                {"input": {"topic": "GraphQL", "api_key": API_KEY, "modules_count": 5}}),
+    "regenerateModule": (GRAPHQL_QUERIES["educate"].replace("EducateInput", "RegenerateModuleInput")
+                         .replace("educate(", "regenerateModule("),
+                         {"input": {"topic_id": "benchmark-course", "module_index": 2, "api_key": API_KEY}}),
+    "regenerateQuiz": (GRAPHQL_QUERIES["educate"].replace("EducateInput", "RegenerateQuizInput")
+                       .replace("educate(", "regenerateQuiz("),
+                       {"input": {"topic_id": "benchmark-course", "api_key": API_KEY}}),
+    "contentGeneration": ("subscription { contentGeneration(topic: \"GraphQL\") "
+                          "{ step progress message completed } }", {}),
+}
+# Subscriptions stream with deliberate sleeps, so only parse/validate is timed
+NON_EXECUTABLE_OPERATIONS = {"contentGeneration"}
+
+
+class Benchmark:
+    """A named callable to time; setup runs outside the timed region"""
+
+    def __init__(self, name: str, fn: Callable, setup: Callable = None, is_async: bool = False):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.is_async = is_async
+
+
+def time_benchmark(benchmark: Benchmark, loop: asyncio.AbstractEventLoop, min_time: float,
+                   max_iterations: int, warmup: int) -> Dict[str, Any]:
+    """Run a benchmark until min_time has elapsed and summarise per-call timings"""
+
+    def call_once() -> float:
+        args = benchmark.setup() if benchmark.setup else ()
+        started = time.perf_counter()
+        if benchmark.is_async:
+            loop.run_until_complete(benchmark.fn(*args))
+        else:
+            benchmark.fn(*args)
+        return time.perf_counter() - started
+
+    for _ in range(warmup):
+        call_once()
+
+    samples: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_iterations and (len(samples) < 3 or time.perf_counter() < deadline):
+        samples.append(call_once())
+
+    return {
+        "iterations": len(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "p95_s": percentile(samples, 95),
+        "min_s": min(samples),
+    }
+
+
+def content_service_benchmarks() -> List[Benchmark]:
+    from services.content_service import content_service
+
+    return [
+        Benchmark("content.summarize",
+                  lambda: content_service.summarize_text(TEST_TEXT, API_KEY, 50), is_async=True),
+        Benchmark("content.explain",
+                  lambda: content_service.explain_concept("Neural Networks", "beginner", API_KEY),
+                  is_async=True),
+        Benchmark("content.generate_quiz",
+                  lambda: content_service.generate_quiz("Python", None, 10, "medium", API_KEY),
+                  is_async=True),
+        Benchmark("content.generate_education_content",
+                  lambda: content_service.generate_education_content("GraphQL", 5, API_KEY),
+                  is_async=True),
+    ]
+
+
+def sample_education_data(modules_count: int, num_questions: int = 10):
+    """Generate an EducateResponse with the requested module and question counts"""
+    from services.content_service import content_service
+
+    loop = asyncio.new_event_loop()
+    try:
+        result = loop.run_until_complete(
+            content_service.generate_education_content("Benchmarking", modules_count, API_KEY)
+        )
+        quiz = loop.run_until_complete(
+            content_service.generate_quiz("Benchmarking", None, num_questions, "medium", API_KEY)
+        )
+    finally:
+        loop.close()
+    result.quiz = quiz
+    return result
+
+
+def sample_education_dict(modules_count: int, num_questions: int = 10) -> Dict[str, Any]:
+    """The education_data dict PDF and export renderers take"""
+    result = sample_education_data(modules_count, num_questions)
+    return {
+        "topic": result.topic,
+        "provider_used": result.provider_used,
+        "syllabus": result.syllabus.model_dump(),
+        "modules": [module.model_dump() for module in result.modules],
+        "quiz": result.quiz.model_dump(),
+    }
+
+
+def pdf_benchmarks(output_dir: str) -> List[Benchmark]:
+    from services.pdf_service import PDFService
+    from services.storage_service import ArtifactStorage
+
+    service = PDFService(ArtifactStorage(output_dir))
+    benchmarks = []
+    for modules_count in PDF_MODULE_COUNTS:
+        education_data = sample_education_dict(modules_count)
+        benchmarks.append(Benchmark(
+            f"pdf.generate_education_pdf[{modules_count}_modules]",
+            lambda data=education_data: service.generate_education_pdf(data),
+        ))
+    return benchmarks
+
+
+def export_benchmarks(module_counts: List[int] = None) -> List[Benchmark]:
+    from services.export_service import EXPORT_FORMATS, get_renderer
+
+    benchmarks = []
+    for modules_count in module_counts or PDF_MODULE_COUNTS:
+        education_data = sample_education_dict(modules_count)
+        for name in EXPORT_FORMATS:
+            renderer = get_renderer(name)
+            benchmarks.append(Benchmark(
+                f"export.render[{name}][{modules_count}_modules]",
+                lambda renderer=renderer, data=education_data: renderer.render(data),
+            ))
+    return benchmarks
+
+
+def graphql_benchmarks() -> List[Benchmark]:
+    from main import schema
+    from services.content_service import content_service
+
+    def empty_topic_store():
+        # Earlier benchmarks leave courses behind; keep the topics query comparable
+        content_service.topics_storage.clear()
+        return ()
+
+    def stored_course():
+        # Regeneration works on a stored course; seed one without LLM calls
+        from schemas import Module, QuizQuestion, QuizResponse, Syllabus
+        empty_topic_store()
+        modules_count = 5
+        content_service.topics_storage["benchmark-course"] = {
+            "id": "benchmark-course", "topic": "GraphQL", "created_at": datetime.now().isoformat(),
+            "provider_used": "fake", "modules_count": modules_count
+        }
+        content_service.store_course("benchmark-course", {
+            "topic": "GraphQL",
+            "syllabus": Syllabus(
+                topic="GraphQL", overview="Overview", total_duration="5 hours",
+                modules=[{"title": f"Module {i + 1}", "description": "Description"}
+                         for i in range(modules_count)],
+                learning_objectives=["Objective"]
+            ),
+            "modules": [Module(title=f"Module {i + 1}", description="Description", content="Content",
+                               key_points=["Point"], estimated_duration="1 hour")
+                        for i in range(modules_count)],
+            "quiz": QuizResponse(
+                questions=[QuizQuestion(question="Q?", options=["A", "B", "C", "D"], correct_answer=0,
+                                        explanation="E")] * 10,
+                topic="GraphQL", difficulty="medium", total_questions=10, provider_used="fake"
+            ),
+            "providers": {"syllabus": "fake"},
+            "pdf_path": None,
+        })
+        return ()
+
+    setups = {"regenerateModule": stored_course, "regenerateQuiz": stored_course}
+
+    root_fields = set()
+    for root in (schema.query_type, schema.mutation_type, schema.subscription_type):
+        if root is not None:
+            root_fields.update(root.fields)
+    missing = root_fields - set(OPERATION_DOCUMENTS)
+    if missing:
+        raise SystemExit(f"No benchmark document for schema operation(s): {', '.join(sorted(missing))}")
+
+    benchmarks = []
+    for operation, (source, variables) in sorted(OPERATION_DOCUMENTS.items()):
+        document = parse(source)
+        benchmarks.append(Benchmark(f"graphql.parse[{operation}]", lambda s=source: parse(s)))
+        benchmarks.append(Benchmark(f"graphql.validate[{operation}]",
+                                    lambda d=document: validate(schema, d)))
+        if operation in NON_EXECUTABLE_OPERATIONS:
+            continue
+
+        async def run(d=document, v=variables):
+            result = execute(schema, d, variable_values=v, context_value={})
+            if asyncio.iscoroutine(result) or asyncio.isfuture(result):
+                result = await result
+            if result.errors:
+                raise RuntimeError(f"GraphQL errors: {result.errors}")
+
+        benchmarks.append(Benchmark(f"graphql.execute[{operation}]", run,
+                                    setup=setups.get(operation, empty_topic_store), is_async=True))
+    return benchmarks
+
+
+def serialisation_benchmarks() -> List[Benchmark]:
+    from services.content_service import course_response
+
+    benchmarks = []
+    for modules_count in (5, 10):
+        result = sample_education_data(modules_count, num_questions=20)
+        benchmarks.append(Benchmark(
+            f"content.course_response[{modules_count}_modules]",
+            lambda r=result: course_response(r.topic_id, r.topic, r.syllabus, r.modules, r.quiz, r.provider_used),
+        ))
+    return benchmarks
+
+
+def topic_store_benchmarks(sizes: List[int]) -> List[Benchmark]:
+    from main import schema
+    from services.content_service import content_service
+
+    resolve_topic = schema.query_type.fields["topic"].resolve
+    created_at = datetime.now().isoformat()
+    benchmarks = []
+
+    for size in sizes:
+        def populate(size=size):
+            if len(content_service.topics_storage) == size:
+                return
+            content_service.topics_storage.clear()
+            for i in range(size):
+                topic_id = str(uuid.UUID(int=i))
+                content_service.topics_storage[topic_id] = {
+                    "id": topic_id,
+                    "topic": "Benchmark topic",
+                    "created_at": created_at,
+                    "provider_used": "fake",
+                    "modules_count": 5,
+                }
+
+        last_id = str(uuid.UUID(int=size - 1))
+
+        def list_topics(populate=populate):
+            populate()
+            return ()
+
+        benchmarks.append(Benchmark(f"topics.get_saved_topics[{size}]",
+                                    content_service.get_saved_topics, setup=list_topics))
+        benchmarks.append(Benchmark(f"topics.resolve_topic[{size}]",
+                                    lambda topic_id=last_id: resolve_topic(None, None, id=topic_id),
+                                    setup=list_topics, is_async=True))
+    return benchmarks
+
+
+def collect_benchmarks(args, output_dir: str) -> List[Benchmark]:
+    from services.llm_providers import FakeProvider
+    from services.llm_service import llm_service
+
+    # Zero-latency fake LLM: measure EduBot's own overhead only
+    llm_service.set_providers([FakeProvider(latency_mean=0.0, error_rate=0.0)])
+
+    benchmarks = (
+        content_service_benchmarks()
+        + pdf_benchmarks(output_dir)
+        + export_benchmarks()
+        + graphql_benchmarks()
+        + serialisation_benchmarks()
+        + topic_store_benchmarks(args.topic_sizes)
+    )
+    if args.filter:
+        benchmarks = [b for b in benchmarks if any(fnmatch.fnmatch(b.name, p) for p in args.filter)]
+    return benchmarks
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            overrides: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Benchmarks whose median regressed beyond their threshold"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        limit = threshold
+        for pattern, value in overrides.items():
+            if fnmatch.fnmatch(name, pattern):
+                limit = value
+        ratio = current["median_s"] / previous["median_s"] if previous["median_s"] else 1.0
+        current["baseline_median_s"] = previous["median_s"]
+        current["change"] = ratio - 1
+        if ratio - 1 > limit:
+            regressions.append({"name": name, "change": ratio - 1, "threshold": limit})
+    return regressions
+
+
+def parse_threshold_overrides(values: List[str]) -> Dict[str, float]:
+    overrides = {}
+    for value in values or []:
+        pattern, _, limit = value.partition("=")
+        if not limit:
+            raise SystemExit(f"Invalid --threshold-for value {value!r}; expected PATTERN=FRACTION")
+        overrides[pattern] = float(limit)
+    return overrides
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="EduBot benchmark suite")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the results JSON")
+    parser.add_argument("--baseline", help="Baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed median slowdown as a fraction of the baseline (default 0.25)")
+    parser.add_argument("--threshold-for", action="append", metavar="PATTERN=FRACTION",
+                        help="Per-benchmark threshold override; glob patterns allowed")
+    parser.add_argument("--filter", action="append", help="Only run benchmarks matching this glob")
+    parser.add_argument("--topic-sizes", type=int, nargs="+", default=TOPIC_STORE_SIZES)
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds per benchmark")
+    parser.add_argument("--max-iterations", type=int, default=10_000)
+    parser.add_argument("--warmup", type=int, default=2)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_dir = tempfile.mkdtemp(prefix="edubot_bench_")
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    results: Dict[str, Any] = {}
+
+    try:
+        for benchmark in collect_benchmarks(args, output_dir):
+            results[benchmark.name] = time_benchmark(
+                benchmark, loop, args.min_time, args.max_iterations, args.warmup
+            )
+            stats = results[benchmark.name]
+            print(f"{benchmark.name:<55} median {stats['median_s'] * 1000:10.3f} ms  "
+                  f"p95 {stats['p95_s'] * 1000:10.3f} ms  ({stats['iterations']} runs)")
+    finally:
+        loop.close()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    regressions: List[Dict[str, Any]] = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold,
+                              parse_threshold_overrides(args.threshold_for))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "threshold": args.threshold,
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        print("\n❌ PERFORMANCE REGRESSIONS")
+        print("=" * 40)
+        for regression in regressions:
+            print(f"{regression['name']}: {regression['change']:+.1%} "
+                  f"(threshold {regression['threshold']:.0%})")
+        return 1
+    if args.baseline:
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+EduBot Startup Benchmark
+Times `import main` (everything a worker does before serving) in fresh
+interpreters started outside the repository, lists the slowest imports, and
+checks that the heavy SDKs stay unloaded until first use:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --budget-ms 1000 --json startup.json
+
+Exit status is 1 when the median import time exceeds the budget or a lazily
+loaded module was imported at startup.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+from benchmarks.load_test import percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 1000
+# Loaded on first use (or by the startup preload), never by `import main`
+LAZY_MODULES = ["google.generativeai", "reportlab", "services.pdf_service"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def run_probe(cwd: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT, "PYTHONDONTWRITEBYTECODE": "1"}
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    return subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def slowest_imports(stderr: str, limit: int) -> List[Dict[str, Any]]:
+    """Top-level packages by total self import time, from -X importtime output"""
+    totals: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{"package": name, "self_ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def measure(runs: int, top: int) -> Dict[str, Any]:
+    # Start outside the repo so relative-path assumptions (e.g. schema.graphql) show up
+    with tempfile.TemporaryDirectory() as cwd:
+        run_probe(cwd)  # prime the bytecode and OS file caches
+        samples, loaded = [], set()
+        for _ in range(runs):
+            result = json.loads(run_probe(cwd).stdout.strip().splitlines()[-1])
+            samples.append(result["seconds"])
+            loaded.update(result["loaded"])
+        profile = run_probe(cwd, importtime=True)
+
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "p95_ms": round(percentile(samples, 95) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "eagerly_loaded": sorted(loaded),
+        "slowest_imports": slowest_imports(profile.stderr, top),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure EduBot import/startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Fail when the median exceeds this")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    parser.add_argument("--json", dest="json_path", help="Also write the report here")
+    args = parser.parse_args(argv)
+
+    report = measure(args.runs, args.top)
+    report["budget_ms"] = args.budget_ms
+
+    print(f"import main: median {report['median_ms']} ms, p95 {report['p95_ms']} ms, "
+          f"min {report['min_ms']} ms over {report['runs']} runs (budget {args.budget_ms:g} ms)")
+    print("\nSlowest packages to import:")
+    for row in report["slowest_imports"]:
+        print(f"  {row['package']:<40} {row['self_ms']:>8.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if report["eagerly_loaded"]:
+        print(f"\n❌ Loaded at startup but should be lazy: {', '.join(report['eagerly_loaded'])}")
+        failed = True
+    if report["median_ms"] > args.budget_ms:
+        print(f"\n❌ Startup over budget: {report['median_ms']} ms > {args.budget_ms:g} ms")
+        failed = True
+    if not failed:
+        print("\n✅ Startup within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+EduBot Wire Format Benchmark
+Serialises a GraphQL `educate` result with the stdlib encoder and orjson,
+then compresses it with each content coding, reporting CPU time and bytes
+on the wire:
+
+    python -m benchmarks.wire_format
+    python -m benchmarks.wire_format --modules 10 --questions 20 --json wire_format.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+from benchmarks.run_benchmarks import Benchmark, sample_education_dict, time_benchmark
+from utils.compression import available_encodings, compress
+
+
+def stdlib_dumps(content: Any) -> bytes:
+    # What starlette's JSONResponse does
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+SERIALISERS = {"json": stdlib_dumps, "orjson": orjson.dumps}
+
+
+def codings() -> List[Tuple[str, str, Dict[str, int]]]:
+    """(label, encoding, compress kwargs) for each setting measured"""
+    rows = [(f"gzip-{level}", "gzip", {"gzip_level": level}) for level in (1, 6, 9)]
+    if "br" in available_encodings():
+        rows += [(f"br-{quality}", "br", {"brotli_quality": quality}) for quality in (4, 11)]
+    return rows
+
+
+def measure(modules_count: int, num_questions: int, min_time: float) -> Dict[str, List[Dict[str, Any]]]:
+    from services.llm_providers import FakeProvider
+    from services.llm_service import llm_service
+
+    llm_service.set_providers([FakeProvider(latency_mean=0.0, error_rate=0.0)])
+    result = {"data": {"educate": sample_education_dict(modules_count, num_questions)}}
+    loop = asyncio.new_event_loop()
+    try:
+        serialisers = []
+        for name, dumps in SERIALISERS.items():
+            stats = time_benchmark(Benchmark(name, lambda dumps=dumps: dumps(result)),
+                                   loop, min_time=min_time, max_iterations=100_000, warmup=5)
+            serialisers.append({"serialiser": name, "size_bytes": len(dumps(result)), **stats})
+        body = orjson.dumps(result)
+        encodings = [{"encoding": "identity", "size_bytes": len(body), "median_s": 0.0}]
+        for label, encoding, kwargs in codings():
+            stats = time_benchmark(
+                Benchmark(label, lambda encoding=encoding, kwargs=kwargs: compress(body, encoding, **kwargs)),
+                loop, min_time=min_time, max_iterations=100_000, warmup=2
+            )
+            encodings.append({"encoding": label, "size_bytes": len(compress(body, encoding, **kwargs)), **stats})
+    finally:
+        loop.close()
+
+    json_median = serialisers[0]["median_s"]
+    for row in serialisers:
+        row["speedup_vs_json"] = json_median / row["median_s"]
+    for row in encodings:
+        row["ratio"] = len(body) / row["size_bytes"]
+    return {"serialisers": serialisers, "encodings": encodings}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure JSON serialisation and compression of an educate result")
+    parser.add_argument("--modules", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to spend per measurement")
+    parser.add_argument("--json", dest="json_path", help="Also write the rows here")
+    args = parser.parse_args(argv)
+
+    rows = measure(args.modules, args.questions, args.min_time)
+    print(f"educate result with {args.modules} modules and {args.questions} questions\n")
+    print(f"{'serialiser':<10} {'median ms':>10} {'size KB':>9} {'vs json':>8}")
+    for row in rows["serialisers"]:
+        print(f"{row['serialiser']:<10} {row['median_s'] * 1000:>10.3f} {row['size_bytes'] / 1024:>9.1f} "
+              f"{row['speedup_vs_json']:>7.1f}x")
+    print(f"\n{'encoding':<10} {'median ms':>10} {'size KB':>9} {'ratio':>8}")
+    for row in rows["encodings"]:
+        print(f"{row['encoding']:<10} {row['median_s'] * 1000:>10.3f} {row['size_bytes'] / 1024:>9.1f} "
+              f"{row['ratio']:>7.1f}x")
+    if "br" not in available_encodings():
+        print("\n(brotli not installed; `pip install brotli` to include br)")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+EduBot Bulk Generation
+Runs summarize/explain/quiz/educate requests from a JSONL or CSV file through
+the content service and appends one JSON line per result to the output file:
+
+    python bulk_generate.py quizzes.jsonl results.jsonl
+    python bulk_generate.py topics.csv courses.jsonl --operation educate --concurrency 8 --rate 2
+
+Each input record holds the request fields of its operation (as in the REST
+API) plus an optional `operation` and `id`. Re-running with the same output
+file resumes: records already written successfully are skipped and failed
+ones are retried. The explain cache, course catalogue and LLM rate limit
+apply exactly as they do in the server.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from config import settings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate EduBot content in bulk")
+    parser.add_argument("input", help="JSONL or CSV file of requests")
+    parser.add_argument("output", help="JSONL file results are appended to (also the checkpoint)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="Input format (default: from the file extension)")
+    parser.add_argument("--operation", choices=["summarize", "explain", "quiz", "educate"], default=None,
+                        help="Operation for records that don't name one")
+    parser.add_argument("--concurrency", type=int, default=settings.BULK_CONCURRENCY,
+                        help="Records generated at once")
+    parser.add_argument("--rate", type=float, default=settings.LLM_RATE_LIMIT_PER_SECOND,
+                        help="LLM calls per second (0 = unlimited)")
+    parser.add_argument("--api-key", default=None, help="API key for records that don't carry one")
+    parser.add_argument("--restart", action="store_true",
+                        help="Overwrite the output instead of resuming from it")
+    args = parser.parse_args()
+
+    from services.bulk_service import read_records, run_bulk
+    from services.llm_service import build_rate_limiter, llm_service
+    from services.usage_service import usage_tracker
+
+    # Same bucket as the server (shared through the store when it is), at --rate
+    llm_service.rate_limiter = build_rate_limiter(args.rate)
+    progress = asyncio.run(run_bulk(
+        read_records(args.input, args.format),
+        args.output,
+        operation=args.operation,
+        api_key=args.api_key,
+        concurrency=args.concurrency,
+        resume=not args.restart,
+        on_progress=lambda p: print(f"\r{p.summary()}", end="", file=sys.stderr, flush=True),
+    ))
+    print(file=sys.stderr)
+    print(progress.summary())
+    usage = usage_tracker.report()
+    print(f"{usage['calls']} LLM calls, {usage['total_tokens']} tokens, "
+          f"estimated cost {usage['estimated_cost']}")
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
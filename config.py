@@ -10,19 +10,63 @@ class Settings:
     API_DESCRIPTION = "A RESTful API for generating educational materials using various LLM providers"
     
     # Server Configuration
-    HOST = "0.0.0.0"
-    PORT = 8000
-    DEBUG = True
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", "8000"))
+    DEBUG = os.getenv("DEBUG", "false").lower() == "true"  # enables the auto-reloader
+    WORKERS = int(os.getenv("WORKERS", "1"))  # >1 needs STORE_BACKEND=sqlite to share state
+    KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "15"))  # seconds an idle connection is kept
+    BACKLOG = int(os.getenv("BACKLOG", "2048"))  # pending connections queued by the socket
+    # Import the Gemini SDK and PDF renderer in the background after startup
+    # instead of with the first request that needs them
+    PRELOAD_MODULES_ON_STARTUP = os.getenv("PRELOAD_MODULES_ON_STARTUP", "true").lower() == "true"
     
     # PDF Configuration
     PDF_DIRECTORY = "generated_pdfs"
     MAX_PDF_SIZE_MB = 50
+    PDF_SPOOL_MAX_BYTES = int(os.getenv("PDF_SPOOL_MAX_BYTES", str(4 * 1024 * 1024)))  # in memory before spilling to disk
+    PDF_STREAM_CHUNK_BYTES = 64 * 1024
+    # Processes rendering PDFs for batch exports and on-demand downloads (0 = threads)
+    PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+    
+    # Generated artifacts in PDF_DIRECTORY, swept by a background janitor
+    ARTIFACT_MAX_AGE = int(os.getenv("ARTIFACT_MAX_AGE", str(7 * 24 * 3600)))  # seconds; 0 keeps files
+    ARTIFACT_MAX_TOTAL_BYTES = int(os.getenv("ARTIFACT_MAX_TOTAL_BYTES", str(5 * 1024 ** 3)))  # 0 = no quota
+    ARTIFACT_JANITOR_INTERVAL = int(os.getenv("ARTIFACT_JANITOR_INTERVAL", "600"))  # seconds; 0 disables
+    ARTIFACT_PARTIAL_MAX_AGE = 3600  # seconds before a crashed writer's .part file is removed
+    ARTIFACT_SHARD_CHARS = 2  # hex characters of the shard directory name (256 shards)
+    # Where finished artifacts are published: local (PDF_DIRECTORY, served by the API)
+    # or s3 (any S3-compatible store; downloads redirect to presigned URLs)
+    ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "local")
+    S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "https://s3.amazonaws.com")
+    S3_BUCKET = os.getenv("S3_BUCKET", "")
+    S3_REGION = os.getenv("S3_REGION", "us-east-1")
+    S3_ACCESS_KEY_ID: Optional[str] = os.getenv("S3_ACCESS_KEY_ID")
+    S3_SECRET_ACCESS_KEY: Optional[str] = os.getenv("S3_SECRET_ACCESS_KEY")
+    S3_PREFIX = os.getenv("S3_PREFIX", "artifacts/")
+    S3_ADDRESSING_STYLE = os.getenv("S3_ADDRESSING_STYLE", "path")  # path or virtual
+    S3_PUBLIC_BASE_URL = os.getenv("S3_PUBLIC_BASE_URL", "")  # e.g. a CDN origin-pulling the bucket; skips presigning
+    S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "900"))  # seconds a download URL is valid
+    S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024  # bytes; larger files are uploaded in parts
+    S3_MULTIPART_PART_SIZE = 8 * 1024 * 1024  # S3 needs at least 5 MiB for all but the last part
     
     # LLM Configuration
     DEFAULT_MAX_TOKENS = 2000
     DEFAULT_TEMPERATURE = 0.7
     REQUEST_TIMEOUT = 30  # seconds
     
+    # Per-operation generation profiles. max_output_tokens = base_tokens +
+    # tokens_per_unit * units, where units is the requested size (summary words,
+    # quiz questions, syllabus modules); without a unit size DEFAULT_MAX_TOKENS applies.
+    # Every cap is clamped to MAX_OUTPUT_TOKENS.
+    MAX_OUTPUT_TOKENS = 8192
+    GENERATION_PROFILES = {
+        "summarize": {"base_tokens": 32, "tokens_per_unit": 1.5, "temperature": 0.3, "stop_sequences": []},
+        "explain": {"temperature": DEFAULT_TEMPERATURE, "stop_sequences": []},
+        "quiz": {"base_tokens": 64, "tokens_per_unit": 160, "temperature": 0.4, "stop_sequences": []},
+        "syllabus": {"base_tokens": 256, "tokens_per_unit": 64, "temperature": 0.4, "stop_sequences": []},
+        "module": {"base_tokens": 1200, "temperature": 0.6, "stop_sequences": []},
+    }
+    
     # Content Limits
     MAX_TEXT_LENGTH = 10000
     MAX_CONCEPT_LENGTH = 1000
@@ -37,6 +81,108 @@ class Settings:
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
     MISTRAL_API_KEY: Optional[str] = os.getenv("MISTRAL_API_KEY")
     
+    # LLM Provider Routing
+    LLM_PROVIDERS = [
+        name.strip() for name in os.getenv("LLM_PROVIDERS", "gemini,openai,mistral").split(",")
+        if name.strip()
+    ]
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    MISTRAL_MODEL = os.getenv("MISTRAL_MODEL", "mistral-small-latest")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    MISTRAL_BASE_URL = os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1")
+    # Approximate USD cost per 1k tokens, used by the router to break ties
+    PROVIDER_COSTS = {
+        "gemini": 0.0005,
+        "openai": 0.0006,
+        "mistral": 0.0006,
+        "fake": 0.0,
+    }
+    ROUTER_LATENCY_WEIGHT = 1.0
+    ROUTER_ERROR_PENALTY = 10.0  # seconds of latency added per unit of error rate
+    ROUTER_COST_WEIGHT = 100.0  # seconds of latency one USD/1k tokens is worth
+    ROUTER_EWMA_ALPHA = 0.3
+    ROUTER_FAILURE_COOLDOWN = 30  # seconds a provider is skipped after repeated failures
+    ROUTER_MAX_CONSECUTIVE_FAILURES = 3
+    
+    # Semantic near-duplicate cache for explain (off unless enabled)
+    EXPLAIN_CACHE_ENABLED = os.getenv("EXPLAIN_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))  # cosine similarity
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))  # per level
+    SEMANTIC_CACHE_NGRAM_SIZE = 3
+    
+    # Server-wide LLM call rate limit (0 disables)
+    LLM_RATE_LIMIT_PER_SECOND = float(os.getenv("LLM_RATE_LIMIT_PER_SECOND", "0"))
+    LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+    
+    # Persistent store for the course catalogue
+    STORE_BACKEND = os.getenv("STORE_BACKEND", "memory")  # memory or sqlite
+    STORE_PATH = os.getenv("STORE_PATH", "data/edubot.db")
+    STORE_BUSY_TIMEOUT = 5  # seconds to wait for another process's write lock
+    
+    # Course catalogue warm-up
+    CATALOGUE_TOPICS_FILE = os.getenv("CATALOGUE_TOPICS_FILE", "")  # one topic per line
+    CATALOGUE_WARMUP_ON_STARTUP = os.getenv("CATALOGUE_WARMUP_ON_STARTUP", "false").lower() == "true"
+    CATALOGUE_WARMUP_INTERVAL = int(os.getenv("CATALOGUE_WARMUP_INTERVAL", "0"))  # seconds; 0 runs once
+    CATALOGUE_MAX_AGE = int(os.getenv("CATALOGUE_MAX_AGE", str(7 * 24 * 3600)))  # seconds before refresh
+    CATALOGUE_MODULES_COUNT = int(os.getenv("CATALOGUE_MODULES_COUNT", "5"))
+    CATALOGUE_INCLUDE_PDF = os.getenv("CATALOGUE_INCLUDE_PDF", "false").lower() == "true"
+    CATALOGUE_CONCURRENCY = int(os.getenv("CATALOGUE_CONCURRENCY", "4"))
+    CATALOGUE_RATE_PER_SECOND = float(os.getenv("CATALOGUE_RATE_PER_SECOND", "0.5"))  # topics started
+    
+    # Bulk generation (bulk_generate.py)
+    BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))  # records in flight
+    
+    # Token usage accounting
+    USAGE_WINDOW_SECONDS = int(os.getenv("USAGE_WINDOW_SECONDS", "3600"))  # rolling window
+    USAGE_BUCKET_SECONDS = int(os.getenv("USAGE_BUCKET_SECONDS", "60"))  # window granularity
+    TOKEN_BUDGET_PER_KEY = int(os.getenv("TOKEN_BUDGET_PER_KEY", "0"))  # tokens per window; 0 disables
+    
+    # Fake LLM provider (offline testing and load tests; enable with LLM_PROVIDERS=fake)
+    FAKE_LLM_LATENCY_DISTRIBUTION = os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "constant")
+    FAKE_LLM_LATENCY_MEAN = float(os.getenv("FAKE_LLM_LATENCY_MEAN", "0"))  # seconds
+    FAKE_LLM_LATENCY_STDDEV = float(os.getenv("FAKE_LLM_LATENCY_STDDEV", "0"))  # seconds
+    FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+    FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "42"))
+    
+    # GraphQL subscriptions over WebSocket (graphql-transport-ws and the legacy graphql-ws)
+    SUBSCRIPTION_QUEUE_SIZE = int(os.getenv("SUBSCRIPTION_QUEUE_SIZE", "16"))  # pending events per client before coalescing
+    SUBSCRIPTION_STEP_INTERVAL = float(os.getenv("SUBSCRIPTION_STEP_INTERVAL", "2"))  # seconds between contentGeneration steps
+    WEBSOCKET_IDLE_TIMEOUT = float(os.getenv("WEBSOCKET_IDLE_TIMEOUT", "300"))  # seconds without messages before closing; 0 disables
+    WEBSOCKET_KEEPALIVE = float(os.getenv("WEBSOCKET_KEEPALIVE", "15"))  # seconds between graphql-ws keep-alive messages
+    WEBSOCKET_INIT_TIMEOUT = float(os.getenv("WEBSOCKET_INIT_TIMEOUT", "10"))  # seconds to wait for connection_init
+    
+    # Admission control: shed load instead of letting expensive work pile up
+    ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+    ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "64"))  # cost units in flight, about one per LLM call or render
+    ADMISSION_RESERVED_CAPACITY = int(os.getenv("ADMISSION_RESERVED_CAPACITY", "8"))  # units only cheap requests may use
+    ADMISSION_QUEUE_BUDGET = int(os.getenv("ADMISSION_QUEUE_BUDGET", "32"))  # cost units allowed to wait; more are rejected
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1"))  # seconds a request may wait; 0 rejects at once
+    ADMISSION_COSTS = {  # expensive operations; anything else is cheap with cost 1 (educate is costed per request)
+        "educate": 12, "summarize": 1, "explain": 1, "generateQuiz": 1,
+        "regenerateModule": 1, "regenerateQuiz": 1, "pdf": 2, "export": 2,
+    }
+    ADMISSION_CONCURRENCY = {"educate": 8, "export": 2}  # most of one operation running at once
+    
+    METRICS_MAX_OPERATION_NAMES = 200  # distinct GraphQL operation names tracked before "other"
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")  # none, file or otlp
+    TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "logs/traces.jsonl")
+    OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACE_SERVICE_NAME = "edubot-api"
+    TRACE_ID_HEADER = "X-Trace-Id"
+    
+    # Response caching for read-only GET endpoints
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))  # GraphQL GET results kept
+    RESPONSE_CACHE_PATHS = {"/": 0, "/docs-info": 0, "/schema": 0, "/health": 1}  # seconds a body is reused, 0 = until restart
+    GRAPHQL_CACHEABLE_FIELDS = {"apiInfo": 3600, "health": 1, "topics": 5, "topic": 5}  # max-age of GET queries selecting only these
+    
+    # Response compression (brotli is offered when the brotli package is installed)
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))  # bytes; smaller bodies sent as-is
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))  # 1 (fastest) to 9
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))  # 0 (fastest) to 11
+    
     # CORS Configuration
     CORS_ORIGINS = ["*"]
     CORS_METHODS = ["*"]
@@ -1,31 +1,48 @@
-from ariadne import QueryType, MutationType, make_executable_schema, graphql_sync, SubscriptionType
+from ariadne import QueryType, MutationType, ScalarType, make_executable_schema, graphql_sync, SubscriptionType
 from ariadne.asgi import GraphQL
 from ariadne.explorer import ExplorerGraphiQL
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import asyncio
+import functools
+import importlib
+import logging
+import sys
 from typing import Any, Dict
 from datetime import datetime
 
 from resolvers.query_resolvers import query_resolvers
-from resolvers.mutation_resolvers import mutation_resolvers
+from resolvers.mutation_resolvers import mutation_resolvers, mutation_types
 from resolvers.subscription_resolvers import subscription_resolvers
+from routes import summarize, explain, quiz, educate, topics, courses
+from utils.compression import CompressionMiddleware
 from utils.exceptions import setup_exception_handlers
+from utils.graphql_http import EduBotGraphQLHTTPHandler
+from utils.graphql_ws import EduBotWebsocketHandler
+from utils.metrics import registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from utils.response_cache import ResponseCacheMiddleware
+from utils.tracing import TracingMiddleware
 from config import settings
 import os
 
-# Create necessary directories
-os.makedirs(settings.PDF_DIRECTORY, exist_ok=True)
+logger = logging.getLogger(__name__)
 
-# Load GraphQL schema
-with open("schema.graphql", "r") as f:
+# Load GraphQL schema (next to this module, whatever the working directory)
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.graphql"), "r") as f:
     type_defs = f.read()
 
 # Create type definitions
 query = QueryType()
 mutation = MutationType()
 subscription = SubscriptionType()
+datetime_scalar = ScalarType("DateTime")
+
+@datetime_scalar.serializer
+def serialize_datetime(value):
+    """Serialize DateTime values as ISO-8601 strings"""
+    return value.isoformat() if isinstance(value, datetime) else value
 
 # Bind resolvers
 query_resolvers(query)
@@ -33,15 +50,25 @@ mutation_resolvers(mutation)
 subscription_resolvers(subscription)
 
 # Create executable schema
-schema = make_executable_schema(type_defs, query, mutation, subscription)
+schema = make_executable_schema(type_defs, query, mutation, subscription, datetime_scalar, *mutation_types)
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.API_TITLE,
     description=settings.API_DESCRIPTION,
     version=settings.API_VERSION,
+    default_response_class=ORJSONResponse,
 )
 
+# Compress text and JSON responses with gzip, or brotli when installed
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Serve read-only GET endpoints from memory with ETags (inside CORS so cached responses get its headers,
+# outside compression so hits are replayed already compressed)
+if settings.RESPONSE_CACHE_ENABLED:
+    app.add_middleware(ResponseCacheMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -51,15 +78,100 @@ app.add_middleware(
     allow_headers=settings.CORS_HEADERS,
 )
 
+# Trace every request and return its trace ID (added last so it wraps everything)
+app.add_middleware(TracingMiddleware)
+
 # Setup exception handlers
 setup_exception_handlers(app)
 
+# REST endpoints
+for route_module in (summarize, explain, quiz, educate, topics, courses):
+    app.include_router(route_module.router, prefix="/api/v1")
+
 # Create GraphQL endpoint with explorer
-graphql_app = ExplorerGraphiQL(schema)
+graphql_app = GraphQL(
+    schema,
+    debug=settings.DEBUG,
+    explorer=ExplorerGraphiQL(),
+    http_handler=EduBotGraphQLHTTPHandler(),
+    websocket_handler=EduBotWebsocketHandler(),
+)
 
 # Mount GraphQL endpoint
 app.mount("/graphql", graphql_app)
 
+# Slow-to-import modules that are otherwise loaded on first use
+PRELOAD_MODULES = ("google.generativeai", "services.pdf_service")
+
+def log_preload_failure(module_name: str, future: asyncio.Future):
+    """Report a background import that failed; the module is imported again on first use"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Preloading {module_name} failed: {future.exception()!r}")
+
+@app.on_event("startup")
+async def preload_heavy_modules():
+    """Import heavy SDKs in a thread once serving, so the first request doesn't pay for them"""
+    app.state.preload_futures = []
+    if settings.PRELOAD_MODULES_ON_STARTUP:
+        loop = asyncio.get_running_loop()
+        for module_name in PRELOAD_MODULES:
+            future = loop.run_in_executor(None, importlib.import_module, module_name)
+            future.add_done_callback(functools.partial(log_preload_failure, module_name))
+            app.state.preload_futures.append(future)
+
+@app.on_event("startup")
+async def start_catalogue_warmup():
+    """Pre-generate catalogue courses in the background when configured"""
+    app.state.warmup_task = None
+    if settings.CATALOGUE_WARMUP_ON_STARTUP and settings.CATALOGUE_TOPICS_FILE:
+        from services.warmup_service import run_scheduled_warmup
+        app.state.warmup_task = asyncio.create_task(run_scheduled_warmup())
+
+@app.on_event("shutdown")
+async def stop_catalogue_warmup():
+    task = getattr(app.state, "warmup_task", None)
+    if task is not None and not task.done():
+        task.cancel()
+
+@app.on_event("startup")
+async def start_artifact_janitor():
+    """Sweep expired and over-quota PDFs from the artifact directory in the background"""
+    app.state.janitor_task = None
+    if settings.ARTIFACT_JANITOR_INTERVAL > 0:
+        from services.storage_service import artifact_storage
+        app.state.janitor_task = asyncio.create_task(artifact_storage.run_janitor())
+
+@app.on_event("shutdown")
+async def stop_artifact_janitor():
+    task = getattr(app.state, "janitor_task", None)
+    if task is not None and not task.done():
+        task.cancel()
+
+@app.on_event("shutdown")
+async def close_artifact_storage():
+    from services.storage_service import artifact_storage
+    artifact_storage.close()
+
+@app.on_event("startup")
+async def prime_response_cache():
+    """Render the static endpoints once so the first requests are served from the cache"""
+    if settings.RESPONSE_CACHE_ENABLED:
+        import httpx
+        from utils.compression import available_encodings
+        encodings = available_encodings() if settings.COMPRESSION_ENABLED else []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://edubot") as client:
+            for path, max_age in settings.RESPONSE_CACHE_PATHS.items():
+                if max_age == 0:
+                    for encoding in ["identity", *encodings]:
+                        await client.get(path, headers={"Accept-Encoding": encoding})
+
+@app.on_event("shutdown")
+async def stop_pdf_render_pool():
+    # Only if something already needed the PDF service; don't import it to close it
+    pdf_module = sys.modules.get("services.pdf_service")
+    if pdf_module is not None:
+        pdf_module.pdf_service.close()
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -88,6 +200,11 @@ async def health_check():
         "version": settings.API_VERSION
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Additional REST endpoints for Swagger documentation
 @app.get("/docs-info")
 async def docs_info():
@@ -152,9 +269,16 @@ async def get_schema():
     }
 
 if __name__ == "__main__":
+    if settings.WORKERS > 1 and settings.STORE_BACKEND == "memory":
+        print("Warning: STORE_BACKEND=memory keeps topics, caches, rate limits and token budgets per worker; "
+              "use STORE_BACKEND=sqlite to share them")
     uvicorn.run(
         "main:app", 
         host=settings.HOST, 
         port=settings.PORT, 
-        reload=settings.DEBUG
+        # The reloader supervises a single process; it never runs with workers
+        reload=settings.DEBUG and settings.WORKERS == 1,
+        workers=settings.WORKERS,
+        timeout_keep_alive=settings.KEEPALIVE_TIMEOUT,
+        backlog=settings.BACKLOG
     )
@@ -1,177 +1,267 @@
+import logging
+import os
 from datetime import datetime
-from typing import Any, Dict
-from services.content_service import content_service
-from utils.exceptions import LLMProviderError, InvalidAPIKeyError, ContentGenerationError
+from typing import Any, Dict, Set, Union
+from ariadne import EnumType, ObjectType, UnionType
+from fastapi.concurrency import run_in_threadpool
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode
+from pydantic import BaseModel
+from schemas import EducateResponse, ErrorResult, ExplainResponse, QuizResponse, SummarizeResponse
+from services.catalogue_service import course_catalogue
+from services.content_service import COURSE_PARTS, content_service
+from utils.admission import admission_controller, educate_cost, regeneration_cost
+from utils.exceptions import (
+    LLMProviderError, InvalidAPIKeyError, ContentGenerationError, TopicNotFoundError,
+    TokenBudgetExceededError, OverloadedError
+)
+from utils.kv_store import offload
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Results are the pydantic models the services return, resolved by attribute
+# as they are. Enums map to the lowercase values the services use, and union
+# members are told apart by model class.
+explanation_level = EnumType("ExplanationLevel", {
+    "BEGINNER": "beginner",
+    "INTERMEDIATE": "intermediate",
+    "ADVANCED": "advanced",
+})
+quiz_difficulty = EnumType("QuizDifficulty", {"EASY": "easy", "MEDIUM": "medium", "HARD": "hard"})
+
+# Models whose class name differs from their GraphQL type
+GRAPHQL_TYPE_NAMES = {ErrorResult: "Error"}
+
+def resolve_result_type(obj: BaseModel, *_) -> str:
+    """GraphQL type of a union member"""
+    return GRAPHQL_TYPE_NAMES.get(type(obj), type(obj).__name__)
+
+result_unions = [
+    UnionType(name, resolve_result_type)
+    for name in ("SummarizeResult", "ExplainResult", "QuizResult", "EducateResult")
+]
+
+# EducateResponse has no generation time of its own; it is the time of the response
+educate_response = ObjectType("EducateResponse")
+
+@educate_response.field("generated_at")
+def resolve_generated_at(*_) -> datetime:
+    return datetime.utcnow()
+
+# Bindables to pass to make_executable_schema along with the MutationType
+mutation_types = [explanation_level, quiz_difficulty, *result_unions, educate_response]
+
+def selected_fields(info, type_name: str) -> Set[str]:
+    """Names of the fields selected on `type_name` beneath the current field
+    
+    Follows inline fragments and fragment spreads. @skip/@include are ignored,
+    so a conditionally skipped field still counts as selected.
+    """
+    names = set()
+    
+    def collect(selection_set):
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                names.add(selection.name.value)
+            elif isinstance(selection, InlineFragmentNode):
+                if selection.type_condition is None or selection.type_condition.name.value == type_name:
+                    collect(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = info.fragments[selection.name.value]
+                if fragment.type_condition.name.value == type_name:
+                    collect(fragment.selection_set)
+    
+    for field_node in info.field_nodes:
+        if field_node.selection_set:
+            collect(field_node.selection_set)
+    return names
+
+async def render_course_pdf(topic_id: str, result: EducateResponse, source_pdf: str = None):
+    """Render the course PDF, replacing any earlier render, and set pdf_url
+    
+    A pre-rendered `source_pdf` (from the catalogue) is copied instead of rendering.
+    Storage calls may go to the object store, so they run in the thread pool.
+    """
+    from services.pdf_service import pdf_service
+    course = await offload(content_service.get_course, topic_id)
+    try:
+        # Another worker may have rendered it; fetch it from the object store then
+        if source_pdf and await run_in_threadpool(pdf_service.storage.fetch, source_pdf):
+            pdf_path = await run_in_threadpool(pdf_service.copy_pdf, source_pdf)
+        else:
+            pdf_path = await pdf_service.generate_education_pdf_async({
+                "topic": result.topic,
+                "provider_used": result.provider_used,
+                "syllabus": result.syllabus.model_dump(),
+                "modules": [module.model_dump() for module in result.modules],
+                "quiz": result.quiz.model_dump()
+            })
+    except Exception as pdf_error:
+        span = tracer.current_span()
+        trace_id = span.trace_id if span else None
+        logger.error(f"PDF generation failed (trace {trace_id}): {pdf_error}")
+        pdf_path = None
+    
+    # Whether or not the new render worked, the old one is out of date
+    previous = course["pdf_path"]
+    await offload(content_service.set_course_pdf, topic_id, pdf_path)
+    if previous:
+        await run_in_threadpool(pdf_service.delete_pdf, previous)
+    result.pdf_url = f"/download/pdf/{os.path.basename(pdf_path)}" if pdf_path else None
+
+def budget_error(e: TokenBudgetExceededError) -> ErrorResult:
+    """Error union member for a key that has used up its token budget"""
+    return ErrorResult(code="BUDGET_EXCEEDED", message=str(e), details=f"Retry after {e.retry_after} seconds")
+
+def overloaded_error(e: OverloadedError) -> ErrorResult:
+    """Error union member for a request shed by admission control"""
+    return ErrorResult(code="OVERLOADED", message=str(e), details=f"Retry after {e.retry_after} seconds")
+
+def regeneration_error(e: Exception) -> ErrorResult:
+    """Map a regeneration failure to the Error union member"""
+    if isinstance(e, TokenBudgetExceededError):
+        return budget_error(e)
+    if isinstance(e, OverloadedError):
+        return overloaded_error(e)
+    if isinstance(e, TopicNotFoundError):
+        return ErrorResult(code="NOT_FOUND", message=str(e))
+    if isinstance(e, ContentGenerationError):
+        return ErrorResult(code="VALIDATION_ERROR", message=str(e))
+    if isinstance(e, (LLMProviderError, InvalidAPIKeyError)):
+        return ErrorResult(code="LLM_ERROR", message=str(e), details="Please check your API key and try again")
+    return ErrorResult(code="INTERNAL_ERROR", message="An unexpected error occurred", details=str(e))
 
 def mutation_resolvers(mutation):
     """Bind mutation resolvers to the MutationType"""
     
     @mutation.field("summarize")
-    async def resolve_summarize(_, info, input: Dict[str, Any]) -> Dict[str, Any]:
+    async def resolve_summarize(_, info, input: Dict[str, Any]) -> Union[SummarizeResponse, ErrorResult]:
         """Summarize text using Gemini AI"""
         try:
-            result = await content_service.summarize_text(
-                text=input["text"],
-                api_key=input["api_key"],
-                max_length=input.get("max_length", 150)
-            )
-            return result.__dict__
+            async with admission_controller.admit("summarize"):
+                return await content_service.summarize_text(
+                    text=input["text"],
+                    api_key=input["api_key"],
+                    max_length=input.get("max_length", 150)
+                )
+        except TokenBudgetExceededError as e:
+            return budget_error(e)
+        except OverloadedError as e:
+            return overloaded_error(e)
         except (LLMProviderError, InvalidAPIKeyError) as e:
-            return {
-                "__typename": "Error",
-                "code": "LLM_ERROR",
-                "message": str(e),
-                "details": "Please check your API key and try again"
-            }
+            return ErrorResult(code="LLM_ERROR", message=str(e), details="Please check your API key and try again")
         except Exception as e:
-            return {
-                "__typename": "Error", 
-                "code": "INTERNAL_ERROR",
-                "message": "An unexpected error occurred",
-                "details": str(e)
-            }
+            return ErrorResult(code="INTERNAL_ERROR", message="An unexpected error occurred", details=str(e))
     
     @mutation.field("explain")
-    async def resolve_explain(_, info, input: Dict[str, Any]) -> Dict[str, Any]:
+    async def resolve_explain(_, info, input: Dict[str, Any]) -> Union[ExplainResponse, ErrorResult]:
         """Explain a concept using Gemini AI"""
         try:
-            # Map GraphQL enum to string
-            level_map = {
-                "BEGINNER": "beginner",
-                "INTERMEDIATE": "intermediate", 
-                "ADVANCED": "advanced"
-            }
-            level = level_map.get(input.get("level", "INTERMEDIATE"), "intermediate")
-            
-            result = await content_service.explain_concept(
-                concept=input["concept"],
-                level=level,
-                api_key=input["api_key"]
-            )
-            
-            # Map back to GraphQL enum
-            result_dict = result.__dict__
-            result_dict["level"] = input.get("level", "INTERMEDIATE")
-            return result_dict
+            # ExplanationLevel is bound to the lowercase level names
+            async with admission_controller.admit("explain"):
+                return await content_service.explain_concept(
+                    concept=input["concept"],
+                    level=input.get("level", "intermediate"),
+                    api_key=input["api_key"]
+                )
             
+        except TokenBudgetExceededError as e:
+            return budget_error(e)
+        except OverloadedError as e:
+            return overloaded_error(e)
         except (LLMProviderError, InvalidAPIKeyError) as e:
-            return {
-                "__typename": "Error",
-                "code": "LLM_ERROR", 
-                "message": str(e),
-                "details": "Please check your API key and try again"
-            }
+            return ErrorResult(code="LLM_ERROR", message=str(e), details="Please check your API key and try again")
         except Exception as e:
-            return {
-                "__typename": "Error",
-                "code": "INTERNAL_ERROR",
-                "message": "An unexpected error occurred", 
-                "details": str(e)
-            }
+            return ErrorResult(code="INTERNAL_ERROR", message="An unexpected error occurred", details=str(e))
     
     @mutation.field("generateQuiz")
-    async def resolve_generate_quiz(_, info, input: Dict[str, Any]) -> Dict[str, Any]:
+    async def resolve_generate_quiz(_, info, input: Dict[str, Any]) -> Union[QuizResponse, ErrorResult]:
         """Generate quiz using Gemini AI"""
         try:
-            # Map GraphQL enum to string
-            difficulty_map = {
-                "EASY": "easy",
-                "MEDIUM": "medium",
-                "HARD": "hard"
-            }
-            difficulty = difficulty_map.get(input.get("difficulty", "MEDIUM"), "medium")
-            
-            result = await content_service.generate_quiz(
-                topic=input.get("topic"),
-                text=input.get("text"),
-                num_questions=input.get("num_questions", 5),
-                difficulty=difficulty,
-                api_key=input["api_key"]
-            )
-            
-            # Convert to dict and map difficulty back to GraphQL enum
-            result_dict = result.__dict__
-            result_dict["difficulty"] = input.get("difficulty", "MEDIUM")
-            
-            # Convert questions to dicts
-            result_dict["questions"] = [q.__dict__ for q in result.questions]
-            
-            return result_dict
+            # QuizDifficulty is bound to the lowercase difficulty names
+            async with admission_controller.admit("generateQuiz"):
+                return await content_service.generate_quiz(
+                    topic=input.get("topic"),
+                    text=input.get("text"),
+                    num_questions=input.get("num_questions", 5),
+                    difficulty=input.get("difficulty", "medium"),
+                    api_key=input["api_key"]
+                )
             
+        except TokenBudgetExceededError as e:
+            return budget_error(e)
+        except OverloadedError as e:
+            return overloaded_error(e)
         except (LLMProviderError, InvalidAPIKeyError) as e:
-            return {
-                "__typename": "Error",
-                "code": "LLM_ERROR",
-                "message": str(e),
-                "details": "Please check your API key and try again"
-            }
+            return ErrorResult(code="LLM_ERROR", message=str(e), details="Please check your API key and try again")
         except Exception as e:
-            return {
-                "__typename": "Error",
-                "code": "INTERNAL_ERROR", 
-                "message": "An unexpected error occurred",
-                "details": str(e)
-            }
+            return ErrorResult(code="INTERNAL_ERROR", message="An unexpected error occurred", details=str(e))
     
     @mutation.field("educate")
-    async def resolve_educate(_, info, input: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate complete educational content using Gemini AI"""
+    async def resolve_educate(_, info, input: Dict[str, Any]) -> Union[EducateResponse, ErrorResult]:
+        """Generate educational content using Gemini AI, producing only the selected parts"""
         try:
-            result = await content_service.generate_education_content(
-                topic=input["topic"],
-                modules_count=input.get("modules_count", 5),
-                api_key=input["api_key"]
-            )
-            
-            # Convert to dict
-            result_dict = {
-                "topic": result.topic,
-                "provider_used": result.provider_used,
-                "pdf_url": result.pdf_url,
-                "generated_at": datetime.utcnow()
-            }
-            
-            # Convert syllabus
-            syllabus_dict = result.syllabus.__dict__
-            result_dict["syllabus"] = syllabus_dict
+            include_pdf = input.get("include_pdf", False)
+            selected = selected_fields(info, "EducateResponse")
+            # A PDF needs the whole course whatever the client selected
+            parts = COURSE_PARTS if include_pdf else COURSE_PARTS & selected
             
-            # Convert modules
-            result_dict["modules"] = [module.__dict__ for module in result.modules]
-            
-            # Convert quiz
-            quiz_dict = result.quiz.__dict__
-            quiz_dict["questions"] = [q.__dict__ for q in result.quiz.questions]
-            result_dict["quiz"] = quiz_dict
-            
-            # Handle PDF generation if requested
-            if input.get("include_pdf", False):
-                try:
-                    from services.pdf_service import pdf_service
-                    pdf_path = pdf_service.generate_education_pdf({
-                        "topic": result.topic,
-                        "provider_used": result.provider_used,
-                        "syllabus": syllabus_dict,
-                        "modules": result_dict["modules"],
-                        "quiz": quiz_dict
-                    })
-                    result_dict["pdf_url"] = f"/download/pdf/{pdf_path.split('/')[-1]}"
-                except Exception as pdf_error:
-                    print(f"PDF generation failed: {pdf_error}")
-                    result_dict["pdf_url"] = None
-            
-            return result_dict
+            topic = input["topic"]
+            modules_count = input.get("modules_count", 5)
+            cost = educate_cost(modules_count, include_pdf, bool(parts & {"syllabus", "modules"}),
+                                "modules" in parts, "quiz" in parts)
+            async with admission_controller.admit("educate", cost):
+                # Parts that were not generated stay None; they were not selected, so GraphQL never resolves them
+                result = await content_service.generate_education_content(
+                    topic, modules_count, input["api_key"], parts
+                )
+                
+                # Handle PDF generation if requested
+                if include_pdf:
+                    # A catalogued course comes with a rendered PDF to copy
+                    catalogued = await offload(course_catalogue.get, topic, modules_count)
+                    source_pdf = catalogued.get("pdf_path") if catalogued else None
+                    await render_course_pdf(result.topic_id, result, source_pdf=source_pdf)
+                
+                return result
             
+        except TokenBudgetExceededError as e:
+            return budget_error(e)
+        except OverloadedError as e:
+            return overloaded_error(e)
         except (LLMProviderError, InvalidAPIKeyError) as e:
-            return {
-                "__typename": "Error",
-                "code": "LLM_ERROR",
-                "message": str(e),
-                "details": "Please check your API key and try again"
-            }
+            return ErrorResult(code="LLM_ERROR", message=str(e), details="Please check your API key and try again")
+        except Exception as e:
+            return ErrorResult(code="INTERNAL_ERROR", message="An unexpected error occurred", details=str(e))
+    
+    @mutation.field("regenerateModule")
+    async def resolve_regenerate_module(_, info, input: Dict[str, Any]) -> Union[EducateResponse, ErrorResult]:
+        """Regenerate a single module of a stored course with one LLM call"""
+        try:
+            topic_id = input["topic_id"]
+            had_pdf = (await offload(content_service.get_course, topic_id))["pdf_path"] is not None
+            async with admission_controller.admit("regenerateModule", regeneration_cost("regenerateModule", had_pdf)):
+                result = await content_service.regenerate_module(
+                    topic_id, input["module_index"], input["api_key"]
+                )
+                # The cached PDF shows the old module, so replace it
+                if had_pdf:
+                    await render_course_pdf(topic_id, result)
+                return result
+        except Exception as e:
+            return regeneration_error(e)
+    
+    @mutation.field("regenerateQuiz")
+    async def resolve_regenerate_quiz(_, info, input: Dict[str, Any]) -> Union[EducateResponse, ErrorResult]:
+        """Regenerate the quiz of a stored course with one LLM call"""
+        try:
+            topic_id = input["topic_id"]
+            had_pdf = (await offload(content_service.get_course, topic_id))["pdf_path"] is not None
+            async with admission_controller.admit("regenerateQuiz", regeneration_cost("regenerateQuiz", had_pdf)):
+                result = await content_service.regenerate_quiz(topic_id, input["api_key"])
+                # The cached PDF shows the old quiz, so replace it
+                if had_pdf:
+                    await render_course_pdf(topic_id, result)
+                return result
         except Exception as e:
-            return {
-                "__typename": "Error",
-                "code": "INTERNAL_ERROR",
-                "message": "An unexpected error occurred",
-                "details": str(e)
-            }
+            return regeneration_error(e)
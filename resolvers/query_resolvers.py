@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Any, Dict, Optional
 from services.content_service import content_service
+from services.usage_service import usage_tracker
+from utils.kv_store import offload
 from config import settings
 
 def query_resolvers(query):
@@ -20,7 +22,7 @@ def query_resolvers(query):
     async def resolve_topics(*_) -> Dict[str, Any]:
         """Get all saved topics"""
         try:
-            result = content_service.get_saved_topics()
+            result = await offload(content_service.get_saved_topics)
             return result
         except Exception as e:
             return {
@@ -32,14 +34,15 @@ def query_resolvers(query):
     async def resolve_topic(_, info, id: str) -> Optional[Dict[str, Any]]:
         """Get specific topic by ID"""
         try:
-            topics_data = content_service.get_saved_topics()
-            for topic in topics_data["topics"]:
-                if topic["id"] == id:
-                    return topic
-            return None
+            return await offload(content_service.get_topic, id)
         except Exception:
             return None
     
+    @query.field("usage")
+    async def resolve_usage(_, info, api_key: str) -> Dict[str, Any]:
+        """Get token usage per operation in the rolling window for one key"""
+        return await offload(usage_tracker.report, api_key)
+    
     @query.field("apiInfo")
     async def resolve_api_info(*_) -> Dict[str, Any]:
         """Get API information"""
@@ -51,10 +54,13 @@ def query_resolvers(query):
                 "Query: health - Health check",
                 "Query: topics - Get saved topics",
                 "Query: topic(id) - Get specific topic",
+                "Query: usage(api_key) - Token usage and budget",
                 "Mutation: summarize - Summarize text",
                 "Mutation: explain - Explain concept", 
                 "Mutation: generateQuiz - Generate quiz",
-                "Mutation: educate - Generate complete educational content"
+                "Mutation: educate - Generate complete educational content",
+                "Mutation: regenerateModule - Regenerate one module of a stored course",
+                "Mutation: regenerateQuiz - Regenerate the quiz of a stored course"
             ],
             "features": [
                 "Text summarization using Gemini AI",
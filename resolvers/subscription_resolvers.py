@@ -1,31 +1,48 @@
 import asyncio
 from typing import Any, Dict, AsyncGenerator
 from datetime import datetime
+from config import settings
+from services.broadcast_service import broadcast_hub
+
+CONTENT_GENERATION_STEPS = [
+    {"step": "Initializing", "progress": 0, "message": "Starting content generation for '{topic}'"},
+    {"step": "Generating Syllabus", "progress": 20, "message": "Creating course outline and structure"},
+    {"step": "Creating Modules", "progress": 40, "message": "Generating detailed module content"},
+    {"step": "Generating Quiz", "progress": 70, "message": "Creating assessment questions"},
+    {"step": "Finalizing", "progress": 90, "message": "Preparing final content"},
+    {"step": "Complete", "progress": 100, "message": "Content generation completed successfully"}
+]
+
+async def content_generation_steps(topic: str) -> AsyncGenerator[Dict[str, Any], None]:
+    """Upstream progress events for one topic, shared by every client watching it"""
+    for index, step_data in enumerate(CONTENT_GENERATION_STEPS):
+        if index:
+            await asyncio.sleep(settings.SUBSCRIPTION_STEP_INTERVAL)  # Simulate processing time
+        yield {
+            **step_data,
+            "message": step_data["message"].format(topic=topic),
+            "completed": step_data["progress"] >= 100,
+            "timestamp": datetime.utcnow()
+        }
 
 def subscription_resolvers(subscription):
     """Bind subscription resolvers to the SubscriptionType"""
-    
+
     @subscription.source("contentGeneration")
     async def content_generation_source(_, info, topic: str) -> AsyncGenerator[Dict[str, Any], None]:
         """Source for content generation progress updates"""
-        steps = [
-            {"step": "Initializing", "progress": 0, "message": f"Starting content generation for '{topic}'"},
-            {"step": "Generating Syllabus", "progress": 20, "message": "Creating course outline and structure"},
-            {"step": "Creating Modules", "progress": 40, "message": "Generating detailed module content"},
-            {"step": "Generating Quiz", "progress": 70, "message": "Creating assessment questions"},
-            {"step": "Finalizing", "progress": 90, "message": "Preparing final content"},
-            {"step": "Complete", "progress": 100, "message": "Content generation completed successfully"}
-        ]
-        
-        for step_data in steps:
-            yield {
-                **step_data,
-                "completed": step_data["progress"] >= 100,
-                "timestamp": datetime.utcnow()
-            }
-            await asyncio.sleep(2)  # Simulate processing time
-    
+        subscriber = broadcast_hub.subscribe(
+            ("contentGeneration", topic),
+            lambda: content_generation_steps(topic),
+            is_final=lambda event: event["completed"],
+        )
+        try:
+            async for event in subscriber:
+                yield event
+        finally:
+            subscriber.close()
+
     @subscription.field("contentGeneration")
-    def content_generation_resolver(data, *_) -> Dict[str, Any]:
+    def content_generation_resolver(data, *_, **__) -> Dict[str, Any]:
         """Resolver for content generation subscription"""
         return data
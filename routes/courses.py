@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import AsyncIterator, BinaryIO, Dict, List, Tuple, Union
+
+import aiofiles
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+
+from config import settings
+from schemas import CourseExportRequest, ExportFormat
+from services.content_service import content_service, join_providers
+from services.export_service import Renderer, get_renderer
+from utils.admission import Ticket, admission_controller
+from utils.http_headers import RangeNotSatisfiable, etag_matches, parse_range
+from utils.kv_store import offload
+from utils.zip_stream import ZipStream
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def course_export_data(topic_id: str) -> Dict:
+    """Export input for a stored course; raises TopicNotFoundError or 409 when incomplete"""
+    course = content_service.get_course(topic_id)
+    if course["syllabus"] is None or course["modules"] is None or course["quiz"] is None:
+        raise HTTPException(
+            status_code=409,
+            detail="Course was generated without all of syllabus, modules and quiz"
+        )
+    return {
+        "topic": course["topic"],
+        "provider_used": join_providers(course["providers"]),
+        "syllabus": course["syllabus"].model_dump(),
+        "modules": [module.model_dump() for module in course["modules"]],
+        "quiz": course["quiz"].model_dump(),
+    }
+
+
+def content_etag(education_data: Dict) -> str:
+    """Strong ETag of the course content; changes whenever a part is regenerated"""
+    digest = hashlib.sha256(json.dumps(education_data, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+async def iter_file(f, start: int, length: int) -> AsyncIterator[bytes]:
+    """Chunks of an open aiofiles file from start, closing it when done"""
+    try:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(settings.PDF_STREAM_CHUNK_BYTES, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        await f.close()
+
+
+async def stream_and_cache(buffer: BinaryIO, cache_path: str, topic_id: str) -> AsyncIterator[bytes]:
+    """Stream a freshly rendered PDF while writing it to the cache
+    
+    The cache file only appears, atomically, once the whole PDF has been
+    sent; an interrupted download leaves nothing behind.
+    """
+    from services.pdf_service import pdf_service
+    try:
+        async with pdf_service.storage.open_atomic(cache_path) as cache:
+            while True:
+                chunk = await run_in_threadpool(buffer.read, settings.PDF_STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                await cache.write(chunk)
+                yield chunk
+        await run_in_threadpool(pdf_service.evict_course_pdfs, topic_id, cache_path)
+    finally:
+        buffer.close()
+
+
+@router.get("/courses/{topic_id}/pdf")
+async def download_course_pdf(topic_id: str, request: Request):
+    """
+    Download the PDF of a stored course, rendered on demand.
+    
+    - **topic_id**: ID returned by educate
+    
+    Responses carry an `ETag` of the course content: send it back in
+    `If-None-Match` to get `304 Not Modified` while the course is unchanged.
+    Once rendered the PDF is cached, and `Range` requests (with optional
+    `If-Range`) return `206 Partial Content` for resumed downloads. With an
+    object store backend the response redirects to the stored PDF instead.
+    """
+    education_data = await offload(course_export_data, topic_id)
+    etag_value = content_etag(education_data)
+    etag = f'"{etag_value}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="course_{topic_id}.pdf"',
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]})
+
+    # reportlab is slow to import; load it with the first PDF request
+    from services.pdf_service import pdf_service
+    if pdf_service.storage.redirects_downloads:
+        async with admission_controller.admit("pdf"):
+            cache_path = await ensure_course_pdf(topic_id, education_data, local=False)
+        return RedirectResponse(
+            pdf_service.storage.download_url(cache_path, f"course_{topic_id}.pdf"),
+            status_code=307,
+            headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]}
+        )
+
+    cache_path = pdf_service.course_pdf_path(topic_id, etag_value)
+    range_header = request.headers.get("range")
+    if not await pdf_service.storage.exists(cache_path):
+        if not range_header:
+            # ReportLab lays out the whole document before writing any of it, so
+            # render into a spooled buffer and stream that as it is cached
+            async with admission_controller.admit("pdf"):
+                buffer = await run_in_threadpool(pdf_service.render_spooled, education_data)
+            size = buffer.seek(0, os.SEEK_END)
+            buffer.seek(0)
+            return StreamingResponse(
+                stream_and_cache(buffer, cache_path, topic_id),
+                media_type="application/pdf",
+                headers={**headers, "Content-Length": str(size)}
+            )
+        # A byte range needs the complete file first
+        async with admission_controller.admit("pdf"):
+            await ensure_course_pdf(topic_id, education_data)
+
+    # Hold the file open so a concurrent re-render or the janitor can't remove it mid-download
+    try:
+        f = await aiofiles.open(cache_path, "rb")
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="PDF was replaced during the request; retry")
+    size = await f.seek(0, os.SEEK_END)
+
+    if_range = request.headers.get("if-range")
+    try:
+        byte_range = parse_range(range_header, size) if not if_range or if_range == etag else None
+    except RangeNotSatisfiable:
+        await f.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_file(f, start, end - start + 1),
+        status_code=status_code,
+        media_type="application/pdf",
+        headers=headers
+    )
+
+
+@router.get("/courses/{topic_id}/export")
+async def export_course(topic_id: str, request: Request, format: ExportFormat = ExportFormat.HTML):
+    """
+    Download a stored course as HTML, Markdown, EPUB or PDF.
+    
+    - **topic_id**: ID returned by educate
+    - **format**: html (default), markdown, epub or pdf
+    
+    HTML and Markdown come from precompiled templates and cost a fraction of
+    a PDF render. Responses carry an `ETag` for `If-None-Match` revalidation.
+    """
+    if format == ExportFormat.PDF:
+        return await download_course_pdf(topic_id, request)
+    renderer = get_renderer(format.value)
+    education_data = await offload(course_export_data, topic_id)
+    etag = f'"{content_etag(education_data)}-{renderer.name}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+    content = await run_in_threadpool(renderer.render, education_data)
+    return Response(
+        content=content,
+        media_type=renderer.media_type,
+        headers={
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+            "Content-Disposition": f'attachment; filename="course_{topic_id}.{renderer.extension}"',
+        }
+    )
+
+
+async def ensure_course_pdf(topic_id: str, education_data: Dict, local: bool = True) -> str:
+    """Path of the course's cached PDF, rendering and publishing it if needed
+    
+    The PDF is downloaded from the object store when another worker rendered
+    it; with local=False a stored copy is enough and nothing is downloaded.
+    """
+    from services.pdf_service import pdf_service
+    storage = pdf_service.storage
+    cache_path = pdf_service.course_pdf_path(topic_id, content_etag(education_data))
+    if await storage.exists(cache_path):
+        return cache_path
+    if not await run_in_threadpool(storage.fetch if local else storage.is_published, cache_path):
+        await pdf_service.render_file_async(education_data, cache_path)
+        await run_in_threadpool(pdf_service.publish, cache_path)
+        await run_in_threadpool(pdf_service.evict_course_pdfs, topic_id, cache_path)
+    return cache_path
+
+
+async def render_course_file(topic_id: str, education_data: Dict, renderer: Renderer) -> Union[str, bytes]:
+    """A course export: the cached file's path for PDFs, rendered bytes otherwise"""
+    if renderer.name == "pdf":
+        return await ensure_course_pdf(topic_id, education_data)
+    return await run_in_threadpool(renderer.render, education_data)
+
+
+def archive_name(index: int, topic: str, extension: str = "pdf") -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", topic).strip("_")[:60] or "course"
+    return f"{index:02d}_{slug}.{extension}"
+
+
+async def stream_course_archive(courses: List[Tuple[str, Dict]], renderer: Renderer) -> AsyncIterator[bytes]:
+    """ZIP of course exports, each entry sent as soon as its file is ready
+    
+    Courses that fail to render are listed in errors.txt instead, since the
+    response status has already been sent by then.
+    """
+    archive = ZipStream()
+    pending = {
+        asyncio.ensure_future(render_course_file(topic_id, education_data, renderer)):
+            (index, topic_id, education_data)
+        for index, (topic_id, education_data) in enumerate(courses, start=1)
+    }
+    failures = []
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, topic_id, education_data = pending.pop(task)
+                name = archive_name(index, education_data["topic"], renderer.extension)
+                try:
+                    exported = task.result()
+                    if isinstance(exported, bytes):
+                        await run_in_threadpool(archive.write_bytes, name, exported)
+                    else:
+                        await run_in_threadpool(archive.write_file, exported, name)
+                except Exception as e:
+                    logger.error(f"Course export failed for {topic_id}: {e}")
+                    failures.append(f"{topic_id}: {e}")
+                    continue
+                yield archive.drain()
+        if failures:
+            archive.write_bytes("errors.txt", ("\n".join(failures) + "\n").encode("utf-8"))
+        archive.close()
+        yield archive.drain()
+    finally:
+        # Client went away: stop waiting on renders nobody will receive
+        for task in pending:
+            task.cancel()
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """StreamingResponse that releases an admission ticket however the response ends"""
+
+    def __init__(self, *args, ticket: Ticket, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        # Even if the client goes away before the body iterator starts
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission_controller.release(self.ticket)
+
+
+@router.post("/courses/export")
+async def export_courses(request: CourseExportRequest):
+    """
+    Download several stored courses as one ZIP archive.
+    
+    - **topic_ids**: IDs returned by educate (up to 100)
+    - **format**: pdf (default), html, markdown or epub
+    
+    PDFs render in parallel in the render pool, cached PDFs are reused, and
+    the archive streams as each file finishes.
+    """
+    renderer = get_renderer(request.format.value)
+    topic_ids = list(dict.fromkeys(request.topic_ids))
+    # Resolve every course first so unknown or incomplete ones fail before streaming
+    courses = [(topic_id, await offload(course_export_data, topic_id)) for topic_id in topic_ids]
+    # Admitted before the response starts, so an overloaded server can still answer 503
+    ticket = await admission_controller.acquire("export")
+    return AdmittedStreamingResponse(
+        stream_course_archive(courses, renderer),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="courses.zip"'},
+        ticket=ticket
+    )
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, RedirectResponse
 from schemas import EducateRequest, EducateResponse
 from services.content_service import content_service
-from services.pdf_service import pdf_service
-from config import settings
+from services.storage_service import artifact_storage
+from utils.admission import admission_controller, educate_cost
+from utils.exceptions import OverloadedError, TokenBudgetExceededError
+from utils.kv_store import offload
+from utils.tracing import tracer
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.post("/educate", response_model=EducateResponse)
@@ -19,34 +25,42 @@ async def generate_education_content(request: EducateRequest, background_tasks:
     - **include_pdf**: Whether to generate a PDF export (optional)
     """
     try:
-        # Generate educational content
-        result = await content_service.generate_education_content(
-            topic=request.topic,
-            modules_count=request.modules_count,
-            api_key=request.api_key
-        )
-        
-        # Generate PDF if requested
-        if request.include_pdf:
-            try:
-                # Convert result to dict for PDF generation
-                education_data = {
-                    "topic": result.topic,
-                    "provider_used": result.provider_used,
-                    "syllabus": result.syllabus.dict(),
-                    "modules": [module.dict() for module in result.modules],
-                    "quiz": result.quiz.dict()
-                }
-                
-                pdf_path = pdf_service.generate_education_pdf(education_data)
-                # Create a public URL for the PDF (adjust based on your deployment)
-                result.pdf_url = f"/api/v1/download/pdf/{os.path.basename(pdf_path)}"
-            except Exception as pdf_error:
-                # Don't fail the entire request if PDF generation fails
-                print(f"PDF generation failed: {pdf_error}")
-                result.pdf_url = None
-        
+        async with admission_controller.admit("educate", educate_cost(request.modules_count, request.include_pdf)):
+            # Generate educational content
+            result = await content_service.generate_education_content(
+                topic=request.topic,
+                modules_count=request.modules_count,
+                api_key=request.api_key
+            )
+            
+            # Generate PDF if requested
+            if request.include_pdf:
+                try:
+                    # reportlab is slow to import; load it with the first PDF request
+                    from services.pdf_service import pdf_service
+                    # Convert result to dict for PDF generation
+                    education_data = {
+                        "topic": result.topic,
+                        "provider_used": result.provider_used,
+                        "syllabus": result.syllabus.dict(),
+                        "modules": [module.dict() for module in result.modules],
+                        "quiz": result.quiz.dict()
+                    }
+                    
+                    pdf_path = await pdf_service.generate_education_pdf_async(education_data)
+                    await offload(content_service.set_course_pdf, result.topic_id, pdf_path)
+                    # Create a public URL for the PDF (adjust based on your deployment)
+                    result.pdf_url = f"/api/v1/download/pdf/{os.path.basename(pdf_path)}"
+                except Exception as pdf_error:
+                    # Don't fail the entire request if PDF generation fails
+                    span = tracer.current_span()
+                    trace_id = span.trace_id if span else None
+                    logger.error(f"PDF generation failed (trace {trace_id}): {pdf_error}")
+                    result.pdf_url = None
+            
         return result
+    except (TokenBudgetExceededError, OverloadedError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -57,9 +71,16 @@ async def download_pdf(filename: str):
     
     - **filename**: Name of the PDF file to download
     """
-    pdf_path = os.path.join(settings.PDF_DIRECTORY, filename)
+    if artifact_storage.redirects_downloads:
+        try:
+            pdf_path = artifact_storage.path(filename)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="PDF file not found")
+        return RedirectResponse(artifact_storage.download_url(pdf_path, filename), status_code=307)
+    
+    pdf_path = await artifact_storage.find(filename)
     
-    if not os.path.exists(pdf_path):
+    if pdf_path is None:
         raise HTTPException(status_code=404, detail="PDF file not found")
     
     return FileResponse(
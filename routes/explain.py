@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from schemas import ExplainRequest, ExplainResponse
 from services.content_service import content_service
+from utils.admission import admission_controller
+from utils.exceptions import OverloadedError, TokenBudgetExceededError
 
 router = APIRouter()
 
@@ -14,11 +16,14 @@ async def explain_concept(request: ExplainRequest):
     - **level**: Explanation level (beginner, intermediate, advanced)
     """
     try:
-        result = await content_service.explain_concept(
-            concept=request.concept,
-            level=request.level,
-            api_key=request.api_key
-        )
+        async with admission_controller.admit("explain"):
+            result = await content_service.explain_concept(
+                concept=request.concept,
+                level=request.level,
+                api_key=request.api_key
+            )
         return result
+    except (TokenBudgetExceededError, OverloadedError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
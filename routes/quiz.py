@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from schemas import QuizRequest, QuizResponse
 from services.content_service import content_service
+from utils.admission import admission_controller
+from utils.exceptions import OverloadedError, TokenBudgetExceededError
 
 router = APIRouter()
 
@@ -16,13 +18,16 @@ async def generate_quiz(request: QuizRequest):
     - **difficulty**: Quiz difficulty level (easy, medium, hard)
     """
     try:
-        result = await content_service.generate_quiz(
-            topic=request.topic,
-            text=request.text,
-            num_questions=request.num_questions,
-            difficulty=request.difficulty,
-            api_key=request.api_key
-        )
+        async with admission_controller.admit("generateQuiz"):
+            result = await content_service.generate_quiz(
+                topic=request.topic,
+                text=request.text,
+                num_questions=request.num_questions,
+                difficulty=request.difficulty,
+                api_key=request.api_key
+            )
         return result
+    except (TokenBudgetExceededError, OverloadedError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
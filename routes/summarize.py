@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from schemas import SummarizeRequest, SummarizeResponse
 from services.content_service import content_service
+from utils.admission import admission_controller
+from utils.exceptions import OverloadedError, TokenBudgetExceededError
 
 router = APIRouter()
 
@@ -14,11 +16,14 @@ async def summarize_text(request: SummarizeRequest):
     - **max_length**: Maximum length of the summary (50-500 words)
     """
     try:
-        result = await content_service.summarize_text(
-            text=request.text,
-            api_key=request.api_key,
-            max_length=request.max_length
-        )
+        async with admission_controller.admit("summarize"):
+            result = await content_service.summarize_text(
+                text=request.text,
+                api_key=request.api_key,
+                max_length=request.max_length
+            )
         return result
+    except (TokenBudgetExceededError, OverloadedError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
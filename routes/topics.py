@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from schemas import TopicsResponse
 from services.content_service import content_service
+from utils.admission import admission_controller
+from utils.kv_store import offload
 
 router = APIRouter()
 
@@ -16,8 +18,10 @@ async def get_saved_topics():
     - Provider used
     - Number of modules
     """
-    try:
-        result = content_service.get_saved_topics()
-        return TopicsResponse(**result)
-    except Exception as e:
-        return TopicsResponse(topics=[], total=0)
+    # Cheap, so it may use the capacity reserved from generation requests
+    async with admission_controller.admit("topics"):
+        try:
+            result = await offload(content_service.get_saved_topics)
+            return TopicsResponse(**result)
+        except Exception as e:
+            return TopicsResponse(topics=[], total=0)
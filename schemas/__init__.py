@@ -42,6 +42,16 @@ class EducateRequest(BaseRequest):
     modules_count: Optional[int] = Field(5, ge=3, le=10, description="Number of modules in the syllabus")
     include_pdf: Optional[bool] = Field(False, description="Generate PDF export")
 
+class ExportFormat(str, Enum):
+    PDF = "pdf"
+    HTML = "html"
+    MARKDOWN = "markdown"
+    EPUB = "epub"
+
+class CourseExportRequest(BaseModel):
+    topic_ids: List[str] = Field(..., min_length=1, max_length=100, description="Stored course IDs to export")
+    format: ExportFormat = Field(ExportFormat.PDF, description="Export format: pdf, html, markdown, epub")
+
 # Response Models
 class SummarizeResponse(BaseModel):
     summary: str
@@ -83,6 +93,7 @@ class Syllabus(BaseModel):
     learning_objectives: List[str]
 
 class EducateResponse(BaseModel):
+    topic_id: Optional[str] = None
     topic: str
     syllabus: Syllabus
     modules: List[Module]
@@ -105,3 +116,9 @@ class ErrorResponse(BaseModel):
     error: str
     detail: str
     status_code: int
+
+class ErrorResult(BaseModel):
+    """The GraphQL Error member of the result unions"""
+    code: str
+    message: str
+    details: Optional[str] = None
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Optional, Set
+
+from config import settings
+from utils.metrics import SUBSCRIPTION_EVENTS_TOTAL, SUBSCRIPTION_STREAMS
+
+logger = logging.getLogger(__name__)
+
+
+def never_final(event: Any) -> bool:
+    return False
+
+
+class Subscriber:
+    """One consumer of a broadcast stream, iterated with `async for`
+
+    Pending events wait in a bounded queue. When a slow consumer lets it fill
+    up, the oldest pending progress event is dropped in favour of the new one,
+    so the consumer skips to fresher progress; final events are never dropped.
+    """
+
+    def __init__(self, hub: "BroadcastHub", channel: "_Channel", max_queue: int):
+        self._hub = hub
+        self._channel = channel
+        self._max_queue = max_queue
+        self._events: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._finished = False
+        self._error: Optional[BaseException] = None
+        self.closed = False
+        self.coalesced = 0
+
+    def _publish(self, event: Any, final: bool):
+        if len(self._events) >= self._max_queue:
+            for index, (_, pending_final) in enumerate(self._events):
+                if not pending_final:
+                    del self._events[index]
+                    self.coalesced += 1
+                    SUBSCRIPTION_EVENTS_TOTAL.inc(outcome="coalesced")
+                    break
+        self._events.append((event, final))
+        self._wakeup.set()
+
+    def _finish(self, error: Optional[BaseException] = None):
+        self._finished = True
+        self._error = error
+        self._wakeup.set()
+
+    def __aiter__(self) -> "Subscriber":
+        return self
+
+    async def __anext__(self) -> Any:
+        while not self._events:
+            if self._finished or self.closed:
+                if self._error is not None and not self.closed:
+                    raise self._error
+                raise StopAsyncIteration
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        event, _ = self._events.popleft()
+        SUBSCRIPTION_EVENTS_TOTAL.inc(outcome="delivered")
+        return event
+
+    def close(self):
+        """Stop receiving events; the upstream stream stops with its last subscriber"""
+        if not self.closed:
+            self.closed = True
+            self._events.clear()
+            self._wakeup.set()
+            self._hub._leave(self)
+
+
+class _Channel:
+    """One upstream event stream and the subscribers sharing it"""
+
+    def __init__(self, key: Hashable, is_final: Callable[[Any], bool]):
+        self.key = key
+        self.is_final = is_final
+        self.subscribers: Set[Subscriber] = set()
+        self.latest: Any = None
+        self.has_latest = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class BroadcastHub:
+    """Fans one upstream event stream out to every subscriber of the same key
+
+    The first subscriber to a key starts its producer and the last one to
+    leave cancels it, so any number of clients watching the same job share a
+    single upstream stream. A subscriber joining a running stream first gets
+    the latest event. Everything runs on the event loop, so no locking.
+    """
+
+    def __init__(self, max_queue: int = None):
+        self.max_queue = max_queue or settings.SUBSCRIPTION_QUEUE_SIZE
+        self._channels: Dict[Hashable, _Channel] = {}
+
+    def subscribe(self, key: Hashable, producer: Callable[[], AsyncIterator[Any]],
+                  is_final: Callable[[Any], bool] = never_final) -> Subscriber:
+        """Subscribe to `key`, calling `producer()` for the upstream stream if none is running"""
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel(key, is_final)
+            channel.task = asyncio.ensure_future(self._pump(channel, producer))
+            SUBSCRIPTION_STREAMS.inc()
+        subscriber = Subscriber(self, channel, self.max_queue)
+        channel.subscribers.add(subscriber)
+        if channel.has_latest:
+            subscriber._publish(channel.latest, channel.is_final(channel.latest))
+        return subscriber
+
+    def subscriber_count(self, key: Hashable) -> int:
+        channel = self._channels.get(key)
+        return len(channel.subscribers) if channel else 0
+
+    def stream_count(self) -> int:
+        return len(self._channels)
+
+    async def _pump(self, channel: _Channel, producer: Callable[[], AsyncIterator[Any]]):
+        error = None
+        try:
+            async for event in producer():
+                final = channel.is_final(event)
+                channel.latest, channel.has_latest = event, True
+                for subscriber in list(channel.subscribers):
+                    subscriber._publish(event, final)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast stream {channel.key!r} failed: {e}")
+            error = e
+        finally:
+            self._close_channel(channel)
+        # Subscribers drain what is queued, then stop (or see the producer's error)
+        for subscriber in list(channel.subscribers):
+            subscriber._finish(error)
+
+    def _close_channel(self, channel: _Channel):
+        # Later subscribers to the key start a fresh stream
+        if self._channels.get(channel.key) is channel:
+            del self._channels[channel.key]
+            SUBSCRIPTION_STREAMS.dec()
+
+    def _leave(self, subscriber: Subscriber):
+        channel = subscriber._channel
+        channel.subscribers.discard(subscriber)
+        if not channel.subscribers and channel.task and not channel.task.done():
+            channel.task.cancel()
+            self._close_channel(channel)
+
+
+# Singleton instance
+broadcast_hub = BroadcastHub()
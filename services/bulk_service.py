@@ -0,0 +1,174 @@
+import asyncio
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from config import settings
+from schemas import EducateRequest, ExplainRequest, QuizRequest, SummarizeRequest
+from services.content_service import content_service
+
+REQUEST_MODELS = {
+    "summarize": SummarizeRequest,
+    "explain": ExplainRequest,
+    "quiz": QuizRequest,
+    "educate": EducateRequest,
+}
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+def read_records(path: str, input_format: str = None) -> Iterator[Record]:
+    """Stream (id, record) pairs from a JSONL or CSV file
+    
+    Records without an `id` are identified by their line (JSONL) or row (CSV)
+    number, so resuming requires the input file to stay unchanged.
+    """
+    input_format = input_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, encoding="utf-8", newline="") as f:
+        if input_format == "csv":
+            for number, row in enumerate(csv.DictReader(f), start=1):
+                # Empty cells mean "use the default", as a missing JSON key would
+                record = {k: v for k, v in row.items() if k and v not in (None, "")}
+                yield str(record.pop("id", number)), record
+        elif input_format == "jsonl":
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{number}: invalid JSON: {e}") from e
+                yield str(record.pop("id", number)), record
+        else:
+            raise ValueError(f"Unknown input format: {input_format}")
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """IDs already completed in an earlier run's output
+    
+    The output file is the checkpoint: a line is only counted once fully
+    written, and a torn last line from a crash is cut off. Failed records
+    are not counted, so they are retried.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    valid_end = 0
+    with open(output_path, "rb+") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            valid_end += len(line)
+            if entry.get("status") == "ok":
+                done.add(entry["id"])
+        f.truncate(valid_end)
+    return done
+
+
+async def run_record(operation: str, record: Dict[str, Any], api_key: Optional[str] = None) -> Dict[str, Any]:
+    """Validate one record and run it through ContentService"""
+    model = REQUEST_MODELS.get(operation)
+    if model is None:
+        raise ValueError(f"Unknown operation: {operation!r}")
+    fields = {k: v for k, v in record.items() if k != "operation"}
+    fields.setdefault("api_key", api_key or settings.GEMINI_API_KEY)
+    request = model(**fields)
+
+    if operation == "summarize":
+        result = await content_service.summarize_text(request.text, request.api_key, request.max_length)
+    elif operation == "explain":
+        result = await content_service.explain_concept(request.concept, request.level, request.api_key)
+    elif operation == "quiz":
+        result = await content_service.generate_quiz(
+            request.topic, request.text, request.num_questions, request.difficulty, request.api_key
+        )
+    else:
+        # Skip topic history: a bulk run would otherwise grow it without bound
+        course = await content_service.start_course(request.topic, request.modules_count, request.api_key)
+        syllabus, modules, quiz = await course.complete()
+        return {
+            "topic": request.topic,
+            "provider_used": course.provider_used(),
+            "syllabus": syllabus.model_dump(),
+            "modules": [module.model_dump() for module in modules],
+            "quiz": quiz.model_dump(),
+        }
+    return result.model_dump()
+
+
+@dataclass
+class BulkProgress:
+    """Running totals for one bulk run"""
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        return (f"{self.processed} records ({self.succeeded} ok, {self.failed} failed, "
+                f"{self.skipped} already done) in {elapsed:.1f}s, {rate:.2f} records/s")
+
+
+async def run_bulk(records: Iterable[Record], output_path: str, operation: str = None,
+                   api_key: Optional[str] = None, concurrency: int = None, resume: bool = True,
+                   on_progress: Callable[[BulkProgress], None] = None) -> BulkProgress:
+    """Run records through ContentService, appending one JSON line per result
+    
+    Records are pulled from the iterable only as workers free up and each
+    result is written as soon as it completes, so memory stays flat however
+    large the input is. Output lines are in completion order.
+    """
+    concurrency = concurrency or settings.BULK_CONCURRENCY
+    done = load_checkpoint(output_path) if resume else set()
+    progress = BulkProgress()
+    queue: "asyncio.Queue[Optional[Record]]" = asyncio.Queue(maxsize=concurrency * 2)
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        def write(entry: Dict[str, Any]):
+            out.write(json.dumps(entry, default=str) + "\n")
+            out.flush()
+
+        async def produce():
+            for record_id, record in records:
+                if record_id in done:
+                    progress.skipped += 1
+                    continue
+                await queue.put((record_id, record))
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                record_id, record = item
+                record_operation = record.get("operation", operation)
+                try:
+                    result = await run_record(record_operation, record, api_key)
+                except Exception as e:
+                    progress.failed += 1
+                    write({"id": record_id, "operation": record_operation, "status": "error",
+                           "error": f"{type(e).__name__}: {e}"})
+                else:
+                    progress.succeeded += 1
+                    write({"id": record_id, "operation": record_operation, "status": "ok",
+                           "result": result})
+                if on_progress:
+                    on_progress(progress)
+
+        await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    return progress
@@ -0,0 +1,49 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from schemas import Module, QuizResponse, Syllabus
+from utils.kv_store import KVStore, store
+from utils.metrics import CATALOGUE_LOOKUPS_TOTAL
+
+
+def catalogue_key(topic: str, modules_count: int) -> str:
+    """Catalogue key; topics differing only in case or spacing share an entry"""
+    return f"{' '.join(topic.lower().split())}|{modules_count}"
+
+
+class CourseCatalogue:
+    """Pre-generated courses in the persistent store, keyed by topic and size"""
+
+    NAMESPACE = "catalogue"
+
+    def __init__(self, kv_store: KVStore = None):
+        self.store = kv_store or store
+
+    def get(self, topic: str, modules_count: int) -> Optional[Dict[str, Any]]:
+        entry = self.store.get(self.NAMESPACE, catalogue_key(topic, modules_count))
+        CATALOGUE_LOOKUPS_TOTAL.inc(outcome="hit" if entry else "miss")
+        return entry
+
+    def put(self, topic: str, modules_count: int, syllabus: Syllabus, modules: List[Module],
+            quiz: QuizResponse, providers: Dict[str, str], pdf_path: Optional[str] = None):
+        self.store.set(self.NAMESPACE, catalogue_key(topic, modules_count), {
+            "topic": topic,
+            "modules_count": modules_count,
+            "syllabus": syllabus.model_dump(),
+            "modules": [module.model_dump() for module in modules],
+            "quiz": quiz.model_dump(),
+            "providers": providers,
+            "pdf_path": pdf_path,
+            "generated_at": time.time(),
+        })
+
+    def is_fresh(self, topic: str, modules_count: int, max_age: float) -> bool:
+        """Whether the topic is catalogued and younger than max_age seconds"""
+        entry = self.store.get(self.NAMESPACE, catalogue_key(topic, modules_count))
+        return bool(entry) and time.time() - entry["generated_at"] < max_age
+
+    def __len__(self):
+        return self.store.count(self.NAMESPACE)
+
+# Singleton instance
+course_catalogue = CourseCatalogue()
@@ -1,129 +1,229 @@
+import asyncio
 import json
 import uuid
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import AbstractSet, Dict, List, Any, Optional, Tuple
 from services.llm_service import llm_service
+from services.prompts import SUMMARIZE, EXPLAIN, QUIZ, SYLLABUS, MODULE
+from services.semantic_cache import explain_cache
+from services.catalogue_service import course_catalogue
+from config import settings
+from utils.metrics import track_operation, JSON_PARSE_SECONDS, FALLBACKS_TOTAL
+from utils.tracing import tracer
+from utils.exceptions import ContentGenerationError, TopicNotFoundError
+from utils.kv_store import StoreMapping, offload, store
+from utils.response_cache import response_cache
 from schemas import (
     SummarizeResponse, ExplainResponse, QuizResponse, EducateResponse,
     QuizQuestion, Module, Syllabus
 )
 
+# Parts of a course that are generated separately
+COURSE_PARTS = frozenset({"syllabus", "modules", "quiz"})
+
+def join_providers(providers: Dict[str, str]) -> str:
+    """Join per-part providers (syllabus, module0.., quiz) in course order"""
+    def rank(part: str):
+        if part == "syllabus":
+            return (0, 0)
+        if part == "quiz":
+            return (2, 0)
+        return (1, int(part[len("module"):]))
+    ordered = [providers[part] for part in sorted(providers, key=rank)]
+    return "+".join(dict.fromkeys(ordered))
+
+def course_response(topic_id: str, topic: str, syllabus: Optional[Syllabus], modules: Optional[List[Module]],
+                    quiz: Optional[QuizResponse], provider_used: str) -> EducateResponse:
+    """EducateResponse for a course, whose parts may not all have been generated
+    
+    EducateResponse requires every part, so a partial course is assembled
+    without validation; its parts are validated models already.
+    """
+    values = {"topic_id": topic_id, "topic": topic, "syllabus": syllabus, "modules": modules,
+              "quiz": quiz, "pdf_url": None, "provider_used": provider_used}
+    if syllabus is None or modules is None or quiz is None:
+        return EducateResponse.model_construct(**values)
+    return EducateResponse(**values)
+
+class CourseGeneration:
+    """Memoised generation of one course's parts within a single request
+    
+    Each part starts at most once, on first request, as an asyncio task, so
+    callers that only need the syllabus pay for one LLM call and parts
+    requested together run concurrently. A course found in the catalogue is
+    served from its stored parts without any LLM calls.
+    """
+    
+    QUIZ_QUESTIONS = 10
+    QUIZ_DIFFICULTY = "medium"
+    
+    def __init__(self, service: "ContentService", topic: str, modules_count: int, api_key: str,
+                 cached: Optional[Dict[str, Any]] = None):
+        self.service = service
+        self.topic = topic
+        self.modules_count = modules_count
+        self.api_key = api_key
+        self.cached = cached
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._providers: Dict[str, str] = {}
+    
+    @property
+    def cached_pdf_path(self) -> Optional[str]:
+        return self.cached.get("pdf_path") if self.cached else None
+    
+    def _memo(self, key: str, factory) -> asyncio.Task:
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+        return task
+    
+    def syllabus(self) -> "asyncio.Task[Tuple[Syllabus, str]]":
+        async def generate():
+            if self.cached:
+                syllabus, provider = Syllabus(**self.cached["syllabus"]), self.cached["providers"]["syllabus"]
+            else:
+                syllabus, provider = await self.service._generate_syllabus(
+                    self.topic, self.modules_count, self.api_key
+                )
+            self._providers["syllabus"] = provider
+            return syllabus, provider
+        return self._memo("syllabus", generate)
+    
+    def modules(self) -> "asyncio.Task[List[Module]]":
+        async def generate():
+            if self.cached:
+                for part, provider in self.cached["providers"].items():
+                    if part.startswith("module"):
+                        self._providers[part] = provider
+                return [Module(**module) for module in self.cached["modules"]]
+            syllabus, _ = await self.syllabus()
+            results = await asyncio.gather(*(
+                self.service._generate_module_content(
+                    self.topic, module_info["title"], module_info["description"], self.api_key
+                )
+                for module_info in syllabus.modules
+            ))
+            for index, (_, provider) in enumerate(results):
+                self._providers[f"module{index}"] = provider
+            return [module for module, _ in results]
+        return self._memo("modules", generate)
+    
+    def quiz(self) -> "asyncio.Task[QuizResponse]":
+        async def generate():
+            if self.cached:
+                quiz = QuizResponse(**self.cached["quiz"])
+            else:
+                quiz = await self.service.generate_quiz(
+                    self.topic, None, self.QUIZ_QUESTIONS, self.QUIZ_DIFFICULTY, self.api_key
+                )
+            self._providers["quiz"] = quiz.provider_used
+            return quiz
+        return self._memo("quiz", generate)
+    
+    @property
+    def providers(self) -> Dict[str, str]:
+        """Provider that served each generated part, keyed by part name"""
+        return dict(self._providers)
+    
+    def provider_used(self) -> str:
+        """Every provider that served a generated part, in order of first use"""
+        return join_providers(self._providers)
+    
+    async def complete(self, parts: AbstractSet[str] = COURSE_PARTS
+                       ) -> Tuple[Optional[Syllabus], Optional[List[Module]], Optional[QuizResponse]]:
+        """The requested parts of the course (the rest None), cancelling the others if one fails
+        
+        Modules are written from the syllabus, so asking for them returns the syllabus too.
+        """
+        try:
+            # The quiz only needs the topic, so it runs alongside the syllabus and modules
+            quiz_task = self.quiz() if "quiz" in parts else None
+            syllabus = (await self.syllabus())[0] if parts & {"syllabus", "modules"} else None
+            modules = await self.modules() if "modules" in parts else None
+            quiz = await quiz_task if quiz_task else None
+        except BaseException:
+            self.cancel()
+            raise
+        return syllabus, modules, quiz
+    
+    def cancel(self):
+        """Cancel parts still in flight, e.g. after another part failed"""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
 class ContentService:
     """Service for generating educational content"""
     
     def __init__(self):
-        # In-memory storage for topics (replace with database in production)
-        self.topics_storage = {}
+        # Topic history and generated courses live in the shared store, so every
+        # worker sees them (a per-process dict when STORE_BACKEND=memory)
+        self.topics_storage = StoreMapping(store, "topics")
+        # Generated course content per topic ID, kept for incremental regeneration
+        self.courses_storage = StoreMapping(store, "courses")
     
+    @tracer.trace("content.summarize")
+    @track_operation("summarize")
     async def summarize_text(self, text: str, api_key: str, max_length: int = 150) -> SummarizeResponse:
         """Summarize given text"""
-        system_prompt = (
-            "You are an expert at creating concise, accurate summaries. "
-            "Provide a clear and informative summary that captures the main points."
-        )
+        rendered = SUMMARIZE.render(text=text, max_length=max_length)
         
-        prompt = f"""
-        Please summarize the following text in approximately {max_length} words or less:
-        
-        Text: {text}
-        
-        Requirements:
-        - Keep the summary concise and informative
-        - Capture the main ideas and key points
-        - Make it easy to understand
-        """
-        
-        summary = await llm_service.generate_content(api_key, prompt, system_prompt)
+        response = await llm_service.generate(
+            api_key, rendered.prompt, rendered.system_prompt, operation="summarize", units=max_length
+        )
+        summary = response.text
         
         return SummarizeResponse(
             summary=summary.strip(),
             original_length=len(text.split()),
             summary_length=len(summary.split()),
-            provider_used="gemini"
+            provider_used=response.provider
         )
     
+    @tracer.trace("content.explain")
+    @track_operation("explain")
     async def explain_concept(self, concept: str, level: str, api_key: str) -> ExplainResponse:
         """Explain a concept at the specified level"""
-        level_instructions = {
-            "beginner": "Explain in simple terms, avoid jargon, use analogies and examples",
-            "intermediate": "Provide a balanced explanation with some technical details",
-            "advanced": "Include technical details, advanced concepts, and theoretical background"
-        }
+        if settings.EXPLAIN_CACHE_ENABLED:
+            cached = await explain_cache.get_async(level, concept)
+            if cached is not None:
+                return ExplainResponse(concept=concept, level=level, **cached)
         
-        system_prompt = (
-            f"You are an expert educator. Explain concepts clearly at the {level} level. "
-            f"{level_instructions[level]}. Always provide practical examples when possible."
-        )
-        
-        prompt = f"""
-        Please explain the concept: "{concept}"
-        
-        Level: {level}
-        
-        Requirements:
-        - Make the explanation appropriate for the {level} level
-        - Include practical examples
-        - Structure the explanation clearly
-        - Make it engaging and easy to understand
-        """
+        rendered = EXPLAIN.render(level, concept=concept)
         
-        explanation = await llm_service.generate_content(api_key, prompt, system_prompt)
+        response = await llm_service.generate(
+            api_key, rendered.prompt, rendered.system_prompt, operation="explain"
+        )
         
-        return ExplainResponse(
-            explanation=explanation.strip(),
+        result = ExplainResponse(
+            explanation=response.text.strip(),
             concept=concept,
             level=level,
-            provider_used="gemini"
+            provider_used=response.provider
         )
+        if settings.EXPLAIN_CACHE_ENABLED:
+            await explain_cache.put_async(level, concept, {
+                "explanation": result.explanation,
+                "provider_used": result.provider_used
+            })
+        return result
     
+    @tracer.trace("content.quiz")
+    @track_operation("quiz")
     async def generate_quiz(self, topic: str, text: str, num_questions: int, difficulty: str, 
                           api_key: str) -> QuizResponse:
         """Generate quiz questions"""
-        difficulty_instructions = {
-            "easy": "basic understanding and recall",
-            "medium": "application and analysis",
-            "hard": "synthesis and evaluation"
-        }
-        
-        system_prompt = (
-            "You are an expert quiz creator. Generate multiple-choice questions that test "
-            f"{difficulty_instructions[difficulty]}. Each question should have 4 options with "
-            "one correct answer. Always provide explanations for the correct answers."
-        )
-        
         content_source = f"Topic: {topic}" if topic else f"Text: {text}"
+        rendered = QUIZ.render(difficulty, num_questions=num_questions, content_source=content_source)
         
-        prompt = f"""
-        Create {num_questions} multiple-choice questions based on the following:
-        
-        {content_source}
-        
-        Difficulty: {difficulty}
-        
-        Requirements:
-        - Each question should have exactly 4 options (A, B, C, D)
-        - Only one correct answer per question
-        - Include an explanation for each correct answer
-        - Questions should test {difficulty_instructions[difficulty]}
-        
-        Format your response as valid JSON:
-        {{
-            "questions": [
-                {{
-                    "question": "Question text here?",
-                    "options": ["Option A", "Option B", "Option C", "Option D"],
-                    "correct_answer": 0,
-                    "explanation": "Explanation of the correct answer"
-                }}
-            ]
-        }}
-        """
-        
-        response = await llm_service.generate_content(api_key, prompt, system_prompt)
+        response = await llm_service.generate(
+            api_key, rendered.prompt, rendered.system_prompt, operation="quiz", units=num_questions
+        )
         
         try:
             # Parse JSON response
-            quiz_data = json.loads(response.strip())
+            with JSON_PARSE_SECONDS.time(operation="quiz"):
+                quiz_data = json.loads(response.text.strip())
             questions = [
                 QuizQuestion(**q) for q in quiz_data["questions"]
             ]
@@ -136,82 +236,160 @@ class ContentService:
             topic=topic,
             difficulty=difficulty,
             total_questions=len(questions),
-            provider_used="gemini"
+            provider_used=response.provider
         )
     
+    @tracer.trace("content.educate")
+    @track_operation("educate")
     async def generate_education_content(self, topic: str, modules_count: int, 
-                                       api_key: str) -> EducateResponse:
-        """Generate complete educational content including syllabus, modules, and quiz"""
-        
-        # Generate syllabus
-        syllabus = await self._generate_syllabus(topic, modules_count, api_key)
+                                       api_key: str, parts: AbstractSet[str] = COURSE_PARTS) -> EducateResponse:
+        """Generate educational content including syllabus, modules, and quiz
         
-        # Generate detailed content for each module
-        modules = []
-        for module_info in syllabus.modules:
-            module_content = await self._generate_module_content(
-                topic, module_info["title"], module_info["description"], api_key
-            )
-            modules.append(module_content)
+        Only `parts` are generated (GraphQL clients that select less pay for
+        less); the others are None. The course is saved to topic history.
+        """
+        course = await self.start_course(topic, modules_count, api_key)
+        syllabus, modules, quiz = await course.complete(parts)
         
-        # Generate quiz for the entire topic
-        quiz = await self.generate_quiz(topic, None, 10, "medium", api_key)
+        topic_id = await offload(self.save_topic, topic, modules_count, course.providers, syllabus, modules, quiz)
+        # pdf_url is set by the caller once a PDF is rendered
+        return course_response(topic_id, topic, syllabus, modules, quiz, course.provider_used())
+    
+    async def start_course(self, topic: str, modules_count: int, api_key: str,
+                     use_catalogue: bool = True) -> "CourseGeneration":
+        """Begin generating a course whose parts are produced on demand"""
+        cached = await offload(course_catalogue.get, topic, modules_count) if use_catalogue else None
+        return CourseGeneration(self, topic, modules_count, api_key, cached)
+    
+    def save_topic(self, topic: str, modules_count: int, providers: Dict[str, str],
+                   syllabus: Syllabus = None, modules: List[Module] = None,
+                   quiz: QuizResponse = None) -> str:
+        """Record a generated course in topic history and return its ID
         
-        # Save topic to storage
+        Whichever parts were generated are kept so single parts can be
+        regenerated later without redoing the rest.
+        """
         topic_id = str(uuid.uuid4())
         self.topics_storage[topic_id] = {
             "id": topic_id,
             "topic": topic,
             "created_at": datetime.now().isoformat(),
-            "provider_used": "gemini",
+            "provider_used": join_providers(providers),
             "modules_count": modules_count
         }
-        
-        return EducateResponse(
-            topic=topic,
-            syllabus=syllabus,
-            modules=modules,
-            quiz=quiz,
-            pdf_url=None,  # PDF generation will be implemented separately
-            provider_used="gemini"
-        )
+        self.store_course(topic_id, {
+            "topic": topic,
+            "syllabus": syllabus,
+            "modules": modules,
+            "quiz": quiz,
+            "providers": dict(providers),
+            "pdf_path": None
+        })
+        # Cached GraphQL GET results may list topics; other workers catch up within their max-age
+        response_cache.invalidate("/graphql")
+        return topic_id
     
-    async def _generate_syllabus(self, topic: str, modules_count: int, api_key: str) -> Syllabus:
-        """Generate a comprehensive syllabus"""
-        system_prompt = (
-            "You are an expert curriculum designer. Create comprehensive syllabi that provide "
-            "clear learning paths with well-structured modules and realistic time estimates."
-        )
-        
-        prompt = f"""
-        Create a comprehensive syllabus for the topic: "{topic}"
-        
-        Requirements:
-        - Create exactly {modules_count} modules
-        - Include an overview of the entire topic
-        - Provide learning objectives
-        - Estimate duration for each module and total course
-        - Make modules progressive (building on each other)
+    def get_topic(self, topic_id: str) -> Optional[Dict[str, Any]]:
+        """Topic history entry by ID"""
+        return self.topics_storage.get(topic_id)
+    
+    def get_course(self, topic_id: str) -> Dict[str, Any]:
+        """Stored content of a generated course
         
-        Format your response as valid JSON:
-        {{
-            "overview": "Brief overview of the topic and what students will learn",
-            "modules": [
-                {{
-                    "title": "Module 1 Title",
-                    "description": "What this module covers"
-                }}
-            ],
-            "total_duration": "Total estimated time (e.g., '4 weeks', '20 hours')",
-            "learning_objectives": ["Objective 1", "Objective 2", "Objective 3"]
-        }}
+        The returned dict is a copy; save changes with store_course.
         """
+        stored = self.courses_storage.get(topic_id)
+        if stored is None:
+            raise TopicNotFoundError(f"No stored course with ID {topic_id}")
+        return {
+            **stored,
+            "syllabus": Syllabus(**stored["syllabus"]) if stored["syllabus"] else None,
+            "modules": [Module(**m) for m in stored["modules"]] if stored["modules"] is not None else None,
+            "quiz": QuizResponse(**stored["quiz"]) if stored["quiz"] else None,
+        }
+    
+    def store_course(self, topic_id: str, course: Dict[str, Any]):
+        """Save a course's content under its topic ID"""
+        self.courses_storage[topic_id] = {
+            **course,
+            "syllabus": course["syllabus"].model_dump() if course["syllabus"] else None,
+            "modules": [m.model_dump() for m in course["modules"]] if course["modules"] is not None else None,
+            "quiz": course["quiz"].model_dump() if course["quiz"] else None,
+        }
+    
+    def set_course_pdf(self, topic_id: str, pdf_path: Optional[str]):
+        """Remember the rendered PDF of a stored course"""
+        course = self.get_course(topic_id)
+        course["pdf_path"] = pdf_path
+        self.store_course(topic_id, course)
+    
+    def _update_part(self, topic_id: str, course: Dict[str, Any], part: str, provider: str):
+        """Save a course after regenerating one part and refresh its topic's providers"""
+        course["providers"][part] = provider
+        self.store_course(topic_id, course)
+        topic = self.topics_storage[topic_id]
+        topic["provider_used"] = join_providers(course["providers"])
+        self.topics_storage[topic_id] = topic
+        response_cache.invalidate("/graphql")
+    
+    @staticmethod
+    def _stored_response(topic_id: str, course: Dict[str, Any]) -> EducateResponse:
+        return course_response(topic_id, course["topic"], course["syllabus"], course["modules"], course["quiz"],
+                               join_providers(course["providers"]))
+    
+    @tracer.trace("content.regenerate_module")
+    @track_operation("regenerate_module")
+    async def regenerate_module(self, topic_id: str, module_index: int, api_key: str) -> EducateResponse:
+        """Regenerate one module of a stored course, reusing its syllabus and other modules"""
+        course = await offload(self.get_course, topic_id)
+        if course["syllabus"] is None or course["modules"] is None:
+            raise ContentGenerationError("This course was generated without modules")
+        if not 0 <= module_index < len(course["modules"]):
+            raise ContentGenerationError(
+                f"Module index must be between 0 and {len(course['modules']) - 1}"
+            )
         
-        response = await llm_service.generate_content(api_key, prompt, system_prompt)
+        module_info = course["syllabus"].modules[module_index]
+        module, provider = await self._generate_module_content(
+            course["topic"], module_info["title"], module_info["description"], api_key
+        )
+        modules = list(course["modules"])
+        modules[module_index] = module
+        course["modules"] = modules
+        await offload(self._update_part, topic_id, course, f"module{module_index}", provider)
+        return self._stored_response(topic_id, course)
+    
+    @tracer.trace("content.regenerate_quiz")
+    @track_operation("regenerate_quiz")
+    async def regenerate_quiz(self, topic_id: str, api_key: str) -> EducateResponse:
+        """Regenerate the quiz of a stored course, reusing its syllabus and modules"""
+        course = await offload(self.get_course, topic_id)
+        previous = course["quiz"]
+        quiz = await self.generate_quiz(
+            course["topic"],
+            None,
+            previous.total_questions if previous else CourseGeneration.QUIZ_QUESTIONS,
+            previous.difficulty if previous else CourseGeneration.QUIZ_DIFFICULTY,
+            api_key
+        )
+        course["quiz"] = quiz
+        await offload(self._update_part, topic_id, course, "quiz", quiz.provider_used)
+        return self._stored_response(topic_id, course)
+    
+    @tracer.trace("content.syllabus")
+    @track_operation("syllabus")
+    async def _generate_syllabus(self, topic: str, modules_count: int, api_key: str) -> Tuple[Syllabus, str]:
+        """Generate a comprehensive syllabus, returning it with the provider that served it"""
+        rendered = SYLLABUS.render(topic=topic, modules_count=modules_count)
+        
+        response = await llm_service.generate(
+            api_key, rendered.prompt, rendered.system_prompt, operation="syllabus", units=modules_count
+        )
         
         try:
-            syllabus_data = json.loads(response.strip())
-            return Syllabus(
+            with JSON_PARSE_SECONDS.time(operation="syllabus"):
+                syllabus_data = json.loads(response.text.strip())
+            syllabus = Syllabus(
                 topic=topic,
                 overview=syllabus_data["overview"],
                 modules=syllabus_data["modules"],
@@ -220,43 +398,27 @@ class ContentService:
             )
         except (json.JSONDecodeError, KeyError):
             # Fallback syllabus
-            return await self._create_fallback_syllabus(topic, modules_count, api_key)
+            syllabus = await self._create_fallback_syllabus(topic, modules_count, api_key)
+        return syllabus, response.provider
     
+    @tracer.trace("content.module")
+    @track_operation("module")
     async def _generate_module_content(self, topic: str, module_title: str, 
-                                     module_description: str, api_key: str) -> Module:
-        """Generate detailed content for a specific module"""
-        system_prompt = (
-            "You are an expert educator creating detailed learning content. "
-            "Provide comprehensive, well-structured content with practical examples."
+                                     module_description: str, api_key: str) -> Tuple[Module, str]:
+        """Generate detailed content for a module, returning it with the provider that served it"""
+        tracer.current_span().set_attribute("module.title", module_title)
+        rendered = MODULE.render(
+            topic=topic, module_title=module_title, module_description=module_description
         )
         
-        prompt = f"""
-        Create detailed learning content for this module:
-        
-        Topic: {topic}
-        Module Title: {module_title}
-        Module Description: {module_description}
-        
-        Requirements:
-        - Provide comprehensive content that covers the module thoroughly
-        - Include key points (5-7 bullet points)
-        - Estimate realistic duration for studying this module
-        - Make content engaging and informative
-        - Include practical examples where relevant
-        
-        Format your response as valid JSON:
-        {{
-            "content": "Detailed content for the module (2-3 paragraphs)",
-            "key_points": ["Key point 1", "Key point 2", "Key point 3"],
-            "estimated_duration": "Estimated study time (e.g., '2 hours', '1 week')"
-        }}
-        """
-        
-        response = await llm_service.generate_content(api_key, prompt, system_prompt)
+        response = await llm_service.generate(
+            api_key, rendered.prompt, rendered.system_prompt, operation="module"
+        )
         
         try:
-            module_data = json.loads(response.strip())
-            return Module(
+            with JSON_PARSE_SECONDS.time(operation="module"):
+                module_data = json.loads(response.text.strip())
+            module = Module(
                 title=module_title,
                 description=module_description,
                 content=module_data["content"],
@@ -265,11 +427,13 @@ class ContentService:
             )
         except (json.JSONDecodeError, KeyError):
             # Fallback module content
-            return await self._create_fallback_module(module_title, module_description, api_key)
+            module = await self._create_fallback_module(module_title, module_description, api_key)
+        return module, response.provider
     
     async def _create_fallback_quiz(self, content: str, num_questions: int, difficulty: str, 
                                   api_key: str) -> List[QuizQuestion]:
         """Create a fallback quiz when JSON parsing fails"""
+        FALLBACKS_TOTAL.inc(kind="quiz")
         # Simple fallback - create basic questions
         questions = []
         for i in range(num_questions):
@@ -285,6 +449,7 @@ class ContentService:
     async def _create_fallback_syllabus(self, topic: str, modules_count: int, 
                                       api_key: str) -> Syllabus:
         """Create a fallback syllabus when JSON parsing fails"""
+        FALLBACKS_TOTAL.inc(kind="syllabus")
         modules = []
         for i in range(modules_count):
             modules.append({
@@ -307,6 +472,7 @@ class ContentService:
     async def _create_fallback_module(self, title: str, description: str, 
                                     api_key: str) -> Module:
         """Create a fallback module when JSON parsing fails"""
+        FALLBACKS_TOTAL.inc(kind="module")
         return Module(
             title=title,
             description=description,
@@ -323,9 +489,11 @@ class ContentService:
     
     def get_saved_topics(self) -> Dict[str, Any]:
         """Get all saved topics"""
+        # Store order is by key; list topics in creation order as before
+        topics = sorted(self.topics_storage.values(), key=lambda topic: topic["created_at"])
         return {
-            "topics": list(self.topics_storage.values()),
-            "total": len(self.topics_storage)
+            "topics": topics,
+            "total": len(topics)
         }
 
 # Singleton instance
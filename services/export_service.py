@@ -0,0 +1,167 @@
+import hashlib
+import io
+import json
+import os
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+
+from utils.metrics import EXPORT_RENDER_SECONDS
+from utils.tracing import tracer
+
+TEMPLATE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "export")
+
+
+def paragraphs(text: str) -> Markup:
+    """Escape text and wrap each blank-line-separated block in <p>"""
+    blocks = [block.strip() for block in str(text).split("\n\n") if block.strip()]
+    return Markup("\n").join(Markup("<p>%s</p>") % Markup("<br />").join(map(escape, block.splitlines()))
+                             for block in blocks)
+
+
+# One environment for all renderers: templates compile on first use and stay cached
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIRECTORY),
+    autoescape=select_autoescape(enabled_extensions=("html.j2", "xhtml.j2", "opf.j2"), default_for_string=False),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+)
+environment.filters["paragraphs"] = paragraphs
+
+
+class Renderer:
+    """Turns the `education_data` dict of a course into a downloadable file"""
+    name: str
+    media_type: str
+    extension: str
+
+    def render(self, education_data: dict) -> bytes:
+        with tracer.start_span("export.render", **{"export.format": self.name}):
+            started = time.perf_counter()
+            content = self._render(education_data)
+            EXPORT_RENDER_SECONDS.observe(time.perf_counter() - started, format=self.name)
+        return content
+
+    def _render(self, education_data: dict) -> bytes:
+        raise NotImplementedError
+
+
+class TemplateRenderer(Renderer):
+    """Renders a single Jinja2 template"""
+    template_name: str
+
+    def __init__(self):
+        self.template = environment.get_template(self.template_name)
+
+    def _render(self, education_data: dict) -> bytes:
+        return self.template.render(course=education_data).encode("utf-8")
+
+
+class HTMLRenderer(TemplateRenderer):
+    name = "html"
+    media_type = "text/html"
+    extension = "html"
+    template_name = "course.html.j2"
+
+
+class MarkdownRenderer(TemplateRenderer):
+    name = "markdown"
+    media_type = "text/markdown"
+    extension = "md"
+    template_name = "course.md.j2"
+
+
+class EPUBRenderer(Renderer):
+    """EPUB 3 with one chapter for the syllabus, each module and the quiz"""
+    name = "epub"
+    media_type = "application/epub+zip"
+    extension = "epub"
+
+    CONTAINER = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">\n'
+        '  <rootfiles>\n'
+        '    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>\n'
+        '  </rootfiles>\n'
+        '</container>\n'
+    )
+    # Fixed entry and dcterms:modified timestamps keep the archive identical for identical content
+    ENTRY_DATE = (1980, 1, 1, 0, 0, 0)
+    MODIFIED = datetime(*ENTRY_DATE, tzinfo=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def __init__(self):
+        self.chapter = environment.get_template("epub/chapter.xhtml.j2")
+        self.nav = environment.get_template("epub/nav.xhtml.j2")
+        self.package = environment.get_template("epub/content.opf.j2")
+
+    def _chapters(self, education_data: dict) -> List[Dict]:
+        chapters = [{"id": "syllabus", "href": "syllabus.xhtml", "title": "Course Syllabus",
+                     "kind": "syllabus", "module": None}]
+        for i, module in enumerate(education_data["modules"], 1):
+            chapters.append({"id": f"module-{i}", "href": f"module-{i}.xhtml",
+                             "title": f"Module {i}: {module['title']}", "kind": "module", "module": module})
+        chapters.append({"id": "quiz", "href": "quiz.xhtml", "title": "Assessment Quiz",
+                         "kind": "quiz", "module": None})
+        return chapters
+
+    def _write(self, archive: zipfile.ZipFile, name: str, content: str, compress_type: int = zipfile.ZIP_DEFLATED):
+        info = zipfile.ZipInfo(name, date_time=self.ENTRY_DATE)
+        info.compress_type = compress_type
+        archive.writestr(info, content)
+
+    def _render(self, education_data: dict) -> bytes:
+        chapters = self._chapters(education_data)
+        digest = hashlib.sha256(json.dumps(education_data, sort_keys=True).encode("utf-8")).digest()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            # The mimetype entry must come first and be stored uncompressed
+            self._write(archive, "mimetype", "application/epub+zip", zipfile.ZIP_STORED)
+            self._write(archive, "META-INF/container.xml", self.CONTAINER)
+            self._write(archive, "OEBPS/content.opf", self.package.render(
+                course=education_data,
+                chapters=chapters,
+                identifier=f"urn:uuid:{uuid.UUID(bytes=digest[:16])}",
+                modified=self.MODIFIED,
+            ))
+            self._write(archive, "OEBPS/nav.xhtml", self.nav.render(course=education_data, chapters=chapters))
+            for chapter in chapters:
+                self._write(archive, f"OEBPS/{chapter['href']}", self.chapter.render(
+                    course=education_data, title=chapter["title"], kind=chapter["kind"], module=chapter["module"]
+                ))
+        return buffer.getvalue()
+
+
+class PDFRenderer(Renderer):
+    """The ReportLab PDF, for callers that want bytes rather than a file"""
+    name = "pdf"
+    media_type = "application/pdf"
+    extension = "pdf"
+
+    def render(self, education_data: dict) -> bytes:
+        # reportlab is slow to import; load it with the first PDF request.
+        # PDFService records its own render metrics and span.
+        from services.pdf_service import pdf_service
+        buffer = io.BytesIO()
+        pdf_service.render_pdf(education_data, buffer)
+        return buffer.getvalue()
+
+
+RENDERERS = {renderer.name: renderer for renderer in (PDFRenderer, HTMLRenderer, MarkdownRenderer, EPUBRenderer)}
+EXPORT_FORMATS = list(RENDERERS)
+_instances: Dict[str, Renderer] = {}
+
+
+def get_renderer(name: str) -> Renderer:
+    """Shared renderer instance for an export format"""
+    renderer = _instances.get(name)
+    if renderer is None:
+        if name not in RENDERERS:
+            raise ValueError(f"Unknown export format: {name!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+        renderer = _instances[name] = RENDERERS[name]()
+    return renderer
@@ -0,0 +1,349 @@
+import asyncio
+import functools
+import hashlib
+import json
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Type
+
+import httpx
+
+from config import settings
+from utils.exceptions import LLMProviderError, InvalidAPIKeyError
+
+
+@dataclass
+class GenerationConfig:
+    """Output limits and sampling settings passed to the provider on every call"""
+    max_output_tokens: int
+    temperature: float
+    stop_sequences: List[str] = field(default_factory=list)
+
+
+def generation_config(operation: str, units: Optional[int] = None) -> GenerationConfig:
+    """Generation settings for an operation, sized to the requested output"""
+    profile = settings.GENERATION_PROFILES.get(operation, {})
+    if units is not None and "tokens_per_unit" in profile:
+        max_tokens = profile.get("base_tokens", 0) + math.ceil(profile["tokens_per_unit"] * units)
+    else:
+        max_tokens = profile.get("base_tokens", settings.DEFAULT_MAX_TOKENS)
+    return GenerationConfig(
+        max_output_tokens=max(1, min(max_tokens, settings.MAX_OUTPUT_TOKENS)),
+        temperature=profile.get("temperature", settings.DEFAULT_TEMPERATURE),
+        stop_sequences=list(profile.get("stop_sequences", [])),
+    )
+
+
+@dataclass
+class LLMRequest:
+    """A single generation request handed to a provider adapter"""
+    prompt: str
+    system_prompt: Optional[str] = None
+    api_key: Optional[str] = None
+    operation: str = "generic"
+    generation: Optional[GenerationConfig] = None
+
+    def __post_init__(self):
+        if self.generation is None:
+            self.generation = generation_config(self.operation)
+
+    @property
+    def full_prompt(self) -> str:
+        if self.system_prompt:
+            return f"{self.system_prompt}\n\n{self.prompt}"
+        return self.prompt
+
+
+@dataclass
+class LLMResponse:
+    """Text returned by a provider plus the details of who served it"""
+    text: str
+    provider: str
+    model: str
+    latency: float = 0.0
+    # Token usage as reported by the provider; None when it doesn't report it
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class LLMProvider:
+    """Base class for LLM provider adapters"""
+
+    name = "base"
+
+    def __init__(self, model: str = ""):
+        self.model = model
+
+    @property
+    def cost_per_1k_tokens(self) -> float:
+        return settings.PROVIDER_COSTS.get(self.name, 0.0)
+
+    def is_available(self, request: LLMRequest) -> bool:
+        """Whether this provider has the credentials to serve the request"""
+        return True
+
+    async def generate(self, request: LLMRequest) -> LLMResponse:
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini adapter; uses the caller's key, falling back to GEMINI_API_KEY"""
+
+    name = "gemini"
+
+    def __init__(self, model: str = None):
+        super().__init__(model or settings.GEMINI_MODEL)
+
+    def _api_key(self, request: LLMRequest) -> Optional[str]:
+        return request.api_key or settings.GEMINI_API_KEY
+
+    def is_available(self, request: LLMRequest) -> bool:
+        return bool(self._api_key(request))
+
+    async def generate(self, request: LLMRequest) -> LLMResponse:
+        try:
+            # The SDK takes about half a second to import; only pay for it when used
+            import google.generativeai as genai
+            genai.configure(api_key=self._api_key(request))
+            model = genai.GenerativeModel(self.model)
+
+            generation = request.generation
+            generation_config = {
+                "max_output_tokens": generation.max_output_tokens,
+                "temperature": generation.temperature,
+            }
+            if generation.stop_sequences:
+                generation_config["stop_sequences"] = generation.stop_sequences
+            response = await asyncio.get_event_loop().run_in_executor(
+                None, functools.partial(model.generate_content, request.full_prompt,
+                                        generation_config=generation_config)
+            )
+
+            if response.text:
+                usage = getattr(response, "usage_metadata", None)
+                return LLMResponse(
+                    text=response.text,
+                    provider=self.name,
+                    model=self.model,
+                    prompt_tokens=getattr(usage, "prompt_token_count", None),
+                    completion_tokens=getattr(usage, "candidates_token_count", None)
+                )
+            else:
+                raise LLMProviderError("Empty response from Gemini")
+
+        except Exception as e:
+            if self._rejects_key(e):
+                raise InvalidAPIKeyError("Invalid Gemini API key")
+            raise LLMProviderError(f"Gemini API error: {str(e)}")
+
+    # google.api_core errors for a key Gemini refused (401/403); a 400 only when its reason is API_KEY_INVALID
+    KEY_REJECTIONS = ("PermissionDenied", "Unauthenticated")
+
+    @classmethod
+    def _rejects_key(cls, error: Exception) -> bool:
+        """Whether the error is about the API key rather than the request
+
+        Other 400s ("invalid argument" for a bad temperature or stop sequence)
+        stay LLMProviderError so the router fails over.
+        """
+        return "API_KEY_INVALID" in str(error) or type(error).__name__ in cls.KEY_REJECTIONS
+
+
+class ChatCompletionsProvider(LLMProvider):
+    """Adapter for OpenAI-compatible /chat/completions HTTP APIs"""
+
+    def __init__(self, model: str, api_key: Optional[str], base_url: str,
+                 transport: httpx.AsyncBaseTransport = None):
+        super().__init__(model)
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def is_available(self, request: LLMRequest) -> bool:
+        return bool(self.api_key)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # One pooled client per provider so keep-alive connections are reused
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=settings.REQUEST_TIMEOUT,
+                transport=self._transport,
+            )
+        return self._client
+
+    def _build_payload(self, request: LLMRequest) -> Dict:
+        messages = []
+        if request.system_prompt:
+            messages.append({"role": "system", "content": request.system_prompt})
+        messages.append({"role": "user", "content": request.prompt})
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": request.generation.max_output_tokens,
+            "temperature": request.generation.temperature,
+        }
+        if request.generation.stop_sequences:
+            payload["stop"] = request.generation.stop_sequences
+        return payload
+
+    async def generate(self, request: LLMRequest) -> LLMResponse:
+        try:
+            response = await self._get_client().post(
+                "/chat/completions",
+                json=self._build_payload(request),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        except httpx.HTTPError as e:
+            raise LLMProviderError(f"{self.name} API error: {str(e)}")
+
+        if response.status_code in (401, 403):
+            raise InvalidAPIKeyError(f"Invalid {self.name} API key")
+        if response.status_code >= 400:
+            raise LLMProviderError(f"{self.name} API error: HTTP {response.status_code}")
+
+        try:
+            data = response.json()
+            text = data["choices"][0]["message"]["content"]
+            usage = data.get("usage") or {}
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            raise LLMProviderError(f"Malformed response from {self.name}")
+
+        if not text:
+            raise LLMProviderError(f"Empty response from {self.name}")
+        return LLMResponse(text=text, provider=self.name, model=self.model,
+                           prompt_tokens=usage.get("prompt_tokens"),
+                           completion_tokens=usage.get("completion_tokens"))
+
+
+class OpenAIProvider(ChatCompletionsProvider):
+    """OpenAI chat completions adapter"""
+
+    name = "openai"
+
+    def __init__(self, transport: httpx.AsyncBaseTransport = None):
+        super().__init__(settings.OPENAI_MODEL, settings.OPENAI_API_KEY,
+                         settings.OPENAI_BASE_URL, transport)
+
+
+class MistralProvider(ChatCompletionsProvider):
+    """Mistral chat completions adapter (OpenAI-compatible wire format)"""
+
+    name = "mistral"
+
+    def __init__(self, transport: httpx.AsyncBaseTransport = None):
+        super().__init__(settings.MISTRAL_MODEL, settings.MISTRAL_API_KEY,
+                         settings.MISTRAL_BASE_URL, transport)
+
+
+class FakeProvider(LLMProvider):
+    """Offline provider that answers deterministically without network access
+
+    Syllabus, module and quiz requests get valid canned JSON in the shape
+    ContentService parses; other operations get plain text. Latency and error
+    injection are driven by a seeded RNG so runs are repeatable.
+    """
+
+    name = "fake"
+    LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+    def __init__(self, model: str = "fake-model", latency_distribution: str = None,
+                 latency_mean: float = None, latency_stddev: float = None,
+                 error_rate: float = None, seed: int = None):
+        super().__init__(model)
+        self.latency_distribution = latency_distribution or settings.FAKE_LLM_LATENCY_DISTRIBUTION
+        self.latency_mean = settings.FAKE_LLM_LATENCY_MEAN if latency_mean is None else latency_mean
+        self.latency_stddev = settings.FAKE_LLM_LATENCY_STDDEV if latency_stddev is None else latency_stddev
+        self.error_rate = settings.FAKE_LLM_ERROR_RATE if error_rate is None else error_rate
+        self.random = random.Random(settings.FAKE_LLM_SEED if seed is None else seed)
+        if self.latency_distribution not in self.LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown fake latency distribution: {self.latency_distribution}")
+
+    def sample_latency(self) -> float:
+        """Draw a simulated response time in seconds"""
+        mean, stddev = self.latency_mean, self.latency_stddev
+        if mean <= 0:
+            return 0.0
+        if self.latency_distribution == "constant":
+            return mean
+        if self.latency_distribution == "uniform":
+            return self.random.uniform(max(0.0, mean - stddev), mean + stddev)
+        if self.latency_distribution == "normal":
+            return max(0.0, self.random.gauss(mean, stddev))
+        # lognormal with the requested mean/stddev, giving a realistic long tail
+        variance = math.log(1 + (stddev / mean) ** 2)
+        return self.random.lognormvariate(math.log(mean) - variance / 2, math.sqrt(variance))
+
+    async def generate(self, request: LLMRequest) -> LLMResponse:
+        delay = self.sample_latency()
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise LLMProviderError("Fake provider injected error")
+        return LLMResponse(text=self._render(request), provider=self.name, model=self.model)
+
+    def _render(self, request: LLMRequest) -> str:
+        digest = hashlib.sha256(request.full_prompt.encode("utf-8")).hexdigest()[:12]
+        renderer = getattr(self, f"_render_{request.operation}", None)
+        if renderer is None:
+            return f"Fake response {digest} for {request.operation}."
+        return json.dumps(renderer(request, digest))
+
+    @staticmethod
+    def _prompt_number(prompt: str, pattern: str, default: int) -> int:
+        match = re.search(pattern, prompt)
+        return int(match.group(1)) if match else default
+
+    def _render_syllabus(self, request: LLMRequest, digest: str) -> Dict:
+        count = self._prompt_number(request.prompt, r"exactly (\d+) modules", 5)
+        return {
+            "overview": f"Overview of the course ({digest}).",
+            "modules": [
+                {"title": f"Module {i + 1}", "description": f"Description of module {i + 1}"}
+                for i in range(count)
+            ],
+            "total_duration": f"{count} weeks",
+            "learning_objectives": ["Understand the basics", "Apply the concepts", "Evaluate results"],
+        }
+
+    def _render_module(self, request: LLMRequest, digest: str) -> Dict:
+        return {
+            "content": f"Detailed module content ({digest}). " * 20,
+            "key_points": [f"Key point {i + 1}" for i in range(5)],
+            "estimated_duration": "2 hours",
+        }
+
+    def _render_quiz(self, request: LLMRequest, digest: str) -> Dict:
+        count = self._prompt_number(request.prompt, r"Create (\d+) multiple-choice", 5)
+        return {
+            "questions": [
+                {
+                    "question": f"Question {i + 1} ({digest})?",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct_answer": i % 4,
+                    "explanation": f"Explanation for question {i + 1}.",
+                }
+                for i in range(count)
+            ]
+        }
+
+
+PROVIDER_CLASSES: Dict[str, Type[LLMProvider]] = {
+    "gemini": GeminiProvider,
+    "openai": OpenAIProvider,
+    "mistral": MistralProvider,
+    "fake": FakeProvider,
+}
+
+
+def build_providers(names: List[str]) -> List[LLMProvider]:
+    """Instantiate provider adapters by name, in the configured order"""
+    providers = []
+    for name in names:
+        if name not in PROVIDER_CLASSES:
+            raise ValueError(f"Unknown LLM provider: {name}")
+        providers.append(PROVIDER_CLASSES[name]())
+    return providers
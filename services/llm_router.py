@@ -0,0 +1,134 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.llm_providers import LLMProvider, LLMRequest, LLMResponse
+from utils.exceptions import LLMProviderError, InvalidAPIKeyError
+from utils.metrics import LLM_REQUEST_SECONDS, LLM_REQUESTS_TOTAL
+from utils.tracing import tracer
+
+
+class ProviderStats:
+    """Exponentially weighted latency and error-rate tracking for one provider"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, latency: float):
+        self.calls += 1
+        self.consecutive_failures = 0
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = self.alpha * latency + (1 - self.alpha) * self.latency
+        self.error_rate = (1 - self.alpha) * self.error_rate
+
+    def record_failure(self, cooldown: float, max_consecutive: int):
+        self.calls += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        if self.consecutive_failures >= max_consecutive:
+            self.cooldown_until = time.monotonic() + cooldown
+
+    def in_cooldown(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+
+class ProviderRouter:
+    """Routes requests to the cheapest healthy provider and fails over on errors
+
+    A rejected API key ends the request instead of failing over.
+    """
+
+    def __init__(self, providers: List[LLMProvider]):
+        self.providers = providers
+        self.stats: Dict[str, ProviderStats] = {
+            provider.name: ProviderStats(settings.ROUTER_EWMA_ALPHA) for provider in providers
+        }
+
+    def score(self, provider: LLMProvider) -> float:
+        """Lower is better: observed latency plus error and cost penalties, in seconds"""
+        stats = self.stats[provider.name]
+        # Providers without observations score zero latency so they get explored
+        latency = stats.latency or 0.0
+        return (
+            settings.ROUTER_LATENCY_WEIGHT * latency
+            + settings.ROUTER_ERROR_PENALTY * stats.error_rate
+            + settings.ROUTER_COST_WEIGHT * provider.cost_per_1k_tokens
+        )
+
+    def rank(self, request: LLMRequest) -> List[LLMProvider]:
+        """Available providers in the order they should be tried"""
+        available = [p for p in self.providers if p.is_available(request)]
+        healthy = [p for p in available if not self.stats[p.name].in_cooldown()]
+        cooling = [p for p in available if self.stats[p.name].in_cooldown()]
+        # Providers in cooldown are kept as a last resort rather than dropped
+        return sorted(healthy, key=self.score) + sorted(cooling, key=self.score)
+
+    async def generate(self, request: LLMRequest) -> LLMResponse:
+        candidates = self.rank(request)
+        if not candidates:
+            raise InvalidAPIKeyError("No LLM provider is configured with an API key")
+
+        first_error: Optional[Exception] = None
+        for provider in candidates:
+            stats = self.stats[provider.name]
+            with tracer.start_span("llm.generate", **{
+                "llm.provider": provider.name,
+                "llm.model": provider.model,
+                "llm.operation": request.operation,
+                "llm.max_output_tokens": request.generation.max_output_tokens,
+            }) as span:
+                started = time.perf_counter()
+                try:
+                    response = await provider.generate(request)
+                except InvalidAPIKeyError as e:
+                    # A rejected key is the caller's problem, not the provider's; failing
+                    # over would serve the request on another provider's server key
+                    span.record_exception(e)
+                    self._observe(provider, request, "invalid_key", time.perf_counter() - started)
+                    raise
+                except LLMProviderError as e:
+                    span.record_exception(e)
+                    self._observe(provider, request, "error", time.perf_counter() - started)
+                    stats.record_failure(settings.ROUTER_FAILURE_COOLDOWN,
+                                         settings.ROUTER_MAX_CONSECUTIVE_FAILURES)
+                    first_error = first_error or e
+                    continue
+                response.latency = time.perf_counter() - started
+                self._observe(provider, request, "success", response.latency)
+                stats.record_success(response.latency)
+                return response
+
+        # Surface the error from the preferred provider; it is the most meaningful one
+        raise first_error
+
+    @staticmethod
+    def _observe(provider: LLMProvider, request: LLMRequest, outcome: str, latency: float):
+        labels = {"provider": provider.name, "model": provider.model,
+                  "operation": request.operation, "outcome": outcome}
+        LLM_REQUEST_SECONDS.observe(latency, **labels)
+        LLM_REQUESTS_TOTAL.inc(**labels)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Current routing statistics, ordered by score"""
+        return [
+            {
+                "provider": provider.name,
+                "model": provider.model,
+                "score": self.score(provider),
+                "latency": self.stats[provider.name].latency,
+                "error_rate": self.stats[provider.name].error_rate,
+                "calls": self.stats[provider.name].calls,
+                "failures": self.stats[provider.name].failures,
+                "cooldown": self.stats[provider.name].in_cooldown(),
+            }
+            for provider in sorted(self.providers, key=self.score)
+        ]
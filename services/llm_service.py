@@ -1,46 +1,87 @@
-import google.generativeai as genai
-import asyncio
-from typing import Dict, Any
-from utils.exceptions import LLMProviderError, InvalidAPIKeyError
+from typing import Optional
 
-class LLMService:
-    """Service class to handle Google Gemini LLM provider"""
-    
-    def __init__(self):
-        self.provider = "gemini"
+from config import settings
+from services.llm_providers import LLMRequest, LLMResponse, build_providers, generation_config
+from services.llm_router import ProviderRouter
+from services.prompts import estimate_tokens
+from services.usage_service import usage_tracker
+from utils.kv_store import offload, store
+from utils.metrics import LLM_TOKENS_TOTAL
+from utils.rate_limit import SharedTokenBucket, TokenBucket
+from utils.tracing import tracer
+
+def build_rate_limiter(rate: float = None) -> Optional[TokenBucket]:
+    """LLM rate limiter, shared by all workers when the store is
     
+    `rate` overrides LLM_RATE_LIMIT_PER_SECOND for this process; a shared
+    bucket is still drawn from by every process using the store.
+    """
+    rate = settings.LLM_RATE_LIMIT_PER_SECOND if rate is None else rate
+    if rate <= 0:
+        return None
+    if settings.STORE_BACKEND == "memory":
+        return TokenBucket(rate, settings.LLM_RATE_LIMIT_BURST)
+    return SharedTokenBucket(store, "llm", rate, settings.LLM_RATE_LIMIT_BURST)
+
+class LLMService:
+    """Service class that routes generation requests across the configured LLM providers"""
+
+    def __init__(self, providers=None):
+        self.router = ProviderRouter(providers or build_providers(settings.LLM_PROVIDERS))
+        self.rate_limiter = build_rate_limiter()
+
+    def set_providers(self, providers):
+        """Replace the provider adapters (e.g. with a fake provider in tests)"""
+        self.router = ProviderRouter(providers)
+
+    async def generate(self, api_key: str, prompt: str, system_prompt: str = None,
+                       operation: str = "generic", units: int = None) -> LLMResponse:
+        """Generate content on the best available provider, failing over on errors
+        
+        `units` is the requested output size (summary words, quiz questions,
+        syllabus modules) and scales the operation's output-token cap.
+        """
+        await offload(usage_tracker.check_budget, api_key)
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        request = LLMRequest(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            api_key=api_key,
+            operation=operation,
+            generation=generation_config(operation, units)
+        )
+        response = await self.router.generate(request)
+        await self._record_usage(request, response)
+        return response
+
+    @staticmethod
+    async def _record_usage(request: LLMRequest, response: LLMResponse):
+        """Account the call's tokens, estimating whatever the provider didn't report"""
+        estimated = response.prompt_tokens is None or response.completion_tokens is None
+        if response.prompt_tokens is None:
+            response.prompt_tokens = estimate_tokens(request.full_prompt)
+        if response.completion_tokens is None:
+            response.completion_tokens = estimate_tokens(response.text)
+
+        total = response.prompt_tokens + response.completion_tokens
+        cost = total / 1000 * settings.PROVIDER_COSTS.get(response.provider, 0.0)
+        await offload(usage_tracker.record, request.api_key, request.operation, response.prompt_tokens,
+                      response.completion_tokens, cost, estimated)
+        LLM_TOKENS_TOTAL.inc(response.prompt_tokens, provider=response.provider,
+                             operation=request.operation, kind="prompt")
+        LLM_TOKENS_TOTAL.inc(response.completion_tokens, provider=response.provider,
+                             operation=request.operation, kind="completion")
+        span = tracer.current_span()
+        if span is not None:
+            span.set_attribute("llm.prompt_tokens", response.prompt_tokens)
+            span.set_attribute("llm.completion_tokens", response.completion_tokens)
+            span.set_attribute("llm.tokens_estimated", estimated)
+
     async def generate_content(self, api_key: str, prompt: str, system_prompt: str = None) -> str:
-        """Generate content using Google Gemini"""
-        try:
-            return await self._call_gemini(api_key, prompt, system_prompt)
-        except Exception as e:
-            if "invalid" in str(e).lower() or "unauthorized" in str(e).lower():
-                raise InvalidAPIKeyError(f"Invalid API key for Gemini")
-            raise LLMProviderError(f"Error calling Gemini: {str(e)}")
-    
-    async def _call_gemini(self, api_key: str, prompt: str, system_prompt: str = None) -> str:
-        """Call Google Gemini API"""
-        try:
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-pro')
-            
-            full_prompt = prompt
-            if system_prompt:
-                full_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, model.generate_content, full_prompt
-            )
-            
-            if response.text:
-                return response.text
-            else:
-                raise LLMProviderError("Empty response from Gemini")
-                
-        except Exception as e:
-            if "API_KEY_INVALID" in str(e) or "invalid" in str(e).lower():
-                raise InvalidAPIKeyError("Invalid Gemini API key")
-            raise LLMProviderError(f"Gemini API error: {str(e)}")
+        """Generate content and return only the text"""
+        response = await self.generate(api_key, prompt, system_prompt)
+        return response.text
 
 # Singleton instance
 llm_service = LLMService()
@@ -1,29 +1,142 @@
+import asyncio
+import multiprocessing
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Optional
+from typing import BinaryIO, Optional, Union
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
+import time
 import uuid
 from config import settings
+from services.storage_service import ArtifactStorage, artifact_storage
+from utils.metrics import PDF_RENDER_SECONDS, PDF_SIZE_BYTES
+from utils.tracing import tracer
 
 class PDFService:
     """Service for generating PDF exports of educational content"""
     
-    def __init__(self):
-        self.pdf_directory = settings.PDF_DIRECTORY
-        os.makedirs(self.pdf_directory, exist_ok=True)
+    def __init__(self, storage: ArtifactStorage = None):
+        self.storage = storage or artifact_storage
+        self._pool = None
     
     def generate_education_pdf(self, education_data: dict) -> str:
         """Generate PDF from education content using ReportLab"""
-        # Generate PDF filename
-        pdf_filename = f"edubot_{uuid.uuid4().hex[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        pdf_path = os.path.join(self.pdf_directory, pdf_filename)
+        pdf_path = self.storage.path(self._pdf_filename())
+        self.write_pdf(education_data, pdf_path)
+        self.publish(pdf_path)
+        return pdf_path
+    
+    async def generate_education_pdf_async(self, education_data: dict) -> str:
+        """generate_education_pdf off the event loop: render in the render pool, upload in a thread"""
+        pdf_path = self.storage.path(self._pdf_filename())
+        await self.render_file_async(education_data, pdf_path)
+        await asyncio.get_running_loop().run_in_executor(None, self.publish, pdf_path)
+        return pdf_path
+    
+    def write_pdf(self, education_data: dict, pdf_path: str):
+        """Render a course PDF to pdf_path atomically; readers never see a partial file"""
+        partial_path = self.storage.partial_path(pdf_path)
+        try:
+            self.render_pdf(education_data, partial_path)
+            os.replace(partial_path, pdf_path)
+        finally:
+            self.storage.delete(partial_path)
+    
+    def render_pdf(self, education_data: dict, target: Union[str, BinaryIO]) -> int:
+        """Render a course PDF into a file path or writable binary file; returns its size"""
+        with tracer.start_span("pdf.render", **{"pdf.modules": len(education_data["modules"])}) as span:
+            started = time.perf_counter()
+            self._build_pdf(education_data, target)
+            size = os.path.getsize(target) if isinstance(target, str) else target.tell()
+            PDF_RENDER_SECONDS.observe(time.perf_counter() - started)
+            PDF_SIZE_BYTES.observe(size)
+            span.set_attribute("pdf.size_bytes", size)
+        return size
+    
+    def render_spooled(self, education_data: dict) -> BinaryIO:
+        """Render a course PDF into a temporary buffer, rewound for reading
         
+        The buffer stays in memory up to PDF_SPOOL_MAX_BYTES and spills to a
+        temporary file beyond that; nothing is left in the PDF directory.
+        """
+        buffer = tempfile.SpooledTemporaryFile(max_size=settings.PDF_SPOOL_MAX_BYTES)
+        try:
+            self.render_pdf(education_data, buffer)
+        except Exception:
+            buffer.close()
+            raise
+        buffer.seek(0)
+        return buffer
+    
+    async def render_file_async(self, education_data: dict, pdf_path: str):
+        """Render a course PDF to pdf_path off the event loop, in the render pool"""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._render_pool(), render_file, education_data, pdf_path)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            self._pool = None
+            raise
+    
+    def _render_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Worker processes for CPU-bound renders (None: the loop's thread pool)"""
+        if self._pool is None and settings.PDF_RENDER_WORKERS > 0:
+            # spawn, not fork: the server process has threads and an event loop
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+    
+    def close(self):
+        """Stop the render pool, if one was started"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def course_pdf_path(self, topic_id: str, etag: str) -> str:
+        """Cache path of a stored course's on-demand PDF for one version of its content"""
+        # Sharded by topic so every version of a course shares one directory
+        return self.storage.path(f"course_{topic_id}_{etag}.pdf", key=topic_id)
+    
+    def evict_course_pdfs(self, topic_id: str, keep: str = None):
+        """Delete cached on-demand PDFs of a course, except the one at `keep`"""
+        for path in self.storage.list(f"course_{topic_id}_", key=topic_id):
+            if path != keep and path.endswith(".pdf"):
+                self.delete_pdf(path)
+    
+    def copy_pdf(self, pdf_path: str) -> str:
+        """Copy a pre-rendered PDF under a new name so each course owns its file"""
+        copy_path = self.storage.path(self._pdf_filename())
+        self.storage.copy(pdf_path, copy_path)
+        self.publish(copy_path)
+        return copy_path
+    
+    def publish(self, pdf_path: str):
+        """Upload a rendered PDF to the object store; the local file goes if that fails"""
+        try:
+            self.storage.publish(pdf_path, "application/pdf")
+        except Exception:
+            self.storage.delete(pdf_path)
+            raise
+    
+    def _pdf_filename(self) -> str:
+        return f"edubot_{uuid.uuid4().hex[:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    
+    def delete_pdf(self, pdf_path: str):
+        """Remove a rendered PDF that no longer matches its course"""
+        self.storage.remove(pdf_path)
+    
+    def _build_pdf(self, education_data: dict, target: Union[str, BinaryIO]):
+        """Render the ReportLab story for a course into a file path or binary file"""
         # Create PDF document
-        doc = SimpleDocTemplate(pdf_path, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+        doc = SimpleDocTemplate(target, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
         
         # Get styles
         styles = getSampleStyleSheet()
@@ -119,8 +232,14 @@ class PDFService:
         
         # Build PDF
         doc.build(story)
-        
-        return pdf_path
     
 # Singleton instance
 pdf_service = PDFService()
+
+
+def render_file(education_data: dict, pdf_path: str):
+    """Render a course PDF to pdf_path atomically
+    
+    Module-level so render pool processes can run it.
+    """
+    pdf_service.write_pdf(education_data, pdf_path)
@@ -0,0 +1,240 @@
+import textwrap
+from dataclasses import dataclass
+from string import Template
+from typing import Dict, Optional, Tuple
+
+from utils.metrics import PROMPT_TOKENS
+from utils.tracing import tracer
+
+# Rough size of a token for English prose; good enough for budgeting and reporting
+CHARS_PER_TOKEN = 4
+
+LEVEL_INSTRUCTIONS = {
+    "beginner": "Explain in simple terms, avoid jargon, use analogies and examples",
+    "intermediate": "Provide a balanced explanation with some technical details",
+    "advanced": "Include technical details, advanced concepts, and theoretical background"
+}
+
+DIFFICULTY_INSTRUCTIONS = {
+    "easy": "basic understanding and recall",
+    "medium": "application and analysis",
+    "hard": "synthesis and evaluation"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated token count of a piece of text"""
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def compact(text: str) -> str:
+    """Drop indentation, trailing spaces and blank lines; none of it helps the model"""
+    lines = (line.strip() for line in textwrap.dedent(text).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    """System prompt and prompt ready to send to a provider"""
+    system_prompt: str
+    prompt: str
+
+    @property
+    def estimated_tokens(self) -> int:
+        return estimate_tokens(self.system_prompt) + estimate_tokens(self.prompt)
+
+
+class PromptTemplate:
+    """A prompt compiled once: whitespace compacted and static parts substituted
+
+    Templates use `$name` placeholders so the JSON examples need no brace
+    escaping. `variants` maps a key such as a level or difficulty to the
+    static values filled in at compile time.
+    """
+
+    def __init__(self, name: str, system: str, body: str,
+                 variants: Optional[Dict[str, Dict[str, str]]] = None):
+        self.name = name
+        self._compiled: Dict[Optional[str], Tuple[str, Template]] = {}
+        self._raw: Dict[Optional[str], Tuple[str, Template]] = {}
+        for key, values in (variants or {None: {}}).items():
+            self._raw[key] = (Template(system).substitute(values),
+                              Template(Template(body).safe_substitute(values)))
+            self._compiled[key] = (compact(Template(system).substitute(values)),
+                                   Template(compact(Template(body).safe_substitute(values))))
+
+    @property
+    def variants(self):
+        return list(self._compiled)
+
+    def render(self, variant: Optional[str] = None, **values) -> RenderedPrompt:
+        system_prompt, body = self._compiled[variant]
+        rendered = RenderedPrompt(system_prompt, body.substitute(values))
+        PROMPT_TOKENS.observe(rendered.estimated_tokens, operation=self.name)
+        span = tracer.current_span()
+        if span is not None:
+            span.set_attribute("prompt.estimated_tokens", rendered.estimated_tokens)
+        return rendered
+
+    def render_uncompacted(self, variant: Optional[str] = None, **values) -> RenderedPrompt:
+        """The prompt as written in source, whitespace included; for measuring savings"""
+        system_prompt, body = self._raw[variant]
+        return RenderedPrompt(system_prompt, body.substitute(values))
+
+
+class PromptRegistry:
+    """Prompt templates by operation name"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        if template.name in self._templates:
+            raise ValueError(f"Prompt template already registered: {template.name}")
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def __iter__(self):
+        return iter(self._templates.values())
+
+
+# Global registry instance, compiled at import
+prompts = PromptRegistry()
+
+SUMMARIZE = prompts.register(PromptTemplate(
+    "summarize",
+    system=(
+        "You are an expert at creating concise, accurate summaries. "
+        "Provide a clear and informative summary that captures the main points."
+    ),
+    body="""
+        Please summarize the following text in approximately $max_length words or less:
+
+        Text: $text
+
+        Requirements:
+        - Keep the summary concise and informative
+        - Capture the main ideas and key points
+        - Make it easy to understand
+        """,
+))
+
+EXPLAIN = prompts.register(PromptTemplate(
+    "explain",
+    system=(
+        "You are an expert educator. Explain concepts clearly at the $level level. "
+        "$instructions. Always provide practical examples when possible."
+    ),
+    body="""
+        Please explain the concept: "$concept"
+
+        Level: $level
+
+        Requirements:
+        - Make the explanation appropriate for the $level level
+        - Include practical examples
+        - Structure the explanation clearly
+        - Make it engaging and easy to understand
+        """,
+    variants={level: {"level": level, "instructions": instructions}
+              for level, instructions in LEVEL_INSTRUCTIONS.items()},
+))
+
+QUIZ = prompts.register(PromptTemplate(
+    "quiz",
+    system=(
+        "You are an expert quiz creator. Generate multiple-choice questions that test "
+        "$instructions. Each question should have 4 options with "
+        "one correct answer. Always provide explanations for the correct answers."
+    ),
+    body="""
+        Create $num_questions multiple-choice questions based on the following:
+
+        $content_source
+
+        Difficulty: $difficulty
+
+        Requirements:
+        - Each question should have exactly 4 options (A, B, C, D)
+        - Only one correct answer per question
+        - Include an explanation for each correct answer
+        - Questions should test $instructions
+
+        Format your response as valid JSON:
+        {
+            "questions": [
+                {
+                    "question": "Question text here?",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct_answer": 0,
+                    "explanation": "Explanation of the correct answer"
+                }
+            ]
+        }
+        """,
+    variants={difficulty: {"difficulty": difficulty, "instructions": instructions}
+              for difficulty, instructions in DIFFICULTY_INSTRUCTIONS.items()},
+))
+
+SYLLABUS = prompts.register(PromptTemplate(
+    "syllabus",
+    system=(
+        "You are an expert curriculum designer. Create comprehensive syllabi that provide "
+        "clear learning paths with well-structured modules and realistic time estimates."
+    ),
+    body="""
+        Create a comprehensive syllabus for the topic: "$topic"
+
+        Requirements:
+        - Create exactly $modules_count modules
+        - Include an overview of the entire topic
+        - Provide learning objectives
+        - Estimate duration for each module and total course
+        - Make modules progressive (building on each other)
+
+        Format your response as valid JSON:
+        {
+            "overview": "Brief overview of the topic and what students will learn",
+            "modules": [
+                {
+                    "title": "Module 1 Title",
+                    "description": "What this module covers"
+                }
+            ],
+            "total_duration": "Total estimated time (e.g., '4 weeks', '20 hours')",
+            "learning_objectives": ["Objective 1", "Objective 2", "Objective 3"]
+        }
+        """,
+))
+
+MODULE = prompts.register(PromptTemplate(
+    "module",
+    system=(
+        "You are an expert educator creating detailed learning content. "
+        "Provide comprehensive, well-structured content with practical examples."
+    ),
+    body="""
+        Create detailed learning content for this module:
+
+        Topic: $topic
+        Module Title: $module_title
+        Module Description: $module_description
+
+        Requirements:
+        - Provide comprehensive content that covers the module thoroughly
+        - Include key points (5-7 bullet points)
+        - Estimate realistic duration for studying this module
+        - Make content engaging and informative
+        - Include practical examples where relevant
+
+        Format your response as valid JSON:
+        {
+            "content": "Detailed content for the module (2-3 paragraphs)",
+            "key_points": ["Key point 1", "Key point 2", "Key point 3"],
+            "estimated_duration": "Estimated study time (e.g., '2 hours', '1 week')"
+        }
+        """,
+))
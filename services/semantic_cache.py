@@ -0,0 +1,189 @@
+import logging
+import math
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Set
+
+from config import settings
+from utils.kv_store import KVStore, offload, store
+from utils.metrics import SEMANTIC_CACHE_LOOKUPS_TOTAL, SEMANTIC_CACHE_SIMILARITY
+
+logger = logging.getLogger(__name__)
+
+# Filler that doesn't change which concept is being asked about
+STOP_WORDS = frozenset({
+    "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are", "was", "be",
+    "what", "whats", "how", "why", "does", "do", "explain", "explained", "explanation",
+    "define", "definition", "meaning", "describe", "tell", "me", "about", "please", "can",
+    "you", "understand", "intro", "introduction",
+})
+
+# Punctuation, except the symbols that name things (C++, C#)
+_NON_WORD = re.compile(r"[^\w\s+#]+")
+_ROMAN_NUMERAL = re.compile(r"x{0,3}(ix|iv|v?i{0,3})")
+
+
+def normalise(concept: str) -> str:
+    """Lowercase, drop punctuation and stop words, collapse whitespace"""
+    words = _NON_WORD.sub(" ", concept.lower()).split()
+    kept = [word for word in words if word not in STOP_WORDS]
+    # A concept made only of stop words is still a concept; keep it whole
+    return " ".join(kept or words)
+
+
+def distinguishing_words(key: str) -> FrozenSet[str]:
+    """Words of a normalised key that a near duplicate must share exactly
+
+    Numbers, symbols, roman numerals and one- or two-letter words change the
+    concept (World War I/II, C/C++, Python 2/3) while barely changing its n-grams.
+    """
+    return frozenset(word for word in key.split()
+                     if not word.isalpha() or len(word) <= 2 or _ROMAN_NUMERAL.fullmatch(word))
+
+
+def ngrams(text: str, n: int) -> FrozenSet[str]:
+    """Character n-grams of the padded text"""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return frozenset({padded})
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+@dataclass
+class CacheEntry:
+    """A cached result and the normalised concept it answers"""
+    key: str
+    grams: FrozenSet[str]
+    words: FrozenSet[str]
+    value: object
+
+
+class SemanticCache:
+    """Near-duplicate cache: n-gram cosine similarity over normalised keys
+
+    Entries are grouped by namespace (e.g. explanation level) and each
+    namespace holds at most `max_entries`, evicting the least recently used.
+    An inverted n-gram index limits scoring to entries sharing at least one
+    n-gram with the query, and a near duplicate must share the query's
+    distinguishing words exactly.
+
+    With a `shared` store, entries are also written there and exact
+    (normalised) matches are looked up there, so workers answer each
+    other's repeats; near-duplicate matching stays per process. Values
+    must then be JSON-serialisable.
+    """
+
+    def __init__(self, name: str, threshold: float = None, max_entries: int = None, ngram_size: int = None,
+                 shared: KVStore = None):
+        self.name = name
+        self.shared = shared
+        self.shared_namespace = f"semantic_cache:{name}"
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_entries = max_entries or settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.ngram_size = ngram_size or settings.SEMANTIC_CACHE_NGRAM_SIZE
+        self._entries: Dict[str, "OrderedDict[str, CacheEntry]"] = {}
+        self._index: Dict[str, Dict[str, Set[str]]] = {}
+
+    def get(self, namespace: str, text: str) -> Optional[object]:
+        """Cached value for text or a near duplicate of it within the namespace"""
+        key = normalise(text)
+        if self._needs_shared_lookup(namespace, key):
+            self._adopt(namespace, key, self.shared.get(self.shared_namespace, f"{namespace}|{key}"))
+        return self._match(namespace, text, key)
+
+    async def get_async(self, namespace: str, text: str) -> Optional[object]:
+        """get() for async callers; the shared store is read off the event loop"""
+        key = normalise(text)
+        if self._needs_shared_lookup(namespace, key):
+            value = await offload(self.shared.get, self.shared_namespace, f"{namespace}|{key}")
+            self._adopt(namespace, key, value)
+        return self._match(namespace, text, key)
+
+    def _needs_shared_lookup(self, namespace: str, key: str) -> bool:
+        return self.shared is not None and key not in self._entries.get(namespace, {})
+
+    def _adopt(self, namespace: str, key: str, value: Optional[object]):
+        """Keep a value another worker stored, so later lookups stay local"""
+        if value is not None:
+            self._put_local(namespace, key, value)
+
+    def _match(self, namespace: str, text: str, key: str) -> Optional[object]:
+        entries = self._entries.get(namespace, {})
+        entry = entries.get(key)
+        similarity = 1.0 if entry else 0.0
+        if entry is None and entries:
+            grams = ngrams(key, self.ngram_size)
+            words = distinguishing_words(key)
+            candidates = set()
+            index = self._index[namespace]
+            for gram in grams:
+                candidates.update(index.get(gram, ()))
+            for candidate in candidates:
+                other = entries[candidate]
+                if other.words != words:
+                    continue
+                score = len(grams & other.grams) / math.sqrt(len(grams) * len(other.grams))
+                if score > similarity:
+                    entry, similarity = other, score
+
+        if entry is None or similarity < self.threshold:
+            SEMANTIC_CACHE_LOOKUPS_TOTAL.inc(cache=self.name, namespace=namespace, outcome="miss")
+            if entry is not None:
+                # Near misses show whether the threshold is too strict
+                logger.debug(f"{self.name} cache miss ({namespace}): {text!r} closest to "
+                             f"{entry.key!r} with similarity {similarity:.3f}")
+            return None
+
+        entries.move_to_end(entry.key)
+        SEMANTIC_CACHE_LOOKUPS_TOTAL.inc(cache=self.name, namespace=namespace, outcome="hit")
+        SEMANTIC_CACHE_SIMILARITY.observe(similarity, cache=self.name)
+        logger.info(f"{self.name} cache hit ({namespace}): {text!r} matched {entry.key!r} "
+                    f"with similarity {similarity:.3f}")
+        return entry.value
+
+    def put(self, namespace: str, text: str, value: object):
+        key = normalise(text)
+        if self.shared is not None:
+            self.shared.set(self.shared_namespace, f"{namespace}|{key}", value)
+        self._put_local(namespace, key, value)
+
+    async def put_async(self, namespace: str, text: str, value: object):
+        """put() for async callers; the shared store is written off the event loop"""
+        key = normalise(text)
+        if self.shared is not None:
+            await offload(self.shared.set, self.shared_namespace, f"{namespace}|{key}", value)
+        self._put_local(namespace, key, value)
+
+    def _put_local(self, namespace: str, key: str, value: object):
+        entries = self._entries.setdefault(namespace, OrderedDict())
+        index = self._index.setdefault(namespace, {})
+        if key in entries:
+            entries[key].value = value
+            entries.move_to_end(key)
+            return
+
+        entry = CacheEntry(key, ngrams(key, self.ngram_size), distinguishing_words(key), value)
+        entries[key] = entry
+        for gram in entry.grams:
+            index.setdefault(gram, set()).add(key)
+        while len(entries) > self.max_entries:
+            _, evicted = entries.popitem(last=False)
+            for gram in evicted.grams:
+                keys = index[gram]
+                keys.discard(evicted.key)
+                if not keys:
+                    del index[gram]
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def clear(self):
+        self._entries.clear()
+        self._index.clear()
+        if self.shared is not None:
+            self.shared.clear(self.shared_namespace)
+
+# Singleton instance used by ContentService.explain_concept when enabled;
+# shared between workers unless the store is per process anyway
+explain_cache = SemanticCache("explain", shared=store if settings.STORE_BACKEND != "memory" else None)
@@ -0,0 +1,267 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+
+import aiofiles
+import aiofiles.os
+
+from config import settings
+from utils.object_store import LocalObjectStore, ObjectStore, build_object_store
+from utils.metrics import (
+    ARTIFACT_BYTES, ARTIFACT_DELETED_TOTAL, ARTIFACT_DISK_FREE_BYTES, ARTIFACT_FILES, ARTIFACT_SWEEP_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_SUFFIX = ".part"
+
+
+@dataclass
+class SweepResult:
+    """Outcome of one janitor sweep"""
+    files: int = 0
+    bytes: int = 0
+    deleted_expired: int = 0
+    deleted_over_quota: int = 0
+    deleted_partial: int = 0
+
+
+class ArtifactStorage:
+    """Generated files (PDFs) on local disk, spread over sharded subdirectories
+
+    A file lives in `{root}/{shard}/{name}`, where the shard is the first
+    characters of a hash of its key (the name unless given), so no directory
+    grows past a few thousand entries even with hundreds of thousands of files.
+    Writes go to a `.part` file renamed into place, so readers never see a
+    partial artifact.
+
+    Finished files are published to an object store under the same relative
+    key. With the local store the directory is the store; with S3 it becomes a
+    cache and clients download from the bucket.
+    """
+
+    def __init__(self, root: str, shard_chars: int = None, objects: ObjectStore = None):
+        self.root = root
+        self.shard_chars = settings.ARTIFACT_SHARD_CHARS if shard_chars is None else shard_chars
+        self.objects = objects or LocalObjectStore(root)
+        self._shards = set()
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def redirects_downloads(self) -> bool:
+        """Whether downloads are sent to the object store instead of served from disk"""
+        return self.objects.serves_downloads
+
+    def shard(self, key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:self.shard_chars]
+
+    def path(self, name: str, key: str = None) -> str:
+        """Path of artifact `name`, sharded by `key` (default: the name)
+
+        Artifacts sharing a key share a directory, so they can be listed together.
+        """
+        if not name or name in (".", "..") or os.path.basename(name) != name:
+            raise ValueError(f"Invalid artifact name: {name!r}")
+        return os.path.join(self.directory(key or name), name)
+
+    def directory(self, key: str) -> str:
+        """Shard directory for `key`, created on first use"""
+        shard = self.shard(key)
+        directory = os.path.join(self.root, shard)
+        if shard not in self._shards:
+            os.makedirs(directory, exist_ok=True)
+            self._shards.add(shard)
+        return directory
+
+    def list(self, prefix: str, key: str) -> List[str]:
+        """Paths of the finished artifacts in `key`'s shard whose names start with prefix"""
+        with os.scandir(self.directory(key)) as entries:
+            return [
+                entry.path for entry in entries
+                if entry.name.startswith(prefix) and not entry.name.endswith(PARTIAL_SUFFIX)
+            ]
+
+    def partial_path(self, path: str) -> str:
+        """Unique temporary path next to `path`, renamed over it once written"""
+        return f"{path}.{uuid.uuid4().hex[:8]}{PARTIAL_SUFFIX}"
+
+    async def exists(self, path: str) -> bool:
+        return await aiofiles.os.path.exists(path)
+
+    async def find(self, name: str) -> Optional[str]:
+        """Path of an artifact looked up by name only, or None
+
+        Also finds files written before sharding, directly in the root.
+        """
+        try:
+            path = self.path(name)
+        except ValueError:
+            return None
+        if await aiofiles.os.path.isfile(path):
+            return path
+        legacy_path = os.path.join(self.root, name)
+        if await aiofiles.os.path.isfile(legacy_path):
+            return legacy_path
+        return None
+
+    @asynccontextmanager
+    async def open_atomic(self, path: str) -> AsyncIterator:
+        """Async file for writing `path`; it appears only if the block completes"""
+        partial_path = self.partial_path(path)
+        try:
+            async with aiofiles.open(partial_path, "wb") as f:
+                yield f
+            await aiofiles.os.replace(partial_path, path)
+        finally:
+            await self.delete_async(partial_path)
+
+    def copy(self, source_path: str, path: str):
+        """Copy a file into storage atomically"""
+        partial_path = self.partial_path(path)
+        try:
+            shutil.copyfile(source_path, partial_path)
+            os.replace(partial_path, path)
+        finally:
+            self.delete(partial_path)
+
+    def delete(self, path: str):
+        """Delete the local file only (the janitor's view: local disk is a cache)"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def object_key(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def publish(self, path: str, content_type: str = "application/pdf"):
+        """Put a finished local file in the object store (a no-op for local storage)"""
+        self.objects.put_file(self.object_key(path), path, content_type)
+
+    def is_published(self, path: str) -> bool:
+        return self.objects.exists(self.object_key(path))
+
+    def fetch(self, path: str) -> bool:
+        """Make sure an artifact is on local disk, downloading it if need be; False if missing"""
+        if os.path.isfile(path):
+            return True
+        return self.objects.get_file(self.object_key(path), path)
+
+    def download_url(self, path: str, filename: str = None) -> Optional[str]:
+        """Direct download URL from the object store, if it hands them out"""
+        return self.objects.download_url(self.object_key(path), filename)
+
+    def remove(self, path: str):
+        """Delete an artifact from local disk and the object store"""
+        self.delete(path)
+        self.objects.delete(self.object_key(path))
+
+    def close(self):
+        self.objects.close()
+
+    async def delete_async(self, path: str):
+        try:
+            await aiofiles.os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def disk_free(self) -> int:
+        return shutil.disk_usage(self.root).free
+
+    def sweep(self, max_age: float = None, max_total_bytes: int = None,
+              partial_max_age: float = None, now: float = None) -> SweepResult:
+        """Delete expired artifacts, then the oldest until the total fits the quota
+
+        `.part` files older than partial_max_age were left by crashed writers
+        and are removed too. A max_age or max_total_bytes of 0 disables that
+        limit. Blocking; the janitor runs it in a thread.
+        """
+        max_age = settings.ARTIFACT_MAX_AGE if max_age is None else max_age
+        max_total_bytes = settings.ARTIFACT_MAX_TOTAL_BYTES if max_total_bytes is None else max_total_bytes
+        partial_max_age = settings.ARTIFACT_PARTIAL_MAX_AGE if partial_max_age is None else partial_max_age
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        result = SweepResult()
+
+        files = []
+        for path, size, mtime in self._scan():
+            age = now - mtime
+            if path.endswith(PARTIAL_SUFFIX):
+                if age > partial_max_age:
+                    self.delete(path)
+                    result.deleted_partial += 1
+                    continue
+            elif max_age and age > max_age:
+                self.delete(path)
+                result.deleted_expired += 1
+                continue
+            files.append((mtime, size, path))
+            result.bytes += size
+
+        if max_total_bytes and result.bytes > max_total_bytes:
+            files.sort()
+            for mtime, size, path in files:
+                if result.bytes <= max_total_bytes:
+                    break
+                if path.endswith(PARTIAL_SUFFIX):
+                    continue
+                self.delete(path)
+                result.deleted_over_quota += 1
+                result.bytes -= size
+        result.files = len(files) - result.deleted_over_quota
+
+        ARTIFACT_FILES.set(result.files)
+        ARTIFACT_BYTES.set(result.bytes)
+        ARTIFACT_DELETED_TOTAL.inc(result.deleted_expired, reason="expired")
+        ARTIFACT_DELETED_TOTAL.inc(result.deleted_over_quota, reason="quota")
+        ARTIFACT_DELETED_TOTAL.inc(result.deleted_partial, reason="partial")
+        ARTIFACT_SWEEP_SECONDS.observe(time.perf_counter() - started)
+        return result
+
+    def _scan(self):
+        """(path, size, mtime) of every file in the root and its shards"""
+        directories = [self.root]
+        while directories:
+            try:
+                entries = os.scandir(directories.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat = entry.stat(follow_symlinks=False)
+                            yield entry.path, stat.st_size, stat.st_mtime
+                    except FileNotFoundError:
+                        # Renamed or deleted by a writer mid-scan
+                        continue
+
+    async def run_janitor(self, interval: float = None):
+        """Sweep now and then every `interval` seconds until cancelled"""
+        interval = settings.ARTIFACT_JANITOR_INTERVAL if interval is None else interval
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                result = await loop.run_in_executor(None, self.sweep)
+                deleted = result.deleted_expired + result.deleted_over_quota + result.deleted_partial
+                if deleted:
+                    logger.info(
+                        f"Artifact janitor removed {deleted} files; "
+                        f"{result.files} files, {result.bytes} bytes remain"
+                    )
+            except Exception as e:
+                logger.error(f"Artifact janitor sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+# Singleton instance
+artifact_storage = ArtifactStorage(settings.PDF_DIRECTORY, objects=build_object_store(settings.PDF_DIRECTORY))
+ARTIFACT_DISK_FREE_BYTES.set_function(lambda: {(): artifact_storage.disk_free()})
@@ -0,0 +1,169 @@
+import hashlib
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from utils.exceptions import TokenBudgetExceededError
+from utils.kv_store import KVStore, MemoryKVStore, store
+
+
+def hash_api_key(api_key: Optional[str]) -> str:
+    """Stable, non-reversible identifier for an API key"""
+    if not api_key:
+        return "anonymous"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class _Totals:
+    """Token and cost totals for one operation"""
+
+    __slots__ = ("calls", "estimated_calls", "prompt_tokens", "completion_tokens", "cost")
+
+    def __init__(self):
+        self.calls = 0
+        self.estimated_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+    def add(self, other: "_Totals"):
+        self.calls += other.calls
+        self.estimated_calls += other.estimated_calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cost += other.cost
+
+    @classmethod
+    def from_row(cls, row: List) -> "_Totals":
+        totals = cls()
+        totals.calls, totals.estimated_calls, totals.prompt_tokens, totals.completion_tokens, totals.cost = row
+        return totals
+
+
+class UsageTracker:
+    """Token usage per hashed API key and operation over a rolling window
+
+    Usage is kept in fixed-width time buckets per key, so each key's entry is
+    bounded by window / bucket and old buckets fall out as the window moves.
+    Entries live in a KVStore: with a shared store every worker adds to, and
+    enforces, the same per-key budget.
+    """
+
+    NAMESPACE = "usage"
+
+    def __init__(self, window_seconds: int = None, bucket_seconds: int = None,
+                 budget_per_key: int = None, clock=time.time, kv_store: KVStore = None):
+        self.window_seconds = window_seconds or settings.USAGE_WINDOW_SECONDS
+        self.bucket_seconds = bucket_seconds or settings.USAGE_BUCKET_SECONDS
+        self.budget_per_key = settings.TOKEN_BUDGET_PER_KEY if budget_per_key is None else budget_per_key
+        self.clock = clock
+        # key hash -> [[bucket start, {operation: [calls, estimated calls, prompt, completion, cost]}], ...]
+        self.store = kv_store or MemoryKVStore()
+
+    def _bucket(self, now: float) -> int:
+        return int(now // self.bucket_seconds) * self.bucket_seconds
+
+    def _live(self, buckets: Optional[List], now: float) -> List:
+        """Buckets still inside the window, oldest first"""
+        oldest = now - self.window_seconds
+        return [bucket for bucket in buckets or () if bucket[0] + self.bucket_seconds > oldest]
+
+    def record(self, api_key: Optional[str], operation: str, prompt_tokens: int,
+               completion_tokens: int, cost: float = 0.0, estimated: bool = False):
+        """Add one LLM call's usage"""
+        now = self.clock()
+        start = self._bucket(now)
+
+        def add(buckets):
+            buckets = self._live(buckets, now)
+            current = next((bucket for bucket in buckets if bucket[0] == start), None)
+            if current is None:
+                current = [start, {}]
+                buckets.append(current)
+                # Workers' clocks may differ slightly; keep the oldest bucket first
+                buckets.sort(key=lambda bucket: bucket[0])
+            calls, estimated_calls, prompt, completion, total_cost = current[1].get(operation, (0, 0, 0, 0, 0.0))
+            current[1][operation] = [calls + 1, estimated_calls + int(estimated), prompt + prompt_tokens,
+                                     completion + completion_tokens, total_cost + cost]
+            return buckets
+
+        self.store.update(self.NAMESPACE, hash_api_key(api_key), add)
+
+    def _buckets(self, api_key: Optional[str], now: float) -> List:
+        return self._live(self.store.get(self.NAMESPACE, hash_api_key(api_key)), now)
+
+    @staticmethod
+    def _tokens(buckets: List) -> int:
+        return sum(row[2] + row[3] for _, operations in buckets for row in operations.values())
+
+    def tokens_used(self, api_key: Optional[str]) -> int:
+        """Tokens used by a key within the current window"""
+        return self._tokens(self._buckets(api_key, self.clock()))
+
+    def check_budget(self, api_key: Optional[str]):
+        """Raise TokenBudgetExceededError when a key has used up its budget
+
+        The check runs before each call, so concurrent calls may overshoot
+        the budget by at most their own usage.
+        """
+        if not self.budget_per_key:
+            return
+        now = self.clock()
+        buckets = self._buckets(api_key, now)
+        if self._tokens(buckets) < self.budget_per_key:
+            return
+        oldest = buckets[0][0] if buckets else self._bucket(now)
+        retry_after = max(1, math.ceil(oldest + self.bucket_seconds + self.window_seconds - now))
+        raise TokenBudgetExceededError(
+            f"Token budget of {self.budget_per_key} tokens per {self.window_seconds}s exhausted",
+            retry_after=retry_after
+        )
+
+    def report(self, api_key: Optional[str] = None) -> Dict[str, Any]:
+        """Usage per operation for one key, or across all keys when none is given"""
+        now = self.clock()
+        if api_key is not None:
+            entries = [self._buckets(api_key, now)]
+        else:
+            entries = [self._live(buckets, now) for _, buckets in self.store.items(self.NAMESPACE)]
+        per_operation: Dict[str, _Totals] = {}
+        for buckets in entries:
+            for _, operations in buckets:
+                for operation, row in operations.items():
+                    per_operation.setdefault(operation, _Totals()).add(_Totals.from_row(row))
+
+        overall = _Totals()
+        operations = []
+        for operation, totals in sorted(per_operation.items()):
+            overall.add(totals)
+            operations.append({
+                "operation": operation,
+                "calls": totals.calls,
+                "estimated_calls": totals.estimated_calls,
+                "prompt_tokens": totals.prompt_tokens,
+                "completion_tokens": totals.completion_tokens,
+                "total_tokens": totals.prompt_tokens + totals.completion_tokens,
+                "estimated_cost": round(totals.cost, 6),
+            })
+
+        total_tokens = overall.prompt_tokens + overall.completion_tokens
+        budget = (self.budget_per_key or None) if api_key is not None else None
+        return {
+            "key_hash": hash_api_key(api_key) if api_key is not None else None,
+            "window_seconds": self.window_seconds,
+            "operations": operations,
+            "calls": overall.calls,
+            "prompt_tokens": overall.prompt_tokens,
+            "completion_tokens": overall.completion_tokens,
+            "total_tokens": total_tokens,
+            "estimated_cost": round(overall.cost, 6),
+            "budget": budget,
+            "remaining": max(0, budget - total_tokens) if budget else None,
+        }
+
+    def reset(self):
+        self.store.clear(self.NAMESPACE)
+
+# Singleton instance; shared between workers when the store is
+usage_tracker = UsageTracker(kv_store=store)
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from config import settings
+from services.catalogue_service import course_catalogue
+from services.content_service import content_service
+from utils.metrics import CATALOGUE_WARMUP_TOTAL
+from utils.kv_store import offload
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupProgress:
+    """Running totals for one warm-up pass"""
+    total: int
+    generated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> int:
+        return self.generated + self.skipped + self.failed
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.generated / elapsed if elapsed > 0 else 0.0
+        return (f"{self.done}/{self.total} topics ({self.generated} generated, {self.skipped} fresh, "
+                f"{self.failed} failed) in {elapsed:.1f}s, {rate:.2f} generated/s")
+
+
+def read_topics(path: str) -> List[str]:
+    """Topics from a file with one per line; blank lines and # comments are ignored"""
+    topics = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            topic = line.strip()
+            if topic and not topic.startswith("#"):
+                topics.append(topic)
+    # Keep the first occurrence of duplicates so file order sets priority
+    return list(dict.fromkeys(topics))
+
+
+async def warm_catalogue(topics: List[str], modules_count: int = None, include_pdf: bool = None,
+                         concurrency: int = None, rate_per_second: float = None,
+                         max_age: float = None, api_key: Optional[str] = None,
+                         on_progress: Callable[[WarmupProgress], None] = None) -> WarmupProgress:
+    """Pre-generate courses for topics not yet in the catalogue (or gone stale)
+
+    At most `concurrency` topics generate at once and new topics start at no
+    more than `rate_per_second`, on top of the server-wide LLM rate limit,
+    so warm-up doesn't starve live traffic.
+    """
+    modules_count = modules_count or settings.CATALOGUE_MODULES_COUNT
+    include_pdf = settings.CATALOGUE_INCLUDE_PDF if include_pdf is None else include_pdf
+    concurrency = concurrency or settings.CATALOGUE_CONCURRENCY
+    rate_per_second = settings.CATALOGUE_RATE_PER_SECOND if rate_per_second is None else rate_per_second
+    max_age = settings.CATALOGUE_MAX_AGE if max_age is None else max_age
+
+    progress = WarmupProgress(total=len(topics))
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate_per_second, burst=concurrency) if rate_per_second > 0 else None
+
+    def report(outcome: str):
+        CATALOGUE_WARMUP_TOTAL.inc(outcome=outcome)
+        if on_progress:
+            on_progress(progress)
+        else:
+            logger.info(f"Catalogue warm-up: {progress.summary()}")
+
+    async def warm(topic: str):
+        if await offload(course_catalogue.is_fresh, topic, modules_count, max_age):
+            progress.skipped += 1
+            report("fresh")
+            return
+        async with semaphore:
+            if bucket is not None:
+                await bucket.acquire()
+            try:
+                await _generate_entry(topic, modules_count, include_pdf, api_key)
+            except Exception as e:
+                progress.failed += 1
+                logger.warning(f"Catalogue warm-up failed for {topic!r}: {e}")
+                report("failed")
+                return
+        progress.generated += 1
+        report("generated")
+
+    await asyncio.gather(*(warm(topic) for topic in topics))
+    return progress
+
+
+async def _generate_entry(topic: str, modules_count: int, include_pdf: bool, api_key: Optional[str]):
+    course = await content_service.start_course(topic, modules_count, api_key, use_catalogue=False)
+    syllabus, modules, quiz = await course.complete()
+
+    pdf_path = None
+    if include_pdf:
+        from services.pdf_service import pdf_service
+        education_data = {
+            "topic": topic,
+            "provider_used": course.provider_used(),
+            "syllabus": syllabus.model_dump(),
+            "modules": [module.model_dump() for module in modules],
+            "quiz": quiz.model_dump(),
+        }
+        # Rendering is CPU-bound; keep it off the event loop
+        pdf_path = await asyncio.get_running_loop().run_in_executor(
+            None, pdf_service.generate_education_pdf, education_data
+        )
+
+    previous = await offload(course_catalogue.get, topic, modules_count)
+    await offload(course_catalogue.put, topic, modules_count, syllabus, modules, quiz, course.providers, pdf_path)
+    if previous and previous.get("pdf_path") and previous["pdf_path"] != pdf_path:
+        from services.pdf_service import pdf_service
+        await asyncio.get_running_loop().run_in_executor(None, pdf_service.delete_pdf, previous["pdf_path"])
+
+
+async def run_scheduled_warmup():
+    """Warm the catalogue from CATALOGUE_TOPICS_FILE, repeating every CATALOGUE_WARMUP_INTERVAL"""
+    while True:
+        try:
+            topics = read_topics(settings.CATALOGUE_TOPICS_FILE)
+            progress = await warm_catalogue(topics)
+            logger.info(f"Catalogue warm-up finished: {progress.summary()}")
+        except Exception as e:
+            logger.error(f"Catalogue warm-up pass failed: {e}")
+        if settings.CATALOGUE_WARMUP_INTERVAL <= 0:
+            return
+        await asyncio.sleep(settings.CATALOGUE_WARMUP_INTERVAL)
@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from services.llm_providers import FakeProvider
+from services.llm_service import llm_service
+from utils.admission import AdmissionController, admission_controller, educate_cost
+from utils.exceptions import OverloadedError
+from utils.response_cache import response_cache
+
+
+def controller(**kwargs) -> AdmissionController:
+    options = {"capacity": 10, "reserved": 2, "queue_budget": 4, "queue_timeout": 0, "enabled": True,
+               "costs": {"educate": 12, "summarize": 1}, "concurrency": {}}
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+class TestAdmissionController:
+    """Test suite for admitting and shedding requests by cost"""
+
+    def test_expensive_work_leaves_the_reserve_for_cheap_requests(self):
+        async def run():
+            admission = controller()
+            held = await admission.acquire("educate", 8)
+            with pytest.raises(OverloadedError):
+                await admission.acquire("summarize")
+            cheap = [await admission.acquire("topics"), await admission.acquire("health")]
+            with pytest.raises(OverloadedError):
+                await admission.acquire("topics")
+            assert admission.in_flight() == 10 and admission.in_flight("educate") == 8
+            for ticket in (held, *cheap):
+                admission.release(ticket)
+            return admission.in_flight()
+
+        assert asyncio.run(run()) == 0
+
+    def test_oversized_requests_take_the_whole_share(self):
+        admission = controller()
+        assert admission.cost_of("educate") == 8
+        assert admission.cost_of("topics") == 1
+        assert educate_cost(5) == 7 and educate_cost(5, syllabus=False, modules=False) == 1
+
+    def test_queued_requests_are_admitted_in_order(self):
+        async def run():
+            admission = controller(queue_timeout=5)
+            held = await admission.acquire("educate", 8)
+            first = asyncio.ensure_future(admission.acquire("summarize"))
+            second = asyncio.ensure_future(admission.acquire("summarize", 2))
+            await asyncio.sleep(0)
+            assert admission.queued_cost == 3 and not first.done()
+            # Over the queue budget: rejected without waiting
+            with pytest.raises(OverloadedError):
+                await admission.acquire("summarize", 2)
+            admission.release(held)
+            tickets = [await first, await second]
+            return [ticket.cost for ticket in tickets], admission.queued_cost, admission.in_flight()
+
+        assert asyncio.run(run()) == ([1, 2], 0, 3)
+
+    def test_queue_timeout_rejects_with_recent_duration(self):
+        now = [0.0]
+
+        async def run():
+            admission = controller(queue_timeout=0.01, clock=lambda: now[0])
+            ticket = await admission.acquire("educate", 8)
+            now[0] = 7.5
+            admission.release(ticket)
+            await admission.acquire("educate", 8)
+            with pytest.raises(OverloadedError) as shed:
+                await admission.acquire("summarize")
+            assert admission.queued_cost == 0
+            return shed.value.retry_after, admission.retry_after("educate")
+
+        assert asyncio.run(run()) == (1, 8)
+
+    def test_concurrency_limit_per_operation(self):
+        async def run():
+            admission = controller(concurrency={"summarize": 1})
+            await admission.acquire("summarize")
+            with pytest.raises(OverloadedError):
+                await admission.acquire("summarize")
+
+        asyncio.run(run())
+
+    def test_disabled_admits_everything(self):
+        async def run():
+            admission = controller(enabled=False)
+            tickets = [await admission.acquire("educate") for _ in range(5)]
+            for ticket in tickets:
+                admission.release(ticket)
+            return admission.in_flight()
+
+        assert asyncio.run(run()) == 0
+
+
+class TestLoadShedding:
+    """Test suite for admission control on the REST routes and GraphQL"""
+
+    def setup_method(self):
+        llm_service.set_providers([FakeProvider(latency_mean=0.0, error_rate=0.0)])
+        response_cache.clear()
+        self.client = TestClient(app)
+        self.queue_timeout, admission_controller.queue_timeout = admission_controller.queue_timeout, 0
+        self.enabled, admission_controller.enabled = admission_controller.enabled, True
+        # Saturate the capacity left for expensive work
+        share = admission_controller.capacity - admission_controller.reserved
+        self.ticket = admission_controller._take("educate", share)
+
+    def teardown_method(self):
+        admission_controller.release(self.ticket)
+        admission_controller.queue_timeout, admission_controller.enabled = self.queue_timeout, self.enabled
+
+    def test_rest_generation_is_shed_with_retry_after(self):
+        response = self.client.post("/api/v1/summarize", json={"text": "x" * 100, "api_key": "key"})
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) >= 1
+        assert response.json()["error"] == "Server Overloaded"
+
+    def test_graphql_mutation_returns_overloaded_error(self):
+        response = self.client.post("/graphql/", json={"query": """
+            mutation { explain(input: {concept: "Closures", api_key: "key"}) {
+                __typename ... on Error { code details }
+            } }
+        """})
+        error = response.json()["data"]["explain"]
+        assert error["__typename"] == "Error" and error["code"] == "OVERLOADED"
+        assert error["details"].startswith("Retry after")
+
+    def test_cheap_requests_use_the_reserve(self):
+        assert self.client.post("/graphql/", json={"query": "{ health { status } }"}).status_code == 200
+        assert self.client.get("/api/v1/topics").status_code == 200
+
+    def test_queries_shed_once_the_reserve_is_used(self):
+        reserve = admission_controller._take("topics", admission_controller.reserved)
+        try:
+            response = self.client.post("/graphql/", json={"query": "{ topics { total } }"})
+            rest = self.client.get("/api/v1/topics")
+        finally:
+            admission_controller.release(reserve)
+        assert response.status_code == 503 and "retry-after" in response.headers
+        assert response.json()["errors"][0]["extensions"]["code"] == "OVERLOADED"
+        assert rest.status_code == 503
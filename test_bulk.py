@@ -0,0 +1,92 @@
+import asyncio
+import json
+from services.bulk_service import load_checkpoint, read_records, run_bulk
+from services.catalogue_service import course_catalogue
+from services.llm_service import llm_service
+from services.warmup_service import warm_catalogue
+from test_lazy_educate import CountingProvider
+from utils.kv_store import MemoryKVStore
+
+RECORDS = [
+    {"id": "s1", "operation": "summarize", "text": "GraphQL lets clients ask for exactly the data they need."},
+    {"id": "e1", "operation": "explain", "concept": "Recursion", "level": "beginner"},
+    {"id": "q1", "operation": "quiz", "topic": "Python", "num_questions": 3},
+    {"id": "c1", "operation": "educate", "topic": "Rust", "modules_count": 3},
+    {"id": "bad", "operation": "explain", "concept": "Recursion", "level": "expert"},
+]
+
+
+class TestBulkGeneration:
+    """Test suite for the bulk generation pipeline"""
+
+    def setup_method(self):
+        self.provider = CountingProvider()
+        llm_service.set_providers([self.provider])
+        self.original_store = course_catalogue.store
+        course_catalogue.store = MemoryKVStore()
+
+    def teardown_method(self):
+        course_catalogue.store = self.original_store
+
+    def write_jsonl(self, path, records):
+        path.write_text("".join(json.dumps(r) + "\n" for r in records))
+        return str(path)
+
+    def run(self, input_path, output_path, **kwargs):
+        return asyncio.run(run_bulk(read_records(input_path), str(output_path), api_key="key", **kwargs))
+
+    def read_output(self, path):
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    def test_results_written_per_record(self, tmp_path):
+        output = tmp_path / "out.jsonl"
+        progress = self.run(self.write_jsonl(tmp_path / "in.jsonl", RECORDS), output, concurrency=2)
+        assert (progress.succeeded, progress.failed) == (4, 1)
+
+        entries = {entry["id"]: entry for entry in self.read_output(output)}
+        assert set(entries) == {"s1", "e1", "q1", "c1", "bad"}
+        assert entries["s1"]["result"]["summary"]
+        assert entries["q1"]["result"]["total_questions"] == 3
+        assert len(entries["c1"]["result"]["modules"]) == 3
+        assert entries["bad"]["status"] == "error"
+        assert "Level must be" in entries["bad"]["error"]
+
+    def test_resume_skips_completed_and_drops_torn_line(self, tmp_path):
+        input_path = self.write_jsonl(tmp_path / "in.jsonl", RECORDS[:3])
+        output = tmp_path / "out.jsonl"
+        output.write_text(
+            json.dumps({"id": "s1", "status": "ok", "result": {}}) + "\n"
+            + json.dumps({"id": "e1", "status": "error", "error": "boom"}) + "\n"
+            + '{"id": "q1", "status": "o'
+        )
+        assert load_checkpoint(str(output)) == {"s1"}
+
+        progress = self.run(input_path, output)
+        assert (progress.succeeded, progress.skipped) == (2, 1)
+        assert sorted(self.provider.operations) == ["explain", "quiz"]
+        statuses = [(e["id"], e["status"]) for e in self.read_output(output)]
+        assert statuses[:2] == [("s1", "ok"), ("e1", "error")]
+        assert sorted(statuses[2:]) == [("e1", "ok"), ("q1", "ok")]
+
+    def test_csv_input_with_default_operation(self, tmp_path):
+        input_path = tmp_path / "in.csv"
+        input_path.write_text("topic,num_questions,difficulty\nPython,4,hard\nRust,,\n")
+        records = list(read_records(str(input_path)))
+        assert records == [("1", {"topic": "Python", "num_questions": "4", "difficulty": "hard"}),
+                           ("2", {"topic": "Rust"})]
+
+        output = tmp_path / "out.jsonl"
+        progress = asyncio.run(run_bulk(iter(records), str(output), operation="quiz", api_key="key"))
+        assert progress.succeeded == 2
+        results = {e["id"]: e["result"] for e in self.read_output(output)}
+        assert results["1"]["total_questions"] == 4
+        assert results["2"]["difficulty"] == "medium"
+
+    def test_catalogued_courses_need_no_llm_calls(self, tmp_path):
+        asyncio.run(warm_catalogue(["Rust"], modules_count=3, include_pdf=False,
+                                   rate_per_second=0, api_key="key"))
+        self.provider.operations.clear()
+        output = tmp_path / "out.jsonl"
+        progress = self.run(self.write_jsonl(tmp_path / "in.jsonl", [RECORDS[3]]), output)
+        assert progress.succeeded == 1
+        assert self.provider.operations == []
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from fastapi.testclient import TestClient
+from main import app
+from services.catalogue_service import course_catalogue
+from services.warmup_service import read_topics, warm_catalogue
+from services.llm_service import llm_service
+from services.pdf_service import pdf_service
+from services.storage_service import ArtifactStorage
+from test_lazy_educate import CountingProvider
+from utils.kv_store import MemoryKVStore, SQLiteKVStore
+from utils.rate_limit import TokenBucket
+
+EDUCATE = """
+mutation {
+    educate(input: {topic: "%s", modules_count: 3, api_key: "key", include_pdf: %s}) {
+        ... on EducateResponse { topic_id pdf_url syllabus { overview } modules { title } quiz { total_questions } }
+        ... on Error { code message }
+    }
+}
+"""
+
+
+class TestKVStores:
+    """Test suite for the key-value store backends"""
+
+    def check_store(self, store):
+        store.set("ns", "a", {"x": 1})
+        store.set("ns", "b", [1, 2])
+        store.set("other", "a", "elsewhere")
+        assert store.get("ns", "a") == {"x": 1}
+        assert store.get("ns", "missing") is None
+        store.set("ns", "a", {"x": 2})
+        assert store.get("ns", "a") == {"x": 2}
+        assert dict(store.items("ns")) == {"a": {"x": 2}, "b": [1, 2]}
+        assert store.count("ns") == 2
+        store.delete("ns", "b")
+        assert store.count("ns") == 1
+        store.clear("ns")
+        assert store.count("ns") == 0
+        assert store.get("other", "a") == "elsewhere"
+
+    def test_memory_store(self):
+        self.check_store(MemoryKVStore())
+
+    def test_sqlite_store_persists_across_connections(self, tmp_path):
+        path = str(tmp_path / "nested" / "store.db")
+        store = SQLiteKVStore(path)
+        self.check_store(store)
+        store.set("ns", "kept", {"ok": True})
+        store.close()
+        assert SQLiteKVStore(path).get("ns", "kept") == {"ok": True}
+
+
+class TestTokenBucket:
+    """Test suite for the token bucket rate limiter"""
+
+    def test_burst_then_refill(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2, burst=3, clock=lambda: now[0])
+        assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+        now[0] = 0.5
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+
+    def test_acquire_waits_for_a_token(self):
+        bucket = TokenBucket(rate=50, burst=1)
+
+        async def take_two():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await bucket.acquire()
+            await bucket.acquire()
+            return loop.time() - start
+
+        assert asyncio.run(take_two()) >= 0.015
+
+
+class TestCatalogueWarmup:
+    """Test suite for pre-generating the course catalogue"""
+
+    def setup_method(self):
+        self.provider = CountingProvider()
+        llm_service.set_providers([self.provider])
+        self.original_store = course_catalogue.store
+        course_catalogue.store = MemoryKVStore()
+        # Rendered PDFs go to a scratch directory, not generated_pdfs/
+        self.storage = ArtifactStorage(tempfile.mkdtemp(prefix="edubot_artifacts_"))
+        self.original_storage = pdf_service.storage
+        pdf_service.storage = self.storage
+        self.client = TestClient(app)
+
+    def teardown_method(self):
+        course_catalogue.store = self.original_store
+        pdf_service.storage = self.original_storage
+        shutil.rmtree(self.storage.root, ignore_errors=True)
+
+    def warm(self, topics, **kwargs):
+        kwargs.setdefault("modules_count", 3)
+        kwargs.setdefault("include_pdf", False)
+        kwargs.setdefault("rate_per_second", 0)
+        return asyncio.run(warm_catalogue(topics, api_key="key", **kwargs))
+
+    def educate(self, topic: str, include_pdf: str = "false"):
+        response = self.client.post("/graphql/", json={"query": EDUCATE % (topic, include_pdf)})
+        assert response.status_code == 200
+        return response.json()["data"]["educate"]
+
+    def test_read_topics_skips_comments_and_duplicates(self, tmp_path):
+        path = tmp_path / "topics.txt"
+        path.write_text("# popular\nPython\n\nRust\n  python  \nPython\n")
+        assert read_topics(str(path)) == ["Python", "Rust", "python"]
+
+    def test_warmed_topic_served_without_llm_calls(self):
+        progress = self.warm(["Python", "Rust"], concurrency=2)
+        assert (progress.generated, progress.skipped, progress.failed) == (2, 0, 0)
+        assert len(course_catalogue) == 2
+
+        self.provider.operations.clear()
+        result = self.educate("  python ")
+        assert result["topic_id"]
+        assert len(result["modules"]) == 3
+        assert result["quiz"]["total_questions"] == 10
+        assert self.provider.operations == []
+
+    def test_uncatalogued_topic_still_generates(self):
+        self.warm(["Python"])
+        self.provider.operations.clear()
+        self.educate("Haskell")
+        assert "syllabus" in self.provider.operations
+
+    def test_fresh_entries_are_skipped(self):
+        self.warm(["Python"])
+        self.provider.operations.clear()
+        progress = self.warm(["Python", "Rust"])
+        assert (progress.generated, progress.skipped) == (1, 1)
+        assert self.provider.operations.count("syllabus") == 1
+
+        progress = self.warm(["Python"], max_age=0)
+        assert progress.generated == 1
+
+    def test_prerendered_pdf_is_copied(self):
+        self.warm(["Python"], include_pdf=True)
+        cached_pdf = course_catalogue.get("Python", 3)["pdf_path"]
+        assert os.path.exists(cached_pdf)
+
+        self.provider.operations.clear()
+        result = self.educate("Python", include_pdf="true")
+        assert result["pdf_url"]
+        assert self.provider.operations == []
+        served = self.storage.path(os.path.basename(result["pdf_url"]))
+        assert served != cached_pdf
+        with open(served, "rb") as a, open(cached_pdf, "rb") as b:
+            assert a.read() == b.read()
@@ -0,0 +1,123 @@
+import gzip
+import json
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from main import app
+from utils.compression import CompressionMiddleware, available_encodings, compress
+from utils.http_headers import negotiate_encoding
+from utils.response_cache import response_cache
+
+LARGE = {"modules": [{"title": f"Module {i}", "content": "Lorem ipsum dolor sit amet. " * 40} for i in range(10)]}
+
+
+def make_client(minimum_size: int = 500) -> TestClient:
+    inner = FastAPI()
+
+    @inner.get("/large")
+    async def large():
+        return LARGE
+
+    @inner.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @inner.get("/pdf")
+    async def pdf():
+        return Response(b"%PDF" * 1000, media_type="application/pdf")
+
+    @inner.get("/tagged")
+    async def tagged():
+        return PlainTextResponse("x" * 2000, headers={"ETag": '"abc"', "Accept-Ranges": "bytes"})
+
+    @inner.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(50):
+                yield f"line {i}\n".encode() * 20
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return TestClient(CompressionMiddleware(inner, minimum_size=minimum_size))
+
+
+class TestNegotiation:
+    """Test suite for Accept-Encoding negotiation"""
+
+    def test_negotiate_encoding(self):
+        assert negotiate_encoding(None, ["br", "gzip"]) is None
+        assert negotiate_encoding("gzip, deflate, br", ["br", "gzip"]) == "br"
+        assert negotiate_encoding("gzip, deflate, br", ["gzip"]) == "gzip"
+        assert negotiate_encoding("br;q=0.5, gzip", ["br", "gzip"]) == "gzip"
+        assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+        assert negotiate_encoding("*", ["br", "gzip"]) == "br"
+        assert negotiate_encoding("identity", ["gzip"]) is None
+        assert negotiate_encoding("GZIP;q=bogus, deflate", ["gzip"]) is None
+
+    def test_compress_round_trip(self):
+        body = json.dumps(LARGE).encode()
+        assert gzip.decompress(compress(body, "gzip")) == body
+        assert "gzip" in available_encodings()
+
+
+class TestCompressionMiddleware:
+    """Test suite for response compression"""
+
+    def test_large_json_is_compressed(self):
+        response = make_client().get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(json.dumps(LARGE)) / 5
+        assert response.json() == LARGE
+
+    def test_identity_when_not_accepted_or_small(self):
+        client = make_client()
+        plain = client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers and plain.headers["vary"] == "Accept-Encoding"
+        assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        assert "content-encoding" not in client.get("/pdf", headers={"Accept-Encoding": "gzip"}).headers
+        assert "content-encoding" not in client.head("/large", headers={"Accept-Encoding": "gzip"}).headers
+
+    def test_validators_adjusted_for_encoded_body(self):
+        response = make_client().get("/tagged", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["etag"] == 'W/"abc"'
+        assert "accept-ranges" not in response.headers
+        assert response.text == "x" * 2000
+
+    def test_streamed_body_is_compressed_incrementally(self):
+        response = make_client().get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == "".join(f"line {i}\n" * 20 for i in range(50))
+
+
+class TestCompressedApi:
+    """Test suite for compression and orjson on the API"""
+
+    def setup_method(self):
+        response_cache.clear()
+        self.client = TestClient(app)
+
+    def test_cached_endpoints_vary_by_encoding(self):
+        compressed = self.client.get("/schema", headers={"Accept-Encoding": "gzip"})
+        plain = self.client.get("/schema", headers={"Accept-Encoding": "identity"})
+        assert compressed.headers["content-encoding"] == "gzip" and "content-encoding" not in plain.headers
+        assert compressed.json() == plain.json()
+        assert compressed.headers["etag"] != plain.headers["etag"]
+
+        not_modified = self.client.get(
+            "/schema", headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == compressed.headers["etag"]
+        assert not_modified.headers["vary"] == "Accept-Encoding"
+
+    def test_graphql_responses_are_compressed_json(self):
+        response = self.client.post(
+            "/graphql",
+            json={"query": "{ __schema { types { name } } }"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["content-encoding"] == "gzip"
+        assert any(t["name"] == "Query" for t in response.json()["data"]["__schema"]["types"])
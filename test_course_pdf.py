@@ -0,0 +1,147 @@
+import glob
+import io
+import os
+import zipfile
+from fastapi.testclient import TestClient
+from main import app
+from config import settings
+from services.content_service import content_service
+from services.llm_providers import FakeProvider
+from services.llm_service import llm_service
+from services.storage_service import artifact_storage
+
+EDUCATE = """
+mutation {
+    educate(input: {topic: "Go", modules_count: 3, api_key: "key"}) {
+        ... on EducateResponse { topic_id %s }
+    }
+}
+"""
+
+
+class CoursePDFTestCase:
+    """Shared fixtures for stored-course PDF tests"""
+
+    def setup_method(self):
+        llm_service.set_providers([FakeProvider()])
+        self.client = TestClient(app)
+
+    def teardown_method(self):
+        for path in glob.glob(os.path.join(settings.PDF_DIRECTORY, "*", "course_*.pdf")):
+            os.remove(path)
+
+    def create_course(self, selection: str = "modules { title } quiz { total_questions }") -> str:
+        response = self.client.post("/graphql/", json={"query": EDUCATE % selection})
+        return response.json()["data"]["educate"]["topic_id"]
+
+    def download(self, topic_id: str, **headers):
+        return self.client.get(f"/api/v1/courses/{topic_id}/pdf", headers=headers)
+
+    def cached_files(self, topic_id: str):
+        return artifact_storage.list(f"course_{topic_id}_", key=topic_id)
+
+
+class TestCoursePDFDownload(CoursePDFTestCase):
+    """Test suite for on-demand course PDF downloads"""
+
+    def test_first_download_streams_and_caches(self):
+        topic_id = self.create_course()
+        response = self.download(topic_id)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.content.startswith(b"%PDF")
+        assert int(response.headers["content-length"]) == len(response.content)
+        assert response.headers["accept-ranges"] == "bytes"
+        assert len(self.cached_files(topic_id)) == 1
+
+        again = self.download(topic_id)
+        assert again.headers["etag"] == response.headers["etag"]
+        assert again.content == response.content
+
+    def test_conditional_get(self):
+        topic_id = self.create_course()
+        etag = self.download(topic_id).headers["etag"]
+        not_modified = self.download(topic_id, **{"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert self.download(topic_id, **{"If-None-Match": '"other"'}).status_code == 200
+
+    def test_range_requests(self):
+        topic_id = self.create_course()
+        # Not cached yet: the range is served once the PDF is rendered
+        partial = self.download(topic_id, Range="bytes=0-99")
+        assert partial.status_code == 206
+        assert len(partial.content) == 100
+        full = self.download(topic_id).content
+        assert partial.headers["content-range"] == f"bytes 0-99/{len(full)}"
+        assert partial.content == full[:100]
+
+        tail = self.download(topic_id, Range="bytes=-50")
+        assert tail.content == full[-50:]
+        resumed = self.download(topic_id, Range="bytes=100-")
+        assert partial.content + resumed.content == full
+
+        assert self.download(topic_id, Range=f"bytes={len(full)}-").status_code == 416
+        stale = self.download(topic_id, Range="bytes=0-99", **{"If-Range": '"stale"'})
+        assert stale.status_code == 200
+        assert stale.content == full
+
+    def test_changed_content_changes_etag_and_evicts_old_pdf(self):
+        topic_id = self.create_course()
+        first = self.download(topic_id)
+        # The fake provider is deterministic, so change the stored content directly
+        course = content_service.get_course(topic_id)
+        course["quiz"].questions[0].question = "A different question?"
+        content_service.store_course(topic_id, course)
+
+        second = self.download(topic_id, **{"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert second.headers["etag"] != first.headers["etag"]
+        assert len(self.cached_files(topic_id)) == 1
+
+    def test_unknown_and_incomplete_courses(self):
+        assert self.download("missing").status_code == 404
+        topic_id = self.create_course("syllabus { overview }")
+        assert self.download(topic_id).status_code == 409
+
+
+class TestCourseExport(CoursePDFTestCase):
+    """Test suite for exporting several course PDFs as one ZIP"""
+
+    def export(self, topic_ids):
+        return self.client.post("/api/v1/courses/export", json={"topic_ids": topic_ids})
+
+    def test_archive_contains_every_course(self):
+        topic_ids = [self.create_course() for _ in range(3)]
+        cached = self.download(topic_ids[0]).content
+
+        response = self.export(topic_ids + [topic_ids[0]])
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == ["01_Go.pdf", "02_Go.pdf", "03_Go.pdf"]
+        assert archive.read("01_Go.pdf") == cached
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+        # Rendered PDFs stay cached for later downloads and exports
+        assert all(len(self.cached_files(topic_id)) == 1 for topic_id in topic_ids)
+
+    def test_unknown_course_fails_before_streaming(self):
+        topic_id = self.create_course()
+        assert self.export([topic_id, "missing"]).status_code == 404
+        assert self.export([]).status_code == 422
+
+    def test_render_failures_listed_in_archive(self, monkeypatch):
+        import routes.courses as courses_module
+        topic_ids = [self.create_course() for _ in range(2)]
+        ensure = courses_module.ensure_course_pdf
+
+        async def flaky(topic_id, education_data):
+            if topic_id == topic_ids[1]:
+                raise RuntimeError("render failed")
+            return await ensure(topic_id, education_data)
+
+        monkeypatch.setattr(courses_module, "ensure_course_pdf", flaky)
+        archive = zipfile.ZipFile(io.BytesIO(self.export(topic_ids).content))
+        assert sorted(archive.namelist()) == ["01_Go.pdf", "errors.txt"]
+        assert archive.read("errors.txt").decode() == f"{topic_ids[1]}: render failed\n"
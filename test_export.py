@@ -0,0 +1,114 @@
+import io
+import shutil
+import tempfile
+import zipfile
+import xml.dom.minidom
+from fastapi.testclient import TestClient
+from main import app
+from services.export_service import EXPORT_FORMATS, get_renderer
+from services.llm_providers import FakeProvider
+from services.llm_service import llm_service
+from services.pdf_service import pdf_service
+from services.storage_service import ArtifactStorage
+
+EDUCATE = """
+mutation {
+    educate(input: {topic: "Rust & <Go>", modules_count: 3, api_key: "key"}) {
+        ... on EducateResponse { topic_id modules { title } quiz { total_questions } }
+    }
+}
+"""
+
+COURSE = {
+    "topic": "Rust & <Go>",
+    "provider_used": "fake",
+    "syllabus": {"topic": "Rust", "overview": "First.\n\nSecond <b>", "modules": [],
+                 "total_duration": "2 weeks", "learning_objectives": ["Ownership"]},
+    "modules": [{"title": "Borrowing", "description": "Refs", "content": "Body text",
+                 "key_points": ["No dangling"], "estimated_duration": "1 hour"}],
+    "quiz": {"questions": [{"question": "Q?", "options": ["Yes", "No"], "correct_answer": 1,
+                            "explanation": "Because"}],
+             "topic": "Rust", "difficulty": "easy", "total_questions": 1, "provider_used": "fake"},
+}
+
+
+class TestRenderers:
+    """Test suite for the export renderers"""
+
+    def test_html_escapes_content(self):
+        html = get_renderer("html").render(COURSE).decode()
+        assert "<title>Rust &amp; &lt;Go&gt;</title>" in html
+        assert "<p>First.</p>\n<p>Second &lt;b&gt;</p>" in html
+        assert '<li class="correct">No ✓</li>' in html
+
+    def test_markdown(self):
+        markdown = get_renderer("markdown").render(COURSE).decode()
+        assert markdown.startswith("# Rust & <Go>\n")
+        assert "## Module 1: Borrowing" in markdown
+        assert "- **B. No ✓**" in markdown
+
+    def test_epub_structure(self):
+        archive = zipfile.ZipFile(io.BytesIO(get_renderer("epub").render(COURSE)))
+        first = archive.infolist()[0]
+        assert (first.filename, first.compress_type) == ("mimetype", zipfile.ZIP_STORED)
+        assert archive.read("mimetype") == b"application/epub+zip"
+        assert "OEBPS/module-1.xhtml" in archive.namelist()
+        for name in archive.namelist():
+            if name.endswith((".xhtml", ".opf", ".xml")):
+                xml.dom.minidom.parseString(archive.read(name))
+
+    def test_epub_is_identical_for_identical_content(self):
+        renderer = get_renderer("epub")
+        package = zipfile.ZipFile(io.BytesIO(renderer.render(COURSE))).read("OEBPS/content.opf").decode()
+        assert "<meta property=\"dcterms:modified\">1980-01-01T00:00:00Z</meta>" in package
+        assert renderer.render(COURSE) == renderer.render(dict(COURSE))
+
+    def test_renderers_are_shared(self):
+        assert get_renderer("html") is get_renderer("html")
+        assert set(EXPORT_FORMATS) == {"pdf", "html", "markdown", "epub"}
+
+
+class TestExportEndpoints:
+    """Test suite for per-request export formats"""
+
+    def setup_method(self):
+        llm_service.set_providers([FakeProvider()])
+        # Rendered PDFs go to a scratch directory, not generated_pdfs/
+        self.storage = ArtifactStorage(tempfile.mkdtemp(prefix="edubot_artifacts_"))
+        self.original_storage = pdf_service.storage
+        pdf_service.storage = self.storage
+        self.client = TestClient(app)
+        response = self.client.post("/graphql/", json={"query": EDUCATE})
+        self.topic_id = response.json()["data"]["educate"]["topic_id"]
+
+    def teardown_method(self):
+        pdf_service.storage = self.original_storage
+        shutil.rmtree(self.storage.root, ignore_errors=True)
+
+    def export(self, format: str, **headers):
+        return self.client.get(f"/api/v1/courses/{self.topic_id}/export", params={"format": format},
+                               headers=headers)
+
+    def test_each_format(self):
+        expected = {"html": b"<!DOCTYPE html>", "markdown": b"# Rust", "epub": b"PK", "pdf": b"%PDF"}
+        for format, prefix in expected.items():
+            response = self.export(format)
+            assert response.status_code == 200
+            assert response.content.startswith(prefix)
+            assert response.headers["etag"]
+        assert self.export("html").headers["content-type"] == "text/html; charset=utf-8"
+        assert self.export("docx").status_code == 422
+
+    def test_conditional_get(self):
+        etag = self.export("markdown").headers["etag"]
+        assert self.export("markdown", **{"If-None-Match": etag}).status_code == 304
+        assert self.export("html", **{"If-None-Match": etag}).status_code == 200
+
+    def test_batch_export_in_another_format(self):
+        response = self.client.post("/api/v1/courses/export",
+                                    json={"topic_ids": [self.topic_id], "format": "markdown"})
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert archive.namelist() == ["01_Rust_Go.md"]
+        assert archive.read("01_Rust_Go.md") == self.export("markdown").content
+        bad = self.client.post("/api/v1/courses/export", json={"topic_ids": [self.topic_id], "format": "docx"})
+        assert bad.status_code == 422
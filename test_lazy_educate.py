@@ -0,0 +1,75 @@
+from fastapi.testclient import TestClient
+from main import app
+from services.llm_providers import FakeProvider
+from services.llm_service import llm_service
+
+
+class CountingProvider(FakeProvider):
+    """Fake provider that records the operation of every call"""
+
+    def __init__(self):
+        super().__init__()
+        self.operations = []
+
+    async def generate(self, request):
+        self.operations.append(request.operation)
+        return await super().generate(request)
+
+
+class TestLazyEducate:
+    """Test suite for selection-driven educate generation"""
+
+    def setup_method(self):
+        self.provider = CountingProvider()
+        llm_service.set_providers([self.provider])
+        self.client = TestClient(app)
+
+    def educate(self, selection: str, modules_count: int = 3):
+        query = """
+        mutation {
+            educate(input: {topic: "Rust", modules_count: %d, api_key: "key"}) {
+                %s
+                ... on Error { code message }
+            }
+        }
+        """ % (modules_count, selection)
+        response = self.client.post("/graphql/", json={"query": query})
+        assert response.status_code == 200
+        body = response.json()
+        assert "errors" not in body
+        return body["data"]["educate"]
+
+    def test_syllabus_only_skips_modules_and_quiz(self):
+        result = self.educate("... on EducateResponse { topic syllabus { overview } }")
+        assert result["syllabus"]["overview"]
+        assert self.provider.operations == ["syllabus"]
+
+    def test_quiz_only_skips_syllabus(self):
+        result = self.educate("... on EducateResponse { quiz { total_questions } }")
+        assert result["quiz"]["total_questions"] == 10
+        assert self.provider.operations == ["quiz"]
+
+    def test_full_selection_generates_everything(self):
+        result = self.educate("""
+            ... on EducateResponse {
+                provider_used
+                syllabus { overview }
+                modules { title }
+                quiz { difficulty }
+            }
+        """)
+        assert len(result["modules"]) == 3
+        assert result["quiz"]["difficulty"] == "MEDIUM"
+        assert sorted(self.provider.operations) == ["module"] * 3 + ["quiz", "syllabus"]
+        assert result["provider_used"] == "fake"
+
+    def test_fragment_spreads_are_followed(self):
+        query = """
+        mutation {
+            educate(input: {topic: "Rust", modules_count: 2, api_key: "key"}) { ...Course }
+        }
+        fragment Course on EducateResponse { modules { title } }
+        """
+        response = self.client.post("/graphql/", json={"query": query})
+        assert len(response.json()["data"]["educate"]["modules"]) == 2
+        assert sorted(self.provider.operations) == ["module", "module", "syllabus"]
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import types
+import httpx
+from config import settings
+from services.llm_providers import (
+    LLMProvider, LLMRequest, FakeProvider, GeminiProvider, OpenAIProvider, generation_config
+)
+from services.llm_router import ProviderRouter
+from services.llm_service import LLMService
+from services.content_service import ContentService
+import services.content_service as content_module
+from utils.exceptions import LLMProviderError, InvalidAPIKeyError
+
+
+class FailingProvider(LLMProvider):
+    """Provider that always errors, for exercising failover"""
+    name = "failing"
+
+    def __init__(self, error=LLMProviderError):
+        super().__init__("failing-model")
+        self.error = error
+        self.calls = 0
+
+    async def generate(self, request):
+        self.calls += 1
+        raise self.error("provider down")
+
+
+class UnavailableProvider(FailingProvider):
+    name = "unavailable"
+
+    def is_available(self, request):
+        return False
+
+
+class TestProviderRouter:
+    """Test suite for provider routing and failover"""
+
+    def test_fake_provider_serves_offline(self):
+        router = ProviderRouter([FakeProvider()])
+        response = asyncio.run(router.generate(LLMRequest(prompt="hello", operation="summarize")))
+        assert response.provider == "fake"
+        assert "summarize" in response.text
+
+    def test_fake_provider_is_deterministic(self):
+        router = ProviderRouter([FakeProvider()])
+        first = asyncio.run(router.generate(LLMRequest(prompt="same prompt")))
+        second = asyncio.run(router.generate(LLMRequest(prompt="same prompt")))
+        assert first.text == second.text
+
+    def test_failover_to_next_provider(self):
+        failing = FailingProvider()
+        router = ProviderRouter([failing, FakeProvider()])
+        response = asyncio.run(router.generate(LLMRequest(prompt="hello")))
+        assert response.provider == "fake"
+        assert failing.calls == 1
+        assert router.stats["failing"].error_rate > 0
+
+    def test_failed_provider_is_ranked_last(self):
+        failing = FailingProvider()
+        router = ProviderRouter([failing, FakeProvider()])
+        asyncio.run(router.generate(LLMRequest(prompt="hello")))
+        assert [p.name for p in router.rank(LLMRequest(prompt="x"))] == ["fake", "failing"]
+
+    def test_unavailable_providers_are_skipped(self):
+        router = ProviderRouter([UnavailableProvider(), FakeProvider()])
+        assert [p.name for p in router.rank(LLMRequest(prompt="x"))] == ["fake"]
+
+    def test_first_error_is_raised_when_all_fail(self):
+        router = ProviderRouter([FailingProvider(InvalidAPIKeyError)])
+        try:
+            asyncio.run(router.generate(LLMRequest(prompt="hello")))
+        except InvalidAPIKeyError:
+            pass
+        else:
+            raise AssertionError("expected InvalidAPIKeyError")
+
+    def test_invalid_key_does_not_fail_over(self):
+        rejecting = FailingProvider(InvalidAPIKeyError)
+        router = ProviderRouter([rejecting, FakeProvider()])
+        try:
+            asyncio.run(router.generate(LLMRequest(prompt="hello", api_key="bad-key")))
+        except InvalidAPIKeyError:
+            pass
+        else:
+            raise AssertionError("expected InvalidAPIKeyError")
+        assert rejecting.calls == 1
+        assert router.stats["fake"].calls == 0
+        assert router.stats["failing"].error_rate == 0
+
+    def test_gemini_request_errors_fail_over(self, monkeypatch):
+        from google.api_core import exceptions as google_errors
+
+        def failing_model(error):
+            class FailingModel:
+                def __init__(self, name):
+                    pass
+
+                def generate_content(self, prompt, generation_config=None):
+                    raise error
+            return FailingModel
+
+        import google.generativeai as genai
+        monkeypatch.setattr(genai, "configure", lambda api_key: None)
+        # Without cost in the score Gemini, listed first, is tried first
+        monkeypatch.setattr(settings, "ROUTER_COST_WEIGHT", 0)
+        monkeypatch.setattr(genai, "GenerativeModel", failing_model(
+            google_errors.InvalidArgument("Invalid value at 'generation_config.temperature'")))
+        router = ProviderRouter([GeminiProvider(), FakeProvider()])
+        response = asyncio.run(router.generate(LLMRequest(prompt="hello", api_key="key")))
+        assert response.provider == "fake"
+        assert router.stats["gemini"].error_rate > 0
+
+        for rejected in (google_errors.InvalidArgument("API key not valid. [reason: \"API_KEY_INVALID\"]"),
+                         google_errors.PermissionDenied("Permission denied on this API key")):
+            monkeypatch.setattr(genai, "GenerativeModel", failing_model(rejected))
+            try:
+                asyncio.run(GeminiProvider().generate(LLMRequest(prompt="hello", api_key="key")))
+            except InvalidAPIKeyError:
+                pass
+            else:
+                raise AssertionError(f"expected InvalidAPIKeyError for {rejected!r}")
+
+    def test_no_available_provider(self):
+        router = ProviderRouter([UnavailableProvider()])
+        try:
+            asyncio.run(router.generate(LLMRequest(prompt="hello")))
+        except InvalidAPIKeyError:
+            pass
+        else:
+            raise AssertionError("expected InvalidAPIKeyError")
+
+    def test_content_service_reports_serving_provider(self, monkeypatch):
+        monkeypatch.setattr(content_module, "llm_service", LLMService([FailingProvider(), FakeProvider()]))
+        result = asyncio.run(ContentService().summarize_text("Some text to summarize", "key", 50))
+        assert result.provider_used == "fake"
+
+
+class TestFakeProvider:
+    """Test suite for the offline fake provider"""
+
+    def test_canned_quiz_json_is_parsed(self, monkeypatch):
+        monkeypatch.setattr(content_module, "llm_service", LLMService([FakeProvider()]))
+        result = asyncio.run(ContentService().generate_quiz("Python", None, 7, "easy", "key"))
+        assert result.total_questions == 7
+        assert result.questions[0].question != "Question 1 about Python?"  # not the fallback
+
+    def test_canned_course_matches_modules_count(self, monkeypatch):
+        monkeypatch.setattr(content_module, "llm_service", LLMService([FakeProvider()]))
+        result = asyncio.run(ContentService().generate_education_content("GraphQL", 4, "key"))
+        assert len(result.syllabus.modules) == 4
+        assert len(result.modules) == 4
+        assert result.modules[0].estimated_duration == "2 hours"
+        assert result.provider_used == "fake"
+
+    def test_error_injection_is_seeded(self):
+        def outcomes():
+            provider = FakeProvider(error_rate=0.5, seed=7)
+            results = []
+            for _ in range(20):
+                try:
+                    asyncio.run(provider.generate(LLMRequest(prompt="x")))
+                    results.append(True)
+                except LLMProviderError:
+                    results.append(False)
+            return results
+
+        first = outcomes()
+        assert first == outcomes()
+        assert True in first and False in first
+
+    def test_latency_distributions(self):
+        for distribution in FakeProvider.LATENCY_DISTRIBUTIONS:
+            provider = FakeProvider(latency_distribution=distribution, latency_mean=0.2, latency_stddev=0.05)
+            samples = [provider.sample_latency() for _ in range(200)]
+            assert all(sample >= 0 for sample in samples)
+            assert 0.1 < sum(samples) / len(samples) < 0.3
+
+
+class RecordingProvider(FakeProvider):
+    """Fake provider that keeps every request it serves"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def generate(self, request):
+        self.requests.append(request)
+        return await super().generate(request)
+
+
+class TestGenerationProfiles:
+    """Test suite for per-operation generation settings"""
+
+    def test_caps_scale_with_requested_size(self):
+        short, long = generation_config("summarize", 50), generation_config("summarize", 500)
+        assert short.max_output_tokens < long.max_output_tokens
+        assert generation_config("quiz", 20).max_output_tokens > generation_config("quiz", 5).max_output_tokens
+        assert generation_config("explain").max_output_tokens == settings.DEFAULT_MAX_TOKENS
+        assert generation_config("generic").temperature == settings.DEFAULT_TEMPERATURE
+        assert generation_config("quiz", 10_000).max_output_tokens == settings.MAX_OUTPUT_TOKENS
+
+    def test_content_service_passes_sizes(self, monkeypatch):
+        provider = RecordingProvider()
+        monkeypatch.setattr(content_module, "llm_service", LLMService([provider]))
+        service = ContentService()
+        asyncio.run(service.summarize_text("Some text", "key", 50))
+        asyncio.run(service.generate_quiz("Python", None, 3, "easy", "key"))
+        summarize, quiz = provider.requests
+        assert summarize.generation == generation_config("summarize", 50)
+        assert quiz.generation == generation_config("quiz", 3)
+
+    def test_chat_payload_carries_generation_settings(self):
+        payloads = []
+
+        def handler(request):
+            payloads.append(json.loads(request.content))
+            return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+        provider = OpenAIProvider(transport=httpx.MockTransport(handler))
+        provider.api_key = "sk-test"
+        request = LLMRequest(prompt="hi", operation="summarize", generation=generation_config("summarize", 50))
+        asyncio.run(provider.generate(request))
+        assert payloads[0]["max_tokens"] == request.generation.max_output_tokens
+        assert payloads[0]["temperature"] == request.generation.temperature
+        assert "stop" not in payloads[0]
+
+    def test_gemini_receives_generation_config(self, monkeypatch):
+        calls = []
+
+        class FakeModel:
+            def __init__(self, name):
+                pass
+
+            def generate_content(self, prompt, generation_config=None):
+                calls.append(generation_config)
+                return types.SimpleNamespace(text="ok", usage_metadata=None)
+
+        import google.generativeai as genai
+        monkeypatch.setattr(genai, "configure", lambda api_key: None)
+        monkeypatch.setattr(genai, "GenerativeModel", FakeModel)
+        request = LLMRequest(prompt="hi", api_key="key", operation="quiz", generation=generation_config("quiz", 4))
+        asyncio.run(GeminiProvider().generate(request))
+        assert calls == [{"max_output_tokens": request.generation.max_output_tokens,
+                          "temperature": request.generation.temperature}]
@@ -0,0 +1,70 @@
+import asyncio
+from fastapi.testclient import TestClient
+from main import app
+from services.llm_providers import FakeProvider
+from services.llm_service import llm_service
+from utils.metrics import MetricsRegistry, LLM_REQUESTS_TOTAL
+
+
+class TestMetricsRegistry:
+    """Test suite for the Prometheus text exposition"""
+
+    def test_counter_render(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("test_total", "A counter", ["kind"])
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        output = registry.render()
+        assert "# TYPE test_total counter" in output
+        assert 'test_total{kind="a"} 3.0' in output
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "A histogram", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+        output = registry.render()
+        assert 'test_seconds_bucket{le="0.1"} 1.0' in output
+        assert 'test_seconds_bucket{le="1.0"} 3.0' in output
+        assert 'test_seconds_bucket{le="+Inf"} 4.0' in output
+        assert "test_seconds_count 4.0" in output
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("test_total", "A counter", ["name"]).inc(name='a"b\\c')
+        assert 'test_total{name="a\\"b\\\\c"} 1.0' in registry.render()
+
+    def test_gauge_function(self):
+        registry = MetricsRegistry()
+        gauge = registry.gauge("test_bytes", "A gauge", ["dir"])
+        gauge.set_function(lambda: {("pdfs",): 42})
+        assert 'test_bytes{dir="pdfs"} 42.0' in registry.render()
+
+
+class TestMetricsEndpoint:
+    """Test suite for the /metrics endpoint"""
+
+    def setup_method(self):
+        llm_service.set_providers([FakeProvider()])
+        self.client = TestClient(app)
+
+    def test_llm_and_graphql_metrics_exported(self):
+        before = LLM_REQUESTS_TOTAL.value(provider="fake", model="fake-model",
+                                          operation="summarize", outcome="success")
+        query = """
+        mutation SummarizeForMetrics {
+            summarize(input: {text: "Some text", api_key: "key"}) {
+                ... on SummarizeResponse { summary }
+            }
+        }
+        """
+        response = self.client.post("/graphql/", json={"query": query})
+        assert response.status_code == 200
+        assert LLM_REQUESTS_TOTAL.value(provider="fake", model="fake-model",
+                                        operation="summarize", outcome="success") == before + 1
+
+        metrics = self.client.get("/metrics")
+        assert metrics.status_code == 200
+        assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'operation_name="SummarizeForMetrics"' in metrics.text
+        assert 'edubot_content_operations_total{operation="summarize",outcome="success"}' in metrics.text
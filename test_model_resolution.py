@@ -0,0 +1,82 @@
+import asyncio
+from fastapi.testclient import TestClient
+from main import app
+from resolvers.mutation_resolvers import resolve_result_type
+from schemas import EducateResponse, ErrorResult, ExplainResponse, QuizResponse
+from services.content_service import ContentService, content_service, course_response
+from services.llm_providers import FakeProvider
+from services.llm_service import llm_service
+
+
+class TestModelResolution:
+    """Test suite for resolving GraphQL results straight from pydantic models"""
+
+    def setup_method(self):
+        llm_service.set_providers([FakeProvider()])
+        self.client = TestClient(app)
+
+    def execute(self, query: str):
+        response = self.client.post("/graphql/", json={"query": query})
+        assert response.status_code == 200
+        body = response.json()
+        assert "errors" not in body, body
+        return body["data"]
+
+    def test_union_members_resolved_by_model_class(self):
+        assert resolve_result_type(ExplainResponse(explanation="e", concept="c", level="beginner")) == "ExplainResponse"
+        assert resolve_result_type(EducateResponse.model_construct(topic="t")) == "EducateResponse"
+        assert resolve_result_type(ErrorResult(code="NOT_FOUND", message="m")) == "Error"
+
+    def test_enums_map_to_service_values(self):
+        data = self.execute("""
+        mutation {
+            explain(input: {concept: "Closures", level: ADVANCED, api_key: "key"}) {
+                __typename ... on ExplainResponse { level }
+            }
+            generateQuiz(input: {topic: "Rust", num_questions: 2, difficulty: HARD, api_key: "key"}) {
+                __typename ... on QuizResponse { difficulty total_questions questions { options } }
+            }
+        }
+        """)
+        assert data["explain"] == {"__typename": "ExplainResponse", "level": "ADVANCED"}
+        assert data["generateQuiz"]["__typename"] == "QuizResponse"
+        assert data["generateQuiz"]["difficulty"] == "HARD"
+        assert len(data["generateQuiz"]["questions"]) == 2
+
+    def test_results_are_not_copied(self):
+        quiz = QuizResponse(questions=[], topic="t", difficulty="easy", total_questions=0)
+        course = course_response("id", "t", None, [], quiz, "fake")
+        assert isinstance(course, EducateResponse)
+        assert course.quiz is quiz and course.syllabus is None and course.pdf_url is None
+
+    def test_service_generates_only_the_requested_parts(self):
+        result = asyncio.run(ContentService().generate_education_content("Rust", 3, "key", parts={"quiz"}))
+        assert result.quiz is not None and result.syllabus is None and result.modules is None
+        assert content_service.get_topic(result.topic_id)["topic"] == "Rust"
+
+    def test_errors_are_typed(self):
+        data = self.execute("""
+        mutation {
+            regenerateQuiz(input: {topic_id: "missing", api_key: "key"}) {
+                __typename ... on Error { code details }
+            }
+        }
+        """)
+        assert data["regenerateQuiz"] == {"__typename": "Error", "code": "NOT_FOUND", "details": None}
+
+    def test_educate_then_regenerate_from_stored_models(self):
+        topic_id = self.execute("""
+        mutation { educate(input: {topic: "Rust", modules_count: 3, api_key: "key"}) {
+            ... on EducateResponse { topic_id modules { title } quiz { difficulty } }
+        } }
+        """)["educate"]["topic_id"]
+        data = self.execute("""
+        mutation { regenerateQuiz(input: {topic_id: "%s", api_key: "key"}) {
+            ... on EducateResponse { topic_id provider_used modules { title } quiz { difficulty total_questions } }
+        } }
+        """ % topic_id)
+        assert data["regenerateQuiz"]["topic_id"] == topic_id
+        assert len(data["regenerateQuiz"]["modules"]) == 3
+        assert data["regenerateQuiz"]["quiz"]["difficulty"] == "MEDIUM"
+        assert content_service.get_course(topic_id)["quiz"].difficulty == "medium"
+
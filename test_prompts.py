@@ -0,0 +1,54 @@
+import pytest
+from services.prompts import PromptTemplate, compact, estimate_tokens, prompts, EXPLAIN, QUIZ, SUMMARIZE
+from utils.metrics import PROMPT_TOKENS
+
+
+class TestPromptTemplates:
+    """Test suite for the compiled prompt registry"""
+
+    def test_compact_strips_indentation_and_blank_lines(self):
+        assert compact("""
+            First line
+
+              Second line   
+            """) == "First line\nSecond line"
+
+    def test_rendered_prompts_have_no_leading_whitespace(self):
+        rendered = QUIZ.render("hard", num_questions=3, content_source="Topic: Rust")
+        lines = rendered.prompt.splitlines()
+        assert lines[0] == "Create 3 multiple-choice questions based on the following:"
+        assert all(line == line.strip() and line for line in lines)
+        assert "synthesis and evaluation" in rendered.system_prompt
+        assert "Questions should test synthesis and evaluation" in rendered.prompt
+
+    def test_variants_are_precomputed(self):
+        assert EXPLAIN.variants == ["beginner", "intermediate", "advanced"]
+        rendered = EXPLAIN.render("beginner", concept="Recursion")
+        assert rendered.system_prompt.startswith("You are an expert educator. Explain concepts clearly at the beginner level.")
+        with pytest.raises(KeyError):
+            EXPLAIN.render("expert", concept="Recursion")
+
+    def test_user_values_are_not_reinterpreted(self):
+        text = "Costs $5 {per} $item\n    indented"
+        rendered = SUMMARIZE.render(text=text, max_length=50)
+        assert f"Text: {text}" in rendered.prompt
+
+    def test_token_estimates_are_recorded(self):
+        before = PROMPT_TOKENS.count(operation="summarize")
+        rendered = SUMMARIZE.render(text="hello", max_length=50)
+        assert PROMPT_TOKENS.count(operation="summarize") == before + 1
+        assert rendered.estimated_tokens == (estimate_tokens(rendered.system_prompt)
+                                             + estimate_tokens(rendered.prompt))
+
+    def test_compiled_prompts_are_smaller(self):
+        for template in prompts:
+            for variant in template.variants:
+                values = {"text": "t", "max_length": 1, "concept": "c", "num_questions": 1,
+                          "content_source": "s", "topic": "t", "modules_count": 1,
+                          "module_title": "m", "module_description": "d"}
+                assert (template.render(variant, **values).estimated_tokens
+                        < template.render_uncompacted(variant, **values).estimated_tokens)
+
+    def test_duplicate_registration_rejected(self):
+        with pytest.raises(ValueError):
+            prompts.register(PromptTemplate("summarize", "system", "body"))
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+from fastapi.testclient import TestClient
+from main import app
+from services.content_service import content_service
+from services.pdf_service import pdf_service
+from services.storage_service import ArtifactStorage
+from test_lazy_educate import CountingProvider
+from services.llm_service import llm_service
+
+COURSE_FIELDS = """
+    ... on EducateResponse {
+        topic_id
+        provider_used
+        pdf_url
+        modules { title content }
+        quiz { total_questions difficulty }
+    }
+    ... on Error { code message }
+"""
+
+
+class TestCourseRegeneration:
+    """Test suite for regenerating single parts of a stored course"""
+
+    def setup_method(self):
+        self.provider = CountingProvider()
+        llm_service.set_providers([self.provider])
+        # Rendered PDFs go to a scratch directory, not generated_pdfs/
+        self.storage = ArtifactStorage(tempfile.mkdtemp(prefix="edubot_artifacts_"))
+        self.original_storage = pdf_service.storage
+        pdf_service.storage = self.storage
+        self.client = TestClient(app)
+
+    def teardown_method(self):
+        pdf_service.storage = self.original_storage
+        shutil.rmtree(self.storage.root, ignore_errors=True)
+
+    def mutate(self, field: str, arguments: str):
+        query = "mutation { %s(input: {%s}) { %s } }" % (field, arguments, COURSE_FIELDS)
+        response = self.client.post("/graphql/", json={"query": query})
+        assert response.status_code == 200
+        body = response.json()
+        assert "errors" not in body
+        return body["data"][field]
+
+    def create_course(self, include_pdf: str = "false"):
+        course = self.mutate(
+            "educate", f'topic: "Go", modules_count: 3, api_key: "key", include_pdf: {include_pdf}'
+        )
+        self.provider.operations.clear()
+        return course
+
+    def test_regenerate_module_makes_one_call(self):
+        course = self.create_course()
+        result = self.mutate(
+            "regenerateModule", f'topic_id: "{course["topic_id"]}", module_index: 1, api_key: "key"'
+        )
+        assert self.provider.operations == ["module"]
+        assert result["topic_id"] == course["topic_id"]
+        assert [m["title"] for m in result["modules"]] == [m["title"] for m in course["modules"]]
+        assert result["quiz"] == course["quiz"]
+
+    def test_regenerate_quiz_makes_one_call(self):
+        course = self.create_course()
+        result = self.mutate("regenerateQuiz", f'topic_id: "{course["topic_id"]}", api_key: "key"')
+        assert self.provider.operations == ["quiz"]
+        assert result["quiz"] == {"total_questions": 10, "difficulty": "MEDIUM"}
+        assert result["modules"] == course["modules"]
+
+    def test_cached_pdf_is_replaced(self):
+        course = self.create_course(include_pdf="true")
+        old_pdf = self.storage.path(os.path.basename(course["pdf_url"]))
+        assert os.path.exists(old_pdf)
+
+        result = self.mutate("regenerateQuiz", f'topic_id: "{course["topic_id"]}", api_key: "key"')
+        new_pdf = self.storage.path(os.path.basename(result["pdf_url"]))
+        assert new_pdf != old_pdf
+        assert os.path.exists(new_pdf)
+        assert not os.path.exists(old_pdf)
+        assert content_service.get_course(course["topic_id"])["pdf_path"] == new_pdf
+
+    def test_unknown_topic_and_bad_index(self):
+        missing = self.mutate("regenerateQuiz", 'topic_id: "missing", api_key: "key"')
+        assert missing["code"] == "NOT_FOUND"
+
+        course = self.create_course()
+        bad_index = self.mutate(
+            "regenerateModule", f'topic_id: "{course["topic_id"]}", module_index: 3, api_key: "key"'
+        )
+        assert bad_index["code"] == "VALIDATION_ERROR"
+        assert self.provider.operations == []
@@ -0,0 +1,148 @@
+import asyncio
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from main import app, prime_response_cache
+from services.content_service import content_service
+from utils.response_cache import ResponseCache, ResponseCacheMiddleware, max_age_of, response_cache
+
+TOPICS_QUERY = "query { topics { total topics { id topic } } }"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache:
+    """Test suite for the in-memory response cache"""
+
+    def test_expiry_and_lru_eviction(self):
+        clock = FakeClock()
+        cache = ResponseCache(max_entries=2, clock=clock)
+        cache.put("/a", b"", 200, [], b"a", 10, "no-cache")
+        cache.put("/b", b"", 200, [], b"b", 0, "no-cache")
+        clock.now += 11
+        assert cache.get("/a") is None
+        assert cache.get("/b").body == b"b"
+
+        cache.put("/c", b"x=1", 200, [], b"c", 0, "no-cache")
+        cache.get("/b")
+        cache.put("/d", b"", 200, [], b"d", 0, "no-cache")
+        assert cache.get("/c", b"x=1") is None and len(cache) == 2
+
+    def test_strong_etag_depends_only_on_body(self):
+        cache = ResponseCache()
+        first = cache.put("/a", b"", 200, [(b"date", b"now")], b"same", 0, "no-cache")
+        second = cache.put("/b", b"", 200, [], b"same", 0, "no-cache")
+        assert first.etag == second.etag and not first.etag.startswith("W/")
+        assert first.headers == []
+
+    def test_max_age_of(self):
+        assert max_age_of("public, max-age=60") == 60
+        assert max_age_of("public, s-maxage=5, max-age=60") == 60
+        assert max_age_of("no-cache") == 0
+        assert max_age_of("private, max-age=60") == 0
+        assert max_age_of("") == 0
+
+    def test_middleware_skips_uncacheable_responses(self):
+        calls = []
+        inner = FastAPI()
+
+        @inner.get("/static")
+        async def static():
+            calls.append("static")
+            return {"ok": True}
+
+        @inner.get("/graphql")
+        async def graphql(query: str):
+            calls.append(query)
+            return {"query": query}
+
+        client = TestClient(ResponseCacheMiddleware(inner, cache=ResponseCache(), paths={"/static": 0}))
+        for _ in range(3):
+            assert client.get("/static").json() == {"ok": True}
+            assert client.get("/graphql", params={"query": "q"}).status_code == 200
+        # No Cache-Control on the GraphQL response: run every time
+        assert calls == ["static", "q", "q", "q"]
+
+
+class TestCachedEndpoints:
+    """Test suite for ETags and GraphQL GET caching on the API"""
+
+    def setup_method(self):
+        response_cache.clear()
+        self.client = TestClient(app)
+
+    def test_static_endpoints_answer_if_none_match(self):
+        for path in ("/", "/docs-info", "/schema"):
+            first = self.client.get(path)
+            second = self.client.get(path)
+            etag = first.headers["etag"]
+            assert first.status_code == 200 and first.content == second.content
+            assert second.headers["etag"] == etag and first.headers["cache-control"] == "no-cache"
+
+            not_modified = self.client.get(path, headers={"If-None-Match": etag})
+            assert not_modified.status_code == 304 and not_modified.content == b""
+            assert not_modified.headers["etag"] == etag
+            assert self.client.get(path, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_cached_responses_keep_trace_ids_per_request(self):
+        first = self.client.get("/schema")
+        second = self.client.get("/schema")
+        assert first.headers["x-trace-id"] != second.headers["x-trace-id"]
+
+    def test_graphql_get_query_is_cacheable(self):
+        response = self.client.get("/graphql", params={"query": "{ apiInfo { name version } }"})
+        assert response.status_code == 200
+        assert response.json()["data"]["apiInfo"]["version"]
+        assert response.headers["cache-control"] == "public, max-age=3600"
+        etag = response.headers["etag"]
+        repeat = self.client.get(
+            "/graphql", params={"query": "{ apiInfo { name version } }"}, headers={"If-None-Match": etag}
+        )
+        assert repeat.status_code == 304
+
+        # Shortest max-age of the selected fields wins
+        mixed = self.client.get("/graphql", params={"query": "{ apiInfo { name } topics { total } }"})
+        assert mixed.headers["cache-control"] == "public, max-age=5"
+
+    def test_graphql_get_with_variables(self):
+        response = self.client.get("/graphql", params={
+            "query": "query Topic($id: ID!) { topic(id: $id) { id } }",
+            "operationName": "Topic",
+            "variables": json.dumps({"id": "missing"}),
+        })
+        assert response.status_code == 200
+        assert response.json() == {"data": {"topic": None}}
+        assert self.client.get("/graphql", params={"query": "{ topics {", }).status_code == 400
+        assert self.client.get("/graphql", params={"query": "{ apiInfo { name } }", "variables": "{"}).status_code == 400
+
+    def test_graphql_get_rejects_mutations(self):
+        response = self.client.get("/graphql", params={
+            "query": 'mutation { summarize(input: {text: "x", api_key: "k"}) { __typename } }'
+        })
+        assert response.status_code == 405
+        assert response.headers["allow"] == "POST"
+        assert "etag" not in response.headers
+
+    def test_saving_a_topic_invalidates_cached_queries(self):
+        before = self.client.get("/graphql", params={"query": TOPICS_QUERY}).json()["data"]["topics"]["total"]
+        assert self.client.get("/graphql", params={"query": TOPICS_QUERY}).json()["data"]["topics"]["total"] == before
+
+        content_service.save_topic("Response caching", 1, {"syllabus": "fake"})
+        after = self.client.get("/graphql", params={"query": TOPICS_QUERY}).json()["data"]["topics"]["total"]
+        assert after == before + 1
+
+    def test_explorer_still_served_without_query(self):
+        response = self.client.get("/graphql", headers={"Accept": "text/html"})
+        assert response.status_code == 200 and "text/html" in response.headers["content-type"]
+        assert "etag" not in response.headers
+
+    def test_startup_primes_static_endpoints(self):
+        asyncio.run(prime_response_cache())
+        assert response_cache.get("/schema") is not None
+        assert response_cache.get("/health") is None
@@ -0,0 +1,73 @@
+import asyncio
+from config import settings
+from services.content_service import ContentService
+from services.llm_service import LLMService
+from services.semantic_cache import SemanticCache, explain_cache, normalise
+from test_lazy_educate import CountingProvider
+import services.content_service as content_module
+
+
+class TestSemanticCache:
+    """Test suite for the near-duplicate explain cache"""
+
+    def test_normalise_drops_case_punctuation_and_filler(self):
+        assert normalise("What is Photosynthesis?") == "photosynthesis"
+        assert normalise("Photosynthesis explained") == "photosynthesis"
+        assert normalise("what is") == "what is"
+
+    def test_normalise_keeps_numerals_letters_and_symbols(self):
+        assert normalise("What is World War II?") == "world war ii"
+        assert normalise("World War I") == "world war i"
+        assert normalise("Explain C++") == "c++"
+        assert normalise("C#") == "c#"
+        assert normalise("Vitamin A") == "vitamin a"
+
+    def test_near_duplicates_hit_and_different_concepts_miss(self):
+        cache = SemanticCache("test", threshold=0.8, max_entries=10)
+        cache.put("beginner", "Photosynthesis in plants", "answer")
+        assert cache.get("beginner", "photosynthesis in plant") == "answer"
+        assert cache.get("beginner", "Explain photosynthesis, in plants!") == "answer"
+        assert cache.get("beginner", "Cellular respiration") is None
+        assert cache.get("advanced", "Photosynthesis in plants") is None
+
+    def test_similar_but_distinct_concepts_stay_apart(self):
+        cache = SemanticCache("test", threshold=0.85, max_entries=10)
+        cache.put("beginner", "Java", "java")
+        assert cache.get("beginner", "JavaScript") is None
+
+    def test_near_miss_concepts_are_not_served_for_each_other(self):
+        pairs = [("World War I", "World War II"), ("World War II", "World War III"), ("C", "C++"),
+                 ("C", "C#"), ("C++", "C#"), ("Python 2", "Python 3"), ("Vitamin A", "Vitamin B")]
+        for cached, asked in pairs:
+            cache = SemanticCache("test", max_entries=10)
+            cache.put("beginner", cached, cached)
+            assert cache.get("beginner", asked) is None, (cached, asked)
+            cache.put("beginner", asked, asked)
+            assert cache.get("beginner", cached) == cached
+            assert cache.get("beginner", f"What is {asked}?") == asked
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = SemanticCache("test", threshold=0.9, max_entries=2)
+        cache.put("beginner", "gravity", 1)
+        cache.put("beginner", "magnetism", 2)
+        cache.get("beginner", "gravity")
+        cache.put("beginner", "entropy", 3)
+        assert cache.get("beginner", "magnetism") is None
+        assert cache.get("beginner", "gravity") == 1
+        assert len(cache) == 2
+        assert "agn" not in "".join(cache._index["beginner"])
+
+    def test_explain_reuses_cached_explanations(self, monkeypatch):
+        provider = CountingProvider()
+        monkeypatch.setattr(content_module, "llm_service", LLMService([provider]))
+        monkeypatch.setattr(settings, "EXPLAIN_CACHE_ENABLED", True)
+        explain_cache.clear()
+        service = ContentService()
+
+        first = asyncio.run(service.explain_concept("photosynthesis", "beginner", "key"))
+        second = asyncio.run(service.explain_concept("What is photosynthesis?", "beginner", "key"))
+        asyncio.run(service.explain_concept("photosynthesis", "advanced", "key"))
+        assert provider.operations == ["explain", "explain"]
+        assert second.explanation == first.explanation
+        assert second.concept == "What is photosynthesis?"
+        explain_cache.clear()
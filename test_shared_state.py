@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from config import settings
+from services.llm_service import build_rate_limiter
+from services.semantic_cache import SemanticCache
+from utils.kv_store import MemoryKVStore, SQLiteKVStore, StoreMapping
+from utils.rate_limit import SharedTokenBucket
+
+
+class TestSharedState:
+    """Test suite for state shared between worker processes through the store"""
+
+    def test_store_mapping_behaves_like_a_dict(self):
+        mapping = StoreMapping(MemoryKVStore(), "topics")
+        mapping["a"] = {"id": "a"}
+        mapping["b"] = {"id": "b"}
+        assert mapping["a"] == {"id": "a"}
+        assert mapping.get("missing") is None
+        assert "a" in mapping and "missing" not in mapping
+        assert len(mapping) == 2
+        assert sorted(mapping) == ["a", "b"]
+        assert [v["id"] for v in sorted(mapping.values(), key=lambda v: v["id"])] == ["a", "b"]
+        del mapping["a"]
+        assert list(mapping.items()) == [("b", {"id": "b"})]
+        mapping.clear()
+        assert len(mapping) == 0
+
+    def test_sqlite_update_is_atomic_read_modify_write(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        first, second = SQLiteKVStore(path), SQLiteKVStore(path)
+        for _ in range(5):
+            first.update("counters", "hits", lambda v: (v or 0) + 1)
+            second.update("counters", "hits", lambda v: (v or 0) + 1)
+        assert first.get("counters", "hits") == 10
+
+    def test_shared_token_bucket_limits_all_holders(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        now = [1000.0]
+        buckets = [SharedTokenBucket(SQLiteKVStore(path), "llm", rate=1, burst=2, clock=lambda: now[0])
+                   for _ in range(2)]
+        assert [b.try_acquire() for b in buckets + buckets] == [True, True, False, False]
+        now[0] += 1
+        assert buckets[1].try_acquire()
+        assert not buckets[0].try_acquire()
+
+    def test_shared_token_bucket_updates_off_the_event_loop(self, tmp_path):
+        store = SQLiteKVStore(str(tmp_path / "state.db"))
+        threads = []
+        update = store.update
+        store.update = lambda *args: threads.append(threading.current_thread()) or update(*args)
+        bucket = SharedTokenBucket(store, "llm", rate=1, burst=1)
+        asyncio.run(bucket.acquire())
+        assert threads and threading.main_thread() not in threads
+
+    def test_rate_override_keeps_the_shared_bucket(self, monkeypatch):
+        monkeypatch.setattr(settings, "STORE_BACKEND", "sqlite")
+        limiter = build_rate_limiter(2)
+        assert isinstance(limiter, SharedTokenBucket)
+        assert (limiter.name, limiter.rate) == ("llm", 2)
+        assert build_rate_limiter(0) is None
+
+    def test_semantic_cache_shares_exact_matches(self, tmp_path):
+        shared = SQLiteKVStore(str(tmp_path / "state.db"))
+        worker_a = SemanticCache("explain", shared=shared)
+        worker_b = SemanticCache("explain", shared=SQLiteKVStore(str(tmp_path / "state.db")))
+        worker_a.put("beginner", "Photosynthesis in plants", {"explanation": "light"})
+        assert worker_b.get("beginner", "what is photosynthesis in plants?") == {"explanation": "light"}
+        # Near duplicates match once the entry is in the worker's own index
+        assert worker_b.get("beginner", "photosynthesis in plant") == {"explanation": "light"}
+        assert worker_b.get("advanced", "Photosynthesis in plants") is None
+        worker_a.clear()
+        assert SemanticCache("explain", shared=shared).get("beginner", "Photosynthesis in plants") is None
@@ -0,0 +1,25 @@
+import asyncio
+import json
+from benchmarks.startup import LAZY_MODULES, run_probe
+
+
+class TestStartup:
+    """Test suite for application import cost"""
+
+    def test_import_main_from_any_directory_without_heavy_sdks(self, tmp_path):
+        output = run_probe(str(tmp_path)).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        assert result["loaded"] == [], f"imported eagerly: {result['loaded']} (lazy: {LAZY_MODULES})"
+
+    def test_failed_preload_is_logged(self, monkeypatch, caplog):
+        import main
+        monkeypatch.setattr(main, "PRELOAD_MODULES", ("edubot_no_such_module",))
+        monkeypatch.setattr(main.settings, "PRELOAD_MODULES_ON_STARTUP", True)
+
+        async def run():
+            await main.preload_heavy_modules()
+            await asyncio.gather(*main.app.state.preload_futures, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        assert "Preloading edubot_no_such_module failed" in caplog.text
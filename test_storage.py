@@ -0,0 +1,131 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from fastapi.testclient import TestClient
+from main import app
+from services.storage_service import ArtifactStorage, artifact_storage
+from utils.metrics import ARTIFACT_BYTES, ARTIFACT_FILES
+
+
+class TestArtifactStorage:
+    """Test suite for sharded artifact storage and its janitor"""
+
+    def setup_method(self):
+        self.root = tempfile.mkdtemp(prefix="edubot_artifacts_")
+        self.storage = ArtifactStorage(self.root)
+
+    def teardown_method(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write(self, name: str, size: int, age: float = 0, key: str = None) -> str:
+        path = self.storage.path(name, key)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_paths_are_sharded(self):
+        path = self.storage.path("edubot_1.pdf")
+        shard = os.path.basename(os.path.dirname(path))
+        assert len(shard) == 2 and os.path.dirname(os.path.dirname(path)) == self.root
+        assert os.path.isdir(os.path.dirname(path))
+        assert self.storage.path("edubot_1.pdf") == path
+        # Files sharing a key share a directory
+        a = self.storage.path("course_t1_a.pdf", key="t1")
+        b = self.storage.path("course_t1_b.pdf", key="t1")
+        assert os.path.dirname(a) == os.path.dirname(b)
+
+    def test_invalid_names(self):
+        for name in ("", ".", "..", "../etc/passwd", "a/b.pdf"):
+            try:
+                self.storage.path(name)
+            except ValueError:
+                continue
+            raise AssertionError(f"accepted {name!r}")
+
+    def test_atomic_write(self):
+        path = self.storage.path("course_t1_a.pdf", key="t1")
+
+        async def write(fail: bool):
+            async with self.storage.open_atomic(path) as f:
+                await f.write(b"partial")
+                assert not os.path.exists(path)
+                if fail:
+                    raise RuntimeError("interrupted")
+
+        try:
+            asyncio.run(write(fail=True))
+        except RuntimeError:
+            pass
+        assert os.listdir(os.path.dirname(path)) == []
+
+        asyncio.run(write(fail=False))
+        with open(path, "rb") as f:
+            assert f.read() == b"partial"
+        assert self.storage.list("course_t1_", key="t1") == [path]
+
+    def test_find_includes_legacy_files(self):
+        with open(os.path.join(self.root, "old.pdf"), "wb") as f:
+            f.write(b"old")
+        sharded = self.write("new.pdf", 3)
+        assert asyncio.run(self.storage.find("new.pdf")) == sharded
+        assert asyncio.run(self.storage.find("old.pdf")) == os.path.join(self.root, "old.pdf")
+        assert asyncio.run(self.storage.find("missing.pdf")) is None
+        assert asyncio.run(self.storage.find("..")) is None
+
+    def test_sweep_removes_expired_and_stale_partials(self):
+        fresh = self.write("fresh.pdf", 10)
+        expired = self.write("expired.pdf", 10, age=100)
+        stale_partial = self.write("x.pdf.1234.part", 10, age=100)
+        live_partial = self.write("y.pdf.1234.part", 10)
+
+        result = self.storage.sweep(max_age=50, max_total_bytes=0, partial_max_age=50)
+        assert (result.deleted_expired, result.deleted_partial, result.deleted_over_quota) == (1, 1, 0)
+        assert os.path.exists(fresh) and os.path.exists(live_partial)
+        assert not os.path.exists(expired) and not os.path.exists(stale_partial)
+        assert (result.files, result.bytes) == (2, 20)
+        assert (ARTIFACT_FILES.value(), ARTIFACT_BYTES.value()) == (2, 20)
+
+    def test_sweep_enforces_quota_oldest_first(self):
+        paths = [self.write(f"edubot_{i}.pdf", 100, age=10 - i) for i in range(5)]
+        result = self.storage.sweep(max_age=0, max_total_bytes=250, partial_max_age=3600)
+        assert result.deleted_over_quota == 3
+        assert (result.files, result.bytes) == (2, 200)
+        assert [os.path.exists(path) for path in paths] == [False, False, False, True, True]
+
+    def test_janitor_runs_until_cancelled(self):
+        expired = self.write("expired.pdf", 10, age=10 ** 9)
+
+        async def run():
+            task = asyncio.create_task(self.storage.run_janitor(interval=0.01))
+            await asyncio.sleep(0.1)
+            task.cancel()
+
+        asyncio.run(run())
+        assert not os.path.exists(expired)
+
+
+class TestDownloadRoute:
+    """Test suite for downloads of sharded PDFs"""
+
+    def test_download_sharded_pdf(self):
+        path = artifact_storage.path("edubot_test_download.pdf")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-test")
+        try:
+            client = TestClient(app)
+            response = client.get("/api/v1/download/pdf/edubot_test_download.pdf")
+            assert response.status_code == 200
+            assert response.content == b"%PDF-test"
+            assert client.get("/api/v1/download/pdf/missing.pdf").status_code == 404
+            assert client.get("/api/v1/download/pdf/..").status_code == 404
+        finally:
+            os.remove(path)
+
+    def test_disk_metrics_exposed(self):
+        body = TestClient(app).get("/metrics").text
+        assert "edubot_artifact_disk_free_bytes " in body
+        assert "# TYPE edubot_artifact_bytes gauge" in body
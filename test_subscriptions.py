@@ -0,0 +1,173 @@
+import asyncio
+import pytest
+from ariadne.asgi import GraphQL
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from config import settings
+from main import app, schema
+from services.broadcast_service import BroadcastHub, broadcast_hub
+from utils.graphql_ws import EduBotWebsocketHandler
+
+QUERY = 'subscription { contentGeneration(topic: "%s") { step progress completed } }'
+
+
+async def counting_producer(started: list, count: int = 5, final_at: int = None):
+    started.append(1)
+    for i in range(count):
+        yield {"progress": i, "final": i == final_at}
+        await asyncio.sleep(0)
+
+
+class TestBroadcastHub:
+    """Test suite for sharing one upstream stream between subscribers"""
+
+    def test_subscribers_share_one_upstream(self):
+        async def run():
+            hub, started = BroadcastHub(max_queue=10), []
+            first = hub.subscribe("job", lambda: counting_producer(started))
+            second = hub.subscribe("job", lambda: counting_producer(started))
+            assert hub.subscriber_count("job") == 2 and hub.stream_count() == 1
+            received = [[event["progress"] async for event in s] for s in (first, second)]
+            return started, received, hub.stream_count()
+
+        started, received, streams = asyncio.run(run())
+        assert started == [1]
+        assert received == [[0, 1, 2, 3, 4], [0, 1, 2, 3, 4]]
+        assert streams == 0
+
+    def test_slow_consumer_skips_to_latest_progress(self):
+        async def run():
+            hub = BroadcastHub(max_queue=2)
+            slow = hub.subscribe("job", lambda: counting_producer([], count=6, final_at=5),
+                                 is_final=lambda event: event["final"])
+            # Let the producer run to the end before reading anything
+            for _ in range(20):
+                await asyncio.sleep(0)
+            return [event["progress"] async for event in slow], slow.coalesced
+
+        received, coalesced = asyncio.run(run())
+        assert received == [4, 5]
+        assert coalesced == 4
+
+    def test_final_events_are_never_dropped(self):
+        async def run():
+            hub = BroadcastHub(max_queue=1)
+
+            async def finals():
+                for i in range(3):
+                    yield {"progress": i, "final": True}
+
+            subscriber = hub.subscribe("job", finals, is_final=lambda event: event["final"])
+            for _ in range(10):
+                await asyncio.sleep(0)
+            return [event["progress"] async for event in subscriber]
+
+        assert asyncio.run(run()) == [0, 1, 2]
+
+    def test_late_joiner_gets_latest_and_last_leaver_stops_upstream(self):
+        async def run():
+            hub = BroadcastHub()
+            gate = asyncio.Event()
+
+            async def waits():
+                yield {"progress": 1}
+                await gate.wait()
+                yield {"progress": 2}
+
+            first = hub.subscribe("job", waits)
+            assert (await first.__anext__())["progress"] == 1
+            late = hub.subscribe("job", waits)
+            assert (await late.__anext__())["progress"] == 1
+            task = first._channel.task
+            first.close()
+            late.close()
+            await asyncio.sleep(0)
+            return task.cancelled(), hub.stream_count()
+
+        assert asyncio.run(run()) == (True, 0)
+
+    def test_producer_errors_reach_subscribers(self):
+        async def run():
+            async def broken():
+                yield {"progress": 0}
+                raise RuntimeError("upstream failed")
+
+            subscriber = BroadcastHub().subscribe("job", broken)
+            events = []
+            with pytest.raises(RuntimeError):
+                async for event in subscriber:
+                    events.append(event)
+            return events
+
+        assert asyncio.run(run()) == [{"progress": 0}]
+
+
+class TestWebsocketSubscriptions:
+    """Test suite for GraphQL subscriptions over WebSocket"""
+
+    def setup_method(self):
+        self.interval, self.preload = settings.SUBSCRIPTION_STEP_INTERVAL, settings.PRELOAD_MODULES_ON_STARTUP
+        settings.SUBSCRIPTION_STEP_INTERVAL = 0.01
+        # Sharing a stream needs one event loop, so a test runs the app's lifespan; skip its background imports
+        settings.PRELOAD_MODULES_ON_STARTUP = False
+
+    def teardown_method(self):
+        settings.SUBSCRIPTION_STEP_INTERVAL, settings.PRELOAD_MODULES_ON_STARTUP = self.interval, self.preload
+
+    def receive_until_complete(self, ws, data_type: str):
+        events = []
+        while True:
+            message = ws.receive_json()
+            if message["type"] == "complete":
+                return events
+            if message["type"] == data_type:
+                events.append(message["payload"]["data"]["contentGeneration"])
+
+    def test_graphql_transport_ws(self):
+        with TestClient(app).websocket_connect("/graphql/", subprotocols=["graphql-transport-ws"]) as ws:
+            assert ws.accepted_subprotocol == "graphql-transport-ws"
+            ws.send_json({"type": "connection_init"})
+            assert ws.receive_json() == {"type": "connection_ack"}
+            ws.send_json({"type": "subscribe", "id": "1", "payload": {"query": QUERY % "Rust"}})
+            events = self.receive_until_complete(ws, "next")
+        assert [event["progress"] for event in events] == [0, 20, 40, 70, 90, 100]
+        assert events[-1]["completed"] is True
+
+    def test_legacy_graphql_ws(self):
+        with TestClient(app).websocket_connect("/graphql/", subprotocols=["graphql-ws"]) as ws:
+            assert ws.accepted_subprotocol == "graphql-ws"
+            ws.send_json({"type": "connection_init"})
+            assert ws.receive_json() == {"type": "connection_ack"}
+            ws.send_json({"type": "start", "id": "1", "payload": {"query": QUERY % "Go"}})
+            events = self.receive_until_complete(ws, "data")
+        assert events[-1] == {"step": "Complete", "progress": 100, "completed": True}
+
+    def test_clients_watching_a_topic_share_one_stream(self):
+        with TestClient(app) as client:
+            with client.websocket_connect("/graphql/", subprotocols=["graphql-transport-ws"]) as first, \
+                    client.websocket_connect("/graphql/", subprotocols=["graphql-transport-ws"]) as second:
+                for ws in (first, second):
+                    ws.send_json({"type": "connection_init"})
+                    ws.receive_json()
+                    ws.send_json({"type": "subscribe", "id": "1", "payload": {"query": QUERY % "Shared"}})
+                for ws in (first, second):
+                    assert ws.receive_json()["type"] == "next"
+                assert broadcast_hub.subscriber_count(("contentGeneration", "Shared")) == 2
+                assert broadcast_hub.stream_count() == 1
+
+    def test_unsupported_subprotocol_is_rejected(self):
+        with pytest.raises(WebSocketDisconnect) as rejected:
+            with TestClient(app).websocket_connect("/graphql/", subprotocols=["mqtt"]) as ws:
+                ws.receive_json()
+        assert rejected.value.code == 4406
+
+    def test_idle_connections_are_closed(self):
+        graphql = GraphQL(schema, websocket_handler=EduBotWebsocketHandler(idle_timeout=0.1, keepalive=0.02))
+        with TestClient(graphql).websocket_connect("/", subprotocols=["graphql-ws"]) as ws:
+            ws.send_json({"type": "connection_init"})
+            assert ws.receive_json() == {"type": "connection_ack"}
+            # Keep-alives are not activity, so they do not hold the connection open
+            with pytest.raises(WebSocketDisconnect) as closed:
+                while True:
+                    assert ws.receive_json() == {"type": "ka"}
+        assert closed.value.code == 4408
@@ -0,0 +1,131 @@
+import asyncio
+from fastapi.testclient import TestClient
+from main import app
+from services.llm_providers import FakeProvider
+from services.llm_service import llm_service
+from utils.tracing import (
+    Tracer, InMemorySpanExporter, OTLPHTTPSpanExporter, FileSpanExporter,
+    parse_traceparent, tracer
+)
+import httpx
+import json
+
+
+class TestTracer:
+    """Test suite for span nesting and export"""
+
+    def setup_method(self):
+        self.exporter = InMemorySpanExporter()
+        self.tracer = Tracer()
+        self.tracer.set_exporter(self.exporter)
+
+    def teardown_method(self):
+        self.tracer.set_exporter(None)
+
+    def test_children_share_trace_and_export_with_root(self):
+        with self.tracer.start_span("root") as root:
+            with self.tracer.start_span("child") as child:
+                pass
+        self.tracer.processor.flush()
+        assert child.trace_id == root.trace_id
+        assert child.parent_id == root.span_id
+        assert [span.name for span in self.exporter.spans] == ["root", "child"]
+
+    def test_concurrent_tasks_nest_under_caller(self):
+        async def work(i):
+            with self.tracer.start_span(f"task{i}"):
+                await asyncio.sleep(0)
+
+        async def run():
+            with self.tracer.start_span("root") as root:
+                await asyncio.gather(*(work(i) for i in range(3)))
+            return root
+
+        root = asyncio.run(run())
+        self.tracer.processor.flush()
+        children = [span for span in self.exporter.spans if span.name.startswith("task")]
+        assert len(children) == 3
+        assert all(span.parent_id == root.span_id for span in children)
+
+    def test_exception_marks_span_as_error(self):
+        try:
+            with self.tracer.start_span("root"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+        self.tracer.processor.flush()
+        assert self.exporter.spans[0].status == 2
+        assert self.exporter.spans[0].attributes["exception.type"] == "ValueError"
+
+    def test_traceparent_parsing(self):
+        trace_id, parent_id = parse_traceparent("00-" + "a" * 32 + "-" + "b" * 16 + "-01")
+        assert trace_id == "a" * 32 and parent_id == "b" * 16
+        assert parse_traceparent("garbage") == (None, None)
+
+
+class TestTraceExporters:
+    """Test suite for the file and OTLP exporters"""
+
+    def test_file_exporter_writes_otlp_json(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        local = Tracer()
+        local.set_exporter(FileSpanExporter(str(path)))
+        with local.start_span("root"):
+            pass
+        local.set_exporter(None)
+        payload = json.loads(path.read_text().splitlines()[0])
+        spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert spans[0]["name"] == "root"
+
+    def test_otlp_exporter_posts_to_collector(self):
+        received = []
+
+        def collector(request):
+            received.append(json.loads(request.content))
+            return httpx.Response(200, json={})
+
+        local = Tracer()
+        local.set_exporter(OTLPHTTPSpanExporter("http://collector/v1/traces",
+                                                transport=httpx.MockTransport(collector)))
+        with local.start_span("root"):
+            pass
+        local.set_exporter(None)
+        assert received[0]["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] == "root"
+
+
+class TestRequestTracing:
+    """Test suite for request-scoped traces through the app"""
+
+    def setup_method(self):
+        llm_service.set_providers([FakeProvider()])
+        self.exporter = InMemorySpanExporter()
+        tracer.set_exporter(self.exporter)
+        self.client = TestClient(app)
+
+    def teardown_method(self):
+        tracer.set_exporter(None)
+
+    def test_trace_id_header_and_stage_spans(self):
+        query = """
+        mutation {
+            educate(input: {topic: "Tracing", api_key: "key", modules_count: 3}) {
+                ... on EducateResponse { topic modules { title } quiz { total_questions } }
+            }
+        }
+        """
+        response = self.client.post("/graphql/", json={"query": query})
+        trace_id = response.headers["X-Trace-Id"]
+        tracer.processor.flush()
+
+        spans = [span for span in self.exporter.spans if span.trace_id == trace_id]
+        names = [span.name for span in spans]
+        assert "graphql.mutation anonymous" in names
+        assert names.count("content.syllabus") == 1
+        assert names.count("content.module") == 3
+        assert names.count("content.quiz") == 1
+        assert names.count("llm.generate") == 5
+
+    def test_incoming_traceparent_is_continued(self):
+        trace_id = "c" * 32
+        response = self.client.get("/health", headers={"traceparent": f"00-{trace_id}-{'d' * 16}-01"})
+        assert response.headers["X-Trace-Id"] == trace_id
@@ -0,0 +1,154 @@
+import asyncio
+import httpx
+from fastapi.testclient import TestClient
+from main import app
+from services.llm_providers import FakeProvider, LLMRequest, OpenAIProvider
+from services.llm_service import LLMService, llm_service
+from services.usage_service import UsageTracker, hash_api_key, usage_tracker
+from utils.exceptions import TokenBudgetExceededError
+from utils.kv_store import SQLiteKVStore
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestUsageTracker:
+    """Test suite for rolling-window token accounting"""
+
+    def test_usage_is_aggregated_per_operation_and_key(self):
+        tracker = UsageTracker(window_seconds=600, bucket_seconds=60, budget_per_key=0)
+        tracker.record("key-a", "quiz", 100, 50, cost=0.01)
+        tracker.record("key-a", "quiz", 10, 5, estimated=True)
+        tracker.record("key-b", "summarize", 20, 10)
+
+        report = tracker.report("key-a")
+        assert report["key_hash"] == hash_api_key("key-a")
+        assert report["operations"] == [{
+            "operation": "quiz", "calls": 2, "estimated_calls": 1, "prompt_tokens": 110,
+            "completion_tokens": 55, "total_tokens": 165, "estimated_cost": 0.01,
+        }]
+        assert tracker.report()["total_tokens"] == 195
+
+    def test_old_usage_leaves_the_window(self):
+        clock = FakeClock()
+        tracker = UsageTracker(window_seconds=120, bucket_seconds=60, budget_per_key=0, clock=clock)
+        tracker.record("key", "explain", 100, 100)
+        clock.now += 90
+        tracker.record("key", "explain", 1, 1)
+        assert tracker.tokens_used("key") == 202
+        clock.now += 120
+        assert tracker.tokens_used("key") == 2
+        clock.now += 120
+        assert tracker.tokens_used("key") == 0
+        assert tracker.report()["operations"] == []
+
+    def test_budget_is_enforced_with_retry_after(self):
+        clock = FakeClock(960.0)
+        tracker = UsageTracker(window_seconds=120, bucket_seconds=60, budget_per_key=100, clock=clock)
+        tracker.check_budget("key")
+        tracker.record("key", "module", 80, 30)
+        try:
+            tracker.check_budget("key")
+        except TokenBudgetExceededError as e:
+            assert e.retry_after == 180
+        else:
+            raise AssertionError("expected TokenBudgetExceededError")
+        tracker.check_budget("other-key")
+        assert tracker.report("key")["remaining"] == 0
+
+    def test_workers_sharing_a_store_share_the_budget(self, tmp_path):
+        path = str(tmp_path / "state.db")
+        workers = [UsageTracker(window_seconds=120, bucket_seconds=60, budget_per_key=100,
+                                kv_store=SQLiteKVStore(path)) for _ in range(2)]
+        workers[0].record("key", "module", 60, 0)
+        workers[1].record("key", "module", 40, 0)
+        assert workers[0].report("key")["operations"][0]["calls"] == 2
+        for worker in workers:
+            try:
+                worker.check_budget("key")
+            except TokenBudgetExceededError:
+                pass
+            else:
+                raise AssertionError("expected TokenBudgetExceededError")
+
+
+class TestLLMUsageRecording:
+    """Test suite for recording usage from provider responses"""
+
+    def setup_method(self):
+        usage_tracker.reset()
+
+    def test_missing_usage_is_estimated(self):
+        service = LLMService([FakeProvider()])
+        response = asyncio.run(service.generate("estimate-key", "x" * 400, "y" * 40, operation="explain"))
+        assert response.prompt_tokens == 111  # 442 characters including the separator
+        assert response.completion_tokens > 0
+        assert usage_tracker.report("estimate-key")["operations"][0]["estimated_calls"] == 1
+
+    def test_reported_usage_is_used(self):
+        def handler(request):
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": "hi"}}],
+                "usage": {"prompt_tokens": 12, "completion_tokens": 3},
+            })
+
+        provider = OpenAIProvider(transport=httpx.MockTransport(handler))
+        provider.api_key = "sk-test"
+        service = LLMService([provider])
+        response = asyncio.run(service.generate("reported-key", "hello", operation="summarize"))
+        assert (response.prompt_tokens, response.completion_tokens) == (12, 3)
+        report = usage_tracker.report("reported-key")
+        assert report["total_tokens"] == 15
+        assert report["operations"][0]["estimated_calls"] == 0
+
+
+class TestUsageAPI:
+    """Test suite for the usage query and budget errors"""
+
+    def setup_method(self):
+        usage_tracker.reset()
+        llm_service.set_providers([FakeProvider()])
+        self.client = TestClient(app)
+
+    def teardown_method(self):
+        usage_tracker.budget_per_key = 0
+
+    def summarize(self):
+        query = """
+        mutation {
+            summarize(input: {text: "Some text to summarize", api_key: "budget-key"}) {
+                ... on SummarizeResponse { summary }
+                ... on Error { code details }
+            }
+        }
+        """
+        return self.client.post("/graphql/", json={"query": query}).json()["data"]["summarize"]
+
+    def test_usage_query(self):
+        self.summarize()
+        query = 'query { usage(api_key: "budget-key") { key_hash total_tokens operations { operation calls } } }'
+        usage = self.client.post("/graphql/", json={"query": query}).json()["data"]["usage"]
+        assert usage["key_hash"] == hash_api_key("budget-key")
+        assert usage["total_tokens"] > 0
+        assert usage["operations"] == [{"operation": "summarize", "calls": 1}]
+
+    def test_usage_across_keys_is_not_exposed(self):
+        self.summarize()
+        body = self.client.post("/graphql/", json={"query": "query { usage { total_tokens } }"}).json()
+        assert body.get("data") is None and body["errors"]
+
+    def test_budget_exceeded(self):
+        usage_tracker.budget_per_key = 1
+        assert "summary" in self.summarize()
+        error = self.summarize()
+        assert error["code"] == "BUDGET_EXCEEDED"
+
+        response = self.client.post("/api/v1/summarize",
+                                    json={"text": "Some text", "api_key": "budget-key"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
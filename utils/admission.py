@@ -0,0 +1,188 @@
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+from config import settings
+from utils.exceptions import OverloadedError
+from utils.metrics import ADMISSION_IN_FLIGHT_COST, ADMISSION_REQUESTS_TOTAL
+
+
+def educate_cost(modules_count: int, include_pdf: bool = False, syllabus: bool = True,
+                 modules: bool = True, quiz: bool = True) -> int:
+    """Admission cost of an educate request: one unit per LLM call it makes, plus the PDF render"""
+    cost = (1 if syllabus else 0) + (modules_count if modules else 0) + (1 if quiz else 0)
+    return cost + (settings.ADMISSION_COSTS.get("pdf", 0) if include_pdf else 0)
+
+
+def regeneration_cost(operation: str, had_pdf: bool) -> int:
+    """Admission cost of regenerating one part: its LLM call, plus re-rendering a cached PDF"""
+    return settings.ADMISSION_COSTS.get(operation, 1) + (settings.ADMISSION_COSTS.get("pdf", 0) if had_pdf else 0)
+
+
+class Ticket:
+    """Capacity held by one admitted request; give it back with release()"""
+
+    __slots__ = ("operation", "cost", "started")
+
+    def __init__(self, operation: str, cost: int, started: float):
+        self.operation = operation
+        self.cost = cost
+        self.started = started
+
+
+class _Waiter:
+    __slots__ = ("operation", "cost", "future")
+
+    def __init__(self, operation: str, cost: int, future: asyncio.Future):
+        self.operation = operation
+        self.cost = cost
+        self.future = future
+
+
+class AdmissionController:
+    """Bounds the cost of work in flight, shedding load rather than queueing it without limit
+
+    Each operation has a cost, roughly the LLM calls and renders it can start.
+    Operations listed in `costs` are expensive and share `capacity - reserved`
+    units; anything else is cheap (cost 1) and may also use the `reserved`
+    units, so health checks and listings keep answering while expensive work
+    is saturated. `concurrency` optionally caps how many of one operation run
+    at once.
+
+    An expensive request that does not fit waits in a FIFO queue, for at most
+    `queue_timeout` seconds, if the queued cost stays within `queue_budget`;
+    otherwise, like a cheap request that does not fit, it is rejected at once
+    with OverloadedError. Its retry_after is the recent duration of that
+    operation. Runs on the event loop, so no locking.
+    """
+
+    def __init__(self, capacity: int = None, reserved: int = None, queue_budget: int = None,
+                 queue_timeout: float = None, costs: Dict[str, int] = None,
+                 concurrency: Dict[str, int] = None, enabled: bool = None, clock=time.monotonic):
+        self.capacity = capacity or settings.ADMISSION_CAPACITY
+        self.reserved = min(settings.ADMISSION_RESERVED_CAPACITY if reserved is None else reserved, self.capacity - 1)
+        self.queue_budget = settings.ADMISSION_QUEUE_BUDGET if queue_budget is None else queue_budget
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.costs = settings.ADMISSION_COSTS if costs is None else costs
+        self.concurrency = settings.ADMISSION_CONCURRENCY if concurrency is None else concurrency
+        self.enabled = settings.ADMISSION_CONTROL_ENABLED if enabled is None else enabled
+        self.clock = clock
+        self.in_flight_cost = 0
+        self.queued_cost = 0
+        self._cost_by_operation: Dict[str, int] = defaultdict(int)
+        self._running: Dict[str, int] = defaultdict(int)
+        self._durations: Dict[str, float] = {}
+        self._waiters: Deque[_Waiter] = deque()
+
+    def is_cheap(self, operation: str) -> bool:
+        return operation not in self.costs
+
+    def cost_of(self, operation: str, cost: int = None) -> int:
+        if cost is None:
+            cost = self.costs.get(operation, 1)
+        # Anything bigger than the whole share could never run; let it take the share instead
+        return max(1, min(cost, self._limit(operation)))
+
+    def in_flight(self, operation: str = None) -> int:
+        """Cost of admitted work, in total or for one operation"""
+        return self.in_flight_cost if operation is None else self._cost_by_operation.get(operation, 0)
+
+    def retry_after(self, operation: str) -> int:
+        """Seconds a rejected client should wait: about how long one of these takes now"""
+        return max(1, math.ceil(self._durations.get(operation, 1.0)))
+
+    def _limit(self, operation: str) -> int:
+        return self.capacity if self.is_cheap(operation) else self.capacity - self.reserved
+
+    def _fits(self, operation: str, cost: int) -> bool:
+        if self.in_flight_cost + cost > self._limit(operation):
+            return False
+        limit = self.concurrency.get(operation)
+        return not limit or self._running[operation] < limit
+
+    def _take(self, operation: str, cost: int) -> Ticket:
+        self.in_flight_cost += cost
+        self._cost_by_operation[operation] += cost
+        self._running[operation] += 1
+        ADMISSION_IN_FLIGHT_COST.inc(cost, operation=operation)
+        return Ticket(operation, cost, self.clock())
+
+    def _reject(self, operation: str, reason: str) -> OverloadedError:
+        ADMISSION_REQUESTS_TOTAL.inc(operation=operation, outcome=reason)
+        retry_after = self.retry_after(operation)
+        return OverloadedError(f"Server is busy with {operation} requests; retry in {retry_after} seconds",
+                               retry_after=retry_after)
+
+    async def acquire(self, operation: str, cost: int = None) -> Ticket:
+        """Admit a request or raise OverloadedError; queues briefly when the queue budget allows"""
+        cost = self.cost_of(operation, cost)
+        if not self.enabled:
+            return Ticket(operation, 0, self.clock())
+        # Cheap operations never wait behind queued expensive ones; that is what the reserve is for
+        if self._fits(operation, cost) and (not self._waiters or self.is_cheap(operation)):
+            ADMISSION_REQUESTS_TOTAL.inc(operation=operation, outcome="admitted")
+            return self._take(operation, cost)
+        # A cheap request that does not fit means even the reserve is in use; queueing it would not help
+        if self.is_cheap(operation) or self.queue_timeout <= 0 or self.queued_cost + cost > self.queue_budget:
+            raise self._reject(operation, "rejected")
+
+        waiter = _Waiter(operation, cost, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self.queued_cost += cost
+        try:
+            await asyncio.wait({waiter.future}, timeout=self.queue_timeout)
+        except BaseException:
+            # Cancelled while queued, possibly just after being admitted
+            if waiter.future.done():
+                self.release(waiter.future.result())
+            else:
+                self._unqueue(waiter)
+            raise
+        if not waiter.future.done():
+            self._unqueue(waiter)
+            raise self._reject(operation, "timed_out")
+        ADMISSION_REQUESTS_TOTAL.inc(operation=operation, outcome="queued")
+        return waiter.future.result()
+
+    def release(self, ticket: Ticket):
+        """Give back an admitted request's capacity and let queued requests in"""
+        if not ticket.cost:
+            return
+        self.in_flight_cost -= ticket.cost
+        self._cost_by_operation[ticket.operation] -= ticket.cost
+        self._running[ticket.operation] -= 1
+        ADMISSION_IN_FLIGHT_COST.dec(ticket.cost, operation=ticket.operation)
+        elapsed = self.clock() - ticket.started
+        previous = self._durations.get(ticket.operation)
+        self._durations[ticket.operation] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+        self._drain()
+
+    def _unqueue(self, waiter: _Waiter):
+        waiter.future.cancel()
+        self._waiters.remove(waiter)
+        self.queued_cost -= waiter.cost
+        # Whoever was behind it may fit now
+        self._drain()
+
+    def _drain(self):
+        # Strict FIFO, so a large educate at the head is not starved by smaller requests
+        while self._waiters and self._fits(self._waiters[0].operation, self._waiters[0].cost):
+            waiter = self._waiters.popleft()
+            self.queued_cost -= waiter.cost
+            waiter.future.set_result(self._take(waiter.operation, waiter.cost))
+
+    @asynccontextmanager
+    async def admit(self, operation: str, cost: int = None):
+        """`async with` form of acquire() and release()"""
+        ticket = await self.acquire(operation, cost)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+
+# Global admission controller
+admission_controller = AdmissionController()
@@ -0,0 +1,156 @@
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from config import settings
+from utils.http_headers import negotiate_encoding
+from utils.metrics import COMPRESSION_BYTES_TOTAL
+
+try:
+    import brotli
+except ImportError:  # optional: `pip install brotli` to offer br
+    brotli = None
+
+# Media types worth compressing; PDFs, ZIPs and EPUBs are compressed already
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/graphql-response+json", "application/javascript",
+    "application/xml", "application/xhtml+xml", "image/svg+xml",
+)
+
+
+def available_encodings() -> List[str]:
+    """Content codings this server can produce, most preferred first"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+class _Encoder:
+    """Incremental compressor with a common interface for gzip and brotli"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self.compress, self._finish = self._compressor.process, self._compressor.finish
+        else:
+            # wbits 31: zlib stream with a gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self.compress, self._finish = self._compressor.compress, self._compressor.flush
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = None, brotli_quality: int = None) -> bytes:
+    """Compress a whole body with a content coding from available_encodings()"""
+    encoder = _Encoder(
+        encoding,
+        settings.GZIP_LEVEL if gzip_level is None else gzip_level,
+        settings.BROTLI_QUALITY if brotli_quality is None else brotli_quality,
+    )
+    return encoder.compress(body) + encoder.finish()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text and JSON responses with gzip or brotli
+
+    The coding is negotiated from Accept-Encoding, preferring brotli when it
+    is installed. Bodies smaller than `minimum_size` are sent as they are;
+    streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = None, gzip_level: int = None, brotli_quality: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.BROTLI_QUALITY if brotli_quality is None else brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        if scope["method"] != "HEAD":
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), available_encodings())
+        await self.app(scope, receive, _CompressingSend(self, encoding, send))
+
+
+class _CompressingSend:
+    """The `send` callable for one response, deciding on compression at its first body chunk"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers back until the first chunk shows how big the body is
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.passthrough:
+            await self.send(message)
+        elif self.encoder is not None:
+            await self._send_compressed(message)
+        else:
+            await self._start(message)
+
+    async def _start(self, message):
+        start = self.start_message
+        start["headers"] = list(start.get("headers", []))
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        content_type = headers.get("content-type", "")
+        compressible = (
+            start["status"] == 200
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+        if not compressible or self.encoding is None or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self.encoder = _Encoder(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+        headers["Content-Encoding"] = self.encoding
+        # Ranges would address the uncompressed bytes; the encoded body is a different representation
+        for name in ("content-length", "accept-ranges"):
+            if name in headers:
+                del headers[name]
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        if more_body:
+            await self.send(start)
+            await self._send_compressed(message)
+            return
+        compressed = self.encoder.compress(body) + self.encoder.finish()
+        self._record(len(body), len(compressed))
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    async def _send_compressed(self, message):
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        chunk = self.encoder.compress(body)
+        if not more_body:
+            chunk += self.encoder.finish()
+        self._record(len(body), len(chunk))
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _record(self, original: int, compressed: int):
+        COMPRESSION_BYTES_TOTAL.inc(original, encoding=self.encoding, stage="original")
+        COMPRESSION_BYTES_TOTAL.inc(compressed, encoding=self.encoding, stage="compressed")
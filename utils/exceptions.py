@@ -26,6 +26,32 @@ class ContentGenerationError(Exception):
         self.message = message
         super().__init__(self.message)
 
+class TopicNotFoundError(Exception):
+    """Exception raised when a stored topic or course does not exist"""
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+class TokenBudgetExceededError(Exception):
+    """Exception raised when an API key has used up its token budget"""
+    def __init__(self, message: str, retry_after: int = None):
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(self.message)
+
+class OverloadedError(Exception):
+    """Exception raised when admission control sheds a request because the server is saturated"""
+    def __init__(self, message: str, retry_after: int = None):
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(self.message)
+
+class StorageError(Exception):
+    """Exception raised when the artifact object store fails"""
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
 def setup_exception_handlers(app):
     """Setup global exception handlers for the FastAPI app"""
     
@@ -65,6 +91,58 @@ def setup_exception_handlers(app):
             }
         )
     
+    @app.exception_handler(TopicNotFoundError)
+    async def topic_not_found_exception_handler(request: Request, exc: TopicNotFoundError):
+        logger.error(f"Topic Not Found: {exc.message}")
+        return JSONResponse(
+            status_code=404,
+            content={
+                "error": "Topic Not Found",
+                "detail": exc.message,
+                "status_code": 404
+            }
+        )
+    
+    @app.exception_handler(TokenBudgetExceededError)
+    async def token_budget_exception_handler(request: Request, exc: TokenBudgetExceededError):
+        logger.error(f"Token Budget Exceeded: {exc.message}")
+        headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+        return JSONResponse(
+            status_code=429,
+            content={
+                "error": "Token Budget Exceeded",
+                "detail": exc.message,
+                "status_code": 429
+            },
+            headers=headers
+        )
+    
+    @app.exception_handler(OverloadedError)
+    async def overloaded_exception_handler(request: Request, exc: OverloadedError):
+        logger.warning(f"Request shed: {exc.message}")
+        headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+        return JSONResponse(
+            status_code=503,
+            content={
+                "error": "Server Overloaded",
+                "detail": exc.message,
+                "status_code": 503
+            },
+            headers=headers
+        )
+    
+    @app.exception_handler(StorageError)
+    async def storage_exception_handler(request: Request, exc: StorageError):
+        logger.error(f"Storage Error: {exc.message}")
+        return JSONResponse(
+            status_code=503,
+            content={
+                "error": "Storage Error",
+                "detail": "Artifact storage is unavailable. Please try again later.",
+                "status_code": 503
+            }
+        )
+    
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
         logger.error(f"Validation Error: {exc.errors()}")
@@ -0,0 +1,141 @@
+import json
+import time
+from contextlib import nullcontext
+from typing import Any, Optional, Set, Tuple
+
+from ariadne.asgi.handlers import GraphQLHTTPHandler
+from fastapi.responses import ORJSONResponse
+from graphql import DocumentNode, FieldNode, GraphQLError, OperationDefinitionNode, parse
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+from config import settings
+from utils.admission import admission_controller
+from utils.exceptions import OverloadedError
+from utils.metrics import GRAPHQL_OPERATION_SECONDS, GRAPHQL_OPERATIONS_TOTAL
+from utils.tracing import tracer, STATUS_ERROR
+
+
+def describe_operation(document: DocumentNode, operation_name: Optional[str]) -> Tuple[str, str]:
+    """Return (operation type, operation name) for the operation that will run"""
+    selected = selected_operation(document, operation_name)
+    if selected is None:
+        return "unknown", operation_name or "anonymous"
+    name = selected.name.value if selected.name else "anonymous"
+    return selected.operation.value, name
+
+
+def selected_operation(document: DocumentNode, operation_name: Optional[str]) -> Optional[OperationDefinitionNode]:
+    operations = [d for d in document.definitions if isinstance(d, OperationDefinitionNode)]
+    if operation_name:
+        return next((op for op in operations if op.name and op.name.value == operation_name), None)
+    return operations[0] if len(operations) == 1 else None
+
+
+def cache_max_age(operation: OperationDefinitionNode) -> int:
+    """Seconds a query's result may be cached: the shortest of its top-level fields, 0 if any isn't cacheable"""
+    ages = []
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            return 0
+        if selection.name.value == "__typename":
+            continue
+        age = settings.GRAPHQL_CACHEABLE_FIELDS.get(selection.name.value, 0)
+        if not age:
+            return 0
+        ages.append(age)
+    return min(ages) if ages else 0
+
+
+class EduBotGraphQLHTTPHandler(GraphQLHTTPHandler):
+    """GraphQL HTTP handler that records per-operation metrics, runs queries sent by GET and encodes with orjson"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._seen_operation_names: Set[str] = set()
+
+    def _metric_name(self, name: str) -> str:
+        # Operation names are client-chosen; cap label cardinality
+        if name in self._seen_operation_names:
+            return name
+        if len(self._seen_operation_names) >= settings.METRICS_MAX_OPERATION_NAMES:
+            return "other"
+        self._seen_operation_names.add(name)
+        return name
+
+    async def handle_request(self, request: Request) -> Response:
+        try:
+            if request.method == "GET" and "query" in request.query_params:
+                return await self.handle_get_query(request)
+            return await super().handle_request(request)
+        except OverloadedError as error:
+            # Only whole queries are shed here; mutations return an OVERLOADED Error from their resolvers
+            return ORJSONResponse(
+                {"errors": [{"message": error.message,
+                             "extensions": {"code": "OVERLOADED", "retryAfter": error.retry_after}}]},
+                status_code=503,
+                headers={"Retry-After": str(error.retry_after)},
+            )
+
+    async def handle_get_query(self, request: Request) -> Response:
+        """Run a query from the URL so shared caches and the response cache can reuse its result
+
+        Only queries run over GET; results selecting nothing but
+        GRAPHQL_CACHEABLE_FIELDS are marked publicly cacheable.
+        """
+        params = request.query_params
+        data = {"query": params["query"], "operationName": params.get("operationName") or None}
+        try:
+            data["variables"] = json.loads(params["variables"]) if params.get("variables") else None
+            document = parse(data["query"])
+        except (ValueError, GraphQLError) as error:
+            return PlainTextResponse(f"Invalid GraphQL GET request: {error}", status_code=400)
+
+        operation = selected_operation(document, data["operationName"])
+        if operation is not None and operation.operation.value != "query":
+            return PlainTextResponse(
+                "Only queries can be sent with GET; use POST for mutations", status_code=405, headers={"Allow": "POST"}
+            )
+
+        success, result = await self.execute_graphql_query(request, data, query_document=document)
+        response = await self.create_json_response(request, result, success)
+        max_age = cache_max_age(operation) if success and operation is not None and not result.get("errors") else 0
+        response.headers["Cache-Control"] = f"public, max-age={max_age}" if max_age else "no-cache"
+        return response
+
+    async def create_json_response(self, request: Any, result: dict, success: bool) -> Response:
+        # orjson serialises large educate results several times faster than the stdlib encoder
+        return ORJSONResponse(result, status_code=200 if success else 400)
+
+    async def execute_graphql_query(self, request: Any, data: Any, *, context_value: Any = None,
+                                    query_document: Optional[DocumentNode] = None):
+        operation_type, operation_name = "unknown", "invalid"
+        if query_document is None and isinstance(data, dict) and isinstance(data.get("query"), str):
+            try:
+                # Parse once here and hand the document on so ariadne doesn't parse again
+                query_document = parse(data["query"])
+            except GraphQLError:
+                query_document = None
+        if query_document is not None:
+            operation_type, operation_name = describe_operation(query_document, data.get("operationName"))
+
+        labels = {"operation_type": operation_type, "operation_name": self._metric_name(operation_name)}
+        # Queries are cheap and may use the capacity reserved from expensive mutations
+        admission = admission_controller.admit("query") if operation_type == "query" else nullcontext()
+        async with admission:
+            started = time.perf_counter()
+            with tracer.start_span(f"graphql.{operation_type} {operation_name}", **{
+                "graphql.operation.type": operation_type,
+                "graphql.operation.name": operation_name,
+            }) as span:
+                success, result = await super().execute_graphql_query(
+                    request, data, context_value=context_value, query_document=query_document
+                )
+                if isinstance(result, dict) and result.get("errors"):
+                    span.status = STATUS_ERROR
+                    span.status_message = str(result["errors"][0].get("message", ""))
+        GRAPHQL_OPERATION_SECONDS.observe(time.perf_counter() - started, **labels)
+        outcome = "success" if success and not (isinstance(result, dict) and result.get("errors")) else "error"
+        GRAPHQL_OPERATIONS_TOTAL.inc(outcome=outcome, **labels)
+        return success, result
+
@@ -0,0 +1,128 @@
+import asyncio
+from datetime import timedelta
+from typing import Dict, Optional
+
+from ariadne.asgi.handlers import GraphQLTransportWSHandler, GraphQLWSHandler
+from ariadne.asgi.handlers.base import GraphQLWebsocketHandler
+from starlette.types import Message, Receive, Scope, Send
+from starlette.websockets import WebSocket
+
+from config import settings
+from utils.metrics import WEBSOCKET_CLOSED_TOTAL, WEBSOCKET_CONNECTIONS
+
+# Close codes: the client offered no protocol we speak, or the connection sat idle
+UNSUPPORTED_PROTOCOL_CODE = 4406
+IDLE_TIMEOUT_CODE = 4408
+
+# graphql-ws keep-alives are server chatter, so they do not count as activity
+KEEPALIVE_MESSAGE = '{"type":"ka"}'
+
+
+class IdleTimeout:
+    """ASGI receive/send pair that closes a WebSocket after `timeout` idle seconds
+
+    Any client message, or anything sent other than a keep-alive, counts as
+    activity. Once the connection is closed (by timeout or by the handler),
+    further sends are dropped and receive reports a disconnect, so operation
+    tasks still running wind down instead of failing.
+    """
+
+    def __init__(self, receive: Receive, send: Send, timeout: float):
+        self._receive = receive
+        self._send = send
+        self.timeout = timeout
+        self.closed = False
+        self.timed_out = False
+        self._pending: Optional[asyncio.Future] = None
+        self._last_activity = asyncio.get_running_loop().time()
+
+    async def receive(self) -> Message:
+        loop = asyncio.get_running_loop()
+        while not self.closed:
+            if self._pending is None:
+                self._pending = asyncio.ensure_future(self._receive())
+            remaining = self._last_activity + self.timeout - loop.time() if self.timeout else None
+            if remaining is not None and remaining <= 0:
+                self.timed_out = True
+                await self.send({"type": "websocket.close", "code": IDLE_TIMEOUT_CODE, "reason": "Idle timeout"})
+                break
+            # Sends extend the deadline too, so wake up at the deadline and look again
+            pending = self._pending
+            done, _ = await asyncio.wait({pending}, timeout=remaining)
+            if self.closed:
+                break
+            if done:
+                message, self._pending = pending.result(), None
+                self._last_activity = loop.time()
+                if message["type"] == "websocket.disconnect":
+                    self.closed = True
+                return message
+        return {"type": "websocket.disconnect", "code": IDLE_TIMEOUT_CODE if self.timed_out else 1000}
+
+    async def send(self, message: Message):
+        if self.closed:
+            return
+        if message["type"] == "websocket.close":
+            self.closed = True
+            self.cancel()
+        elif message.get("text") != KEEPALIVE_MESSAGE:
+            self._last_activity = asyncio.get_running_loop().time()
+        await self._send(message)
+
+    def cancel(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+
+
+class EduBotWebsocketHandler(GraphQLWebsocketHandler):
+    """GraphQL subscriptions over WebSocket with both subprotocols on one endpoint
+
+    Clients offering graphql-transport-ws (the graphql-ws library) are served by
+    ariadne's handler for it; clients offering only the legacy graphql-ws
+    (subscriptions-transport-ws) get the older protocol. Idle connections are
+    closed with 4408 after WEBSOCKET_IDLE_TIMEOUT seconds.
+    """
+
+    def __init__(self, idle_timeout: float = None, keepalive: float = None, init_timeout: float = None, **kwargs):
+        super().__init__(**kwargs)
+        self.idle_timeout = settings.WEBSOCKET_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        init_timeout = settings.WEBSOCKET_INIT_TIMEOUT if init_timeout is None else init_timeout
+        # In order of preference
+        self.protocols: Dict[str, GraphQLWebsocketHandler] = {
+            "graphql-transport-ws": GraphQLTransportWSHandler(
+                connection_init_wait_timeout=timedelta(seconds=init_timeout), **kwargs
+            ),
+            "graphql-ws": GraphQLWSHandler(
+                keepalive=settings.WEBSOCKET_KEEPALIVE if keepalive is None else keepalive, **kwargs
+            ),
+        }
+
+    def configure(self, *args, **kwargs):
+        super().configure(*args, **kwargs)
+        for handler in self.protocols.values():
+            handler.configure(*args, **kwargs)
+
+    def select_protocol(self, scope: Scope) -> Optional[str]:
+        offered = scope.get("subprotocols") or ()
+        return next((protocol for protocol in self.protocols if protocol in offered), None)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send):
+        protocol = self.select_protocol(scope)
+        if protocol is None:
+            # Closing in reply to the connect message rejects the handshake
+            await receive()
+            await send({"type": "websocket.close", "code": UNSUPPORTED_PROTOCOL_CODE})
+            WEBSOCKET_CLOSED_TOTAL.inc(protocol="none", reason="unsupported_protocol")
+            return
+        connection = IdleTimeout(receive, send, self.idle_timeout)
+        WEBSOCKET_CONNECTIONS.inc(protocol=protocol)
+        try:
+            await self.protocols[protocol].handle(scope, connection.receive, connection.send)
+        finally:
+            connection.cancel()
+            WEBSOCKET_CONNECTIONS.dec(protocol=protocol)
+            WEBSOCKET_CLOSED_TOTAL.inc(protocol=protocol, reason="idle" if connection.timed_out else "closed")
+
+    async def handle_websocket(self, websocket: WebSocket):
+        await self.handle(websocket.scope, websocket.receive, websocket.send)
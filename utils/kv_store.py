@@ -0,0 +1,248 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+
+
+class KVStore:
+    """Namespaced key-value store holding JSON-serialisable values"""
+
+    # Whether calls do I/O that would stall an event loop
+    blocking = True
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any):
+        raise NotImplementedError
+
+    def update(self, namespace: str, key: str, fn: Callable[[Optional[Any]], Any]) -> Any:
+        """Atomically replace the value with fn(current value) and return it"""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    def items(self, namespace: str) -> Iterator[Tuple[str, Any]]:
+        raise NotImplementedError
+
+    def count(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    def clear(self, namespace: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryKVStore(KVStore):
+    """Per-process store; values are serialised so it behaves like the SQLite one"""
+
+    blocking = False
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raw = self._data.get(namespace, {}).get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, namespace: str, key: str, value: Any):
+        raw = json.dumps(value)
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = raw
+
+    def update(self, namespace: str, key: str, fn: Callable[[Optional[Any]], Any]) -> Any:
+        with self._lock:
+            values = self._data.setdefault(namespace, {})
+            raw = values.get(key)
+            value = fn(json.loads(raw) if raw is not None else None)
+            values[key] = json.dumps(value)
+            return value
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._data.get(namespace, {}).pop(key, None)
+
+    def items(self, namespace: str) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            snapshot = list(self._data.get(namespace, {}).items())
+        for key, raw in snapshot:
+            yield key, json.loads(raw)
+
+    def count(self, namespace: str) -> int:
+        return len(self._data.get(namespace, {}))
+
+    def clear(self, namespace: str):
+        with self._lock:
+            self._data.pop(namespace, None)
+
+
+class SQLiteKVStore(KVStore):
+    """Store in a local SQLite file, shared by every process that opens it
+
+    WAL mode lets readers proceed while one writer commits. Each thread
+    gets its own connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "updated_at REAL NOT NULL, PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=settings.STORE_BUSY_TIMEOUT)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO kv (namespace, key, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, "
+                "updated_at = excluded.updated_at",
+                (namespace, key, json.dumps(value), time.time()),
+            )
+
+    def update(self, namespace: str, key: str, fn: Callable[[Optional[Any]], Any]) -> Any:
+        connection = self._connection()
+        with connection:
+            # Take the write lock before reading so no other process interleaves
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            value = fn(json.loads(row[0]) if row else None)
+            connection.execute(
+                "INSERT INTO kv (namespace, key, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, "
+                "updated_at = excluded.updated_at",
+                (namespace, key, json.dumps(value), time.time()),
+            )
+        return value
+
+    def delete(self, namespace: str, key: str):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def items(self, namespace: str) -> Iterator[Tuple[str, Any]]:
+        cursor = self._connection().execute(
+            "SELECT key, value FROM kv WHERE namespace = ? ORDER BY key", (namespace,)
+        )
+        for key, raw in cursor:
+            yield key, json.loads(raw)
+
+    def count(self, namespace: str) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM kv WHERE namespace = ?", (namespace,)
+        ).fetchone()[0]
+
+    def clear(self, namespace: str):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class StoreMapping(MutableMapping):
+    """Dict-like view of one store namespace
+
+    Values are copies: changing a value read from the mapping does not
+    change the store until it is assigned back.
+    """
+
+    def __init__(self, kv_store: KVStore, namespace: str):
+        self.store = kv_store
+        self.namespace = namespace
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.store.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.store.get(self.namespace, key)
+        return default if value is None else value
+
+    def __setitem__(self, key: str, value: Any):
+        self.store.set(self.namespace, key, value)
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        self.store.delete(self.namespace, key)
+
+    def __contains__(self, key: object) -> bool:
+        return self.store.get(self.namespace, key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in self.store.items(self.namespace))
+
+    def __len__(self) -> int:
+        return self.store.count(self.namespace)
+
+    # One pass over the namespace instead of a lookup per key
+    def values(self) -> List[Any]:
+        return [value for _, value in self.store.items(self.namespace)]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return list(self.store.items(self.namespace))
+
+    def clear(self):
+        self.store.clear(self.namespace)
+
+
+def build_store() -> KVStore:
+    """Store selected by settings.STORE_BACKEND"""
+    if settings.STORE_BACKEND == "sqlite":
+        return SQLiteKVStore(settings.STORE_PATH)
+    if settings.STORE_BACKEND == "memory":
+        return MemoryKVStore()
+    raise ValueError(f"Unknown store backend: {settings.STORE_BACKEND}")
+
+
+# Global store instance
+store = build_store()
+
+
+async def offload(fn: Callable, *args) -> Any:
+    """Call fn(*args), which reads or writes the store, without blocking the event loop
+
+    A SQLite write can wait up to STORE_BUSY_TIMEOUT for another process's
+    lock, so such calls run in a worker thread; the in-memory store is
+    called inline.
+    """
+    if not store.blocking:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
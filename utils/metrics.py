@@ -0,0 +1,338 @@
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10_000, 25_000)
+SIZE_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000, 10_000_000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """Base class for metrics; label values are keyed by tuple for cheap lookups"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _snapshot(self) -> list:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._snapshot()
+        ]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, optionally computed at scrape time"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]):
+        """Compute values lazily when scraped; function returns {label_values: value}"""
+        self._function = function
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        values = dict(self._snapshot())
+        if self._function is not None:
+            values.update(self._function())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class _Timer:
+    """Context manager that observes elapsed time into a histogram"""
+
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative, last is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels) -> _Timer:
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._snapshot():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def track_operation(operation: str):
+    """Decorator recording latency and outcome of an async ContentService method"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "success"
+                return result
+            finally:
+                CONTENT_OPERATION_SECONDS.observe(time.perf_counter() - started, operation=operation)
+                CONTENT_OPERATIONS_TOTAL.inc(operation=operation, outcome=outcome)
+        return wrapper
+    return decorator
+
+
+# Global registry instance
+registry = MetricsRegistry()
+
+CONTENT_OPERATION_SECONDS = registry.histogram(
+    "edubot_content_operation_seconds", "Latency of ContentService operations", ["operation"]
+)
+CONTENT_OPERATIONS_TOTAL = registry.counter(
+    "edubot_content_operations_total", "ContentService operations by outcome", ["operation", "outcome"]
+)
+LLM_REQUEST_SECONDS = registry.histogram(
+    "edubot_llm_request_seconds", "Latency of individual LLM provider calls",
+    ["provider", "model", "operation", "outcome"]
+)
+LLM_REQUESTS_TOTAL = registry.counter(
+    "edubot_llm_requests_total", "LLM provider calls by outcome",
+    ["provider", "model", "operation", "outcome"]
+)
+LLM_TOKENS_TOTAL = registry.counter(
+    "edubot_llm_tokens_total", "Tokens used by LLM calls (reported or estimated)",
+    ["provider", "operation", "kind"]
+)
+JSON_PARSE_SECONDS = registry.histogram(
+    "edubot_json_parse_seconds", "Time spent parsing structured LLM output", ["operation"],
+    buckets=FAST_BUCKETS
+)
+FALLBACKS_TOTAL = registry.counter(
+    "edubot_fallbacks_total", "Fallback content used because LLM output could not be parsed", ["kind"]
+)
+PROMPT_TOKENS = registry.histogram(
+    "edubot_prompt_tokens", "Estimated tokens per rendered prompt (system prompt included)", ["operation"],
+    buckets=TOKEN_BUCKETS
+)
+SEMANTIC_CACHE_LOOKUPS_TOTAL = registry.counter(
+    "edubot_semantic_cache_lookups_total", "Semantic cache lookups by outcome",
+    ["cache", "namespace", "outcome"]
+)
+SEMANTIC_CACHE_SIMILARITY = registry.histogram(
+    "edubot_semantic_cache_hit_similarity", "Similarity between a query and the cached entry it hit",
+    ["cache"], buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0)
+)
+CATALOGUE_LOOKUPS_TOTAL = registry.counter(
+    "edubot_catalogue_lookups_total", "Course catalogue lookups by outcome", ["outcome"]
+)
+CATALOGUE_WARMUP_TOTAL = registry.counter(
+    "edubot_catalogue_warmup_total", "Topics processed by catalogue warm-up", ["outcome"]
+)
+PDF_RENDER_SECONDS = registry.histogram(
+    "edubot_pdf_render_seconds", "Time spent rendering PDF exports"
+)
+PDF_SIZE_BYTES = registry.histogram(
+    "edubot_pdf_size_bytes", "Size of rendered PDF exports", buckets=SIZE_BUCKETS
+)
+ARTIFACT_FILES = registry.gauge(
+    "edubot_artifact_files", "Generated artifact files on disk at the last janitor sweep"
+)
+ARTIFACT_BYTES = registry.gauge(
+    "edubot_artifact_bytes", "Bytes of generated artifacts on disk at the last janitor sweep"
+)
+ARTIFACT_DISK_FREE_BYTES = registry.gauge(
+    "edubot_artifact_disk_free_bytes", "Free space on the volume holding generated artifacts"
+)
+ARTIFACT_DELETED_TOTAL = registry.counter(
+    "edubot_artifact_deleted_total", "Artifacts removed by the janitor", ["reason"]
+)
+ARTIFACT_SWEEP_SECONDS = registry.histogram(
+    "edubot_artifact_sweep_seconds", "Duration of artifact janitor sweeps"
+)
+OBJECT_STORE_REQUEST_SECONDS = registry.histogram(
+    "edubot_object_store_request_seconds", "Latency of artifact object store requests",
+    ["operation", "outcome"]
+)
+EXPORT_RENDER_SECONDS = registry.histogram(
+    "edubot_export_render_seconds", "Time spent rendering HTML/Markdown/EPUB exports", ["format"]
+)
+RESPONSE_CACHE_REQUESTS_TOTAL = registry.counter(
+    "edubot_response_cache_requests_total", "Cacheable GET requests by hit, miss or uncacheable", ["outcome"]
+)
+COMPRESSION_BYTES_TOTAL = registry.counter(
+    "edubot_compression_bytes_total", "Response body bytes before and after compression", ["encoding", "stage"]
+)
+GRAPHQL_OPERATION_SECONDS = registry.histogram(
+    "edubot_graphql_operation_seconds", "Latency of GraphQL operations",
+    ["operation_type", "operation_name"]
+)
+GRAPHQL_OPERATIONS_TOTAL = registry.counter(
+    "edubot_graphql_operations_total", "GraphQL operations by outcome",
+    ["operation_type", "operation_name", "outcome"]
+)
+SUBSCRIPTION_STREAMS = registry.gauge(
+    "edubot_subscription_streams", "Upstream subscription streams shared through the broadcast hub"
+)
+SUBSCRIPTION_EVENTS_TOTAL = registry.counter(
+    "edubot_subscription_events_total", "Subscription events delivered, or coalesced for slow consumers", ["outcome"]
+)
+WEBSOCKET_CONNECTIONS = registry.gauge(
+    "edubot_websocket_connections", "Open GraphQL WebSocket connections", ["protocol"]
+)
+WEBSOCKET_CLOSED_TOTAL = registry.counter(
+    "edubot_websocket_closed_total", "GraphQL WebSocket connections closed, by reason", ["protocol", "reason"]
+)
+ADMISSION_IN_FLIGHT_COST = registry.gauge(
+    "edubot_admission_in_flight_cost", "Admission cost units held by running requests", ["operation"]
+)
+ADMISSION_REQUESTS_TOTAL = registry.counter(
+    "edubot_admission_requests_total", "Requests by admission outcome: admitted, queued, rejected or timed_out",
+    ["operation", "outcome"]
+)
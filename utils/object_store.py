@@ -0,0 +1,356 @@
+import hashlib
+import hmac
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+from config import settings
+from utils.exceptions import StorageError
+from utils.metrics import OBJECT_STORE_REQUEST_SECONDS
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+S3_XML_NAMESPACE = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+class ObjectStore:
+    """Keyed store for finished artifacts; keys are '/'-separated relative paths"""
+
+    # Whether clients download from download_url() instead of through the API
+    serves_downloads = False
+
+    def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        raise NotImplementedError
+
+    def get_file(self, key: str, path: str) -> bool:
+        """Copy the object to a local path; False if it doesn't exist"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def download_url(self, key: str, filename: str = None) -> Optional[str]:
+        """URL clients can fetch the object from directly, if the store has one"""
+        return None
+
+    def close(self):
+        pass
+
+
+def _copy_atomic(source_path: str, path: str):
+    partial_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+    try:
+        shutil.copyfile(source_path, partial_path)
+        os.replace(partial_path, path)
+    finally:
+        try:
+            os.remove(partial_path)
+        except FileNotFoundError:
+            pass
+
+
+class LocalObjectStore(ObjectStore):
+    """Objects as files under a local directory, served by the API itself
+
+    With the artifact directory as root, publishing a file that is already in
+    place is a no-op.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        target = self.path(key)
+        if os.path.abspath(path) != os.path.abspath(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _copy_atomic(path, target)
+
+    def get_file(self, key: str, path: str) -> bool:
+        source = self.path(key)
+        if os.path.abspath(path) == os.path.abspath(source):
+            return os.path.isfile(path)
+        try:
+            _copy_atomic(source, path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+class SigV4Signer:
+    """AWS Signature Version 4 for S3 requests and presigned URLs"""
+
+    ALGORITHM = "AWS4-HMAC-SHA256"
+
+    def __init__(self, access_key: str, secret_key: str, region: str, service: str = "s3"):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+
+    def _scope(self, date: str) -> str:
+        return f"{date}/{self.region}/{self.service}/aws4_request"
+
+    def _signature(self, amz_date: str, canonical_request: str) -> str:
+        date = amz_date[:8]
+        string_to_sign = "\n".join([
+            self.ALGORITHM, amz_date, self._scope(date),
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ])
+        key = _hmac(f"AWS4{self.secret_key}".encode("utf-8"), date)
+        for part in (self.region, self.service, "aws4_request"):
+            key = _hmac(key, part)
+        return hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _canonical_request(method: str, path: str, query: Dict[str, str], headers: Dict[str, str],
+                           payload_hash: str) -> Tuple[str, str]:
+        """Canonical request and signed header names; `path` is already URI-encoded"""
+        lowered = {name.lower(): " ".join(str(value).split()) for name, value in headers.items()}
+        signed_headers = ";".join(sorted(lowered))
+        canonical_headers = "".join(f"{name}:{lowered[name]}\n" for name in sorted(lowered))
+        request = "\n".join([
+            method, path, _encode_query(query),
+            canonical_headers, signed_headers, payload_hash,
+        ])
+        return request, signed_headers
+
+    def sign(self, method: str, url: str, query: Dict[str, str], headers: Dict[str, str],
+             payload_hash: str, now: datetime = None) -> Dict[str, str]:
+        """Headers to send: `headers` plus host, date, payload hash and Authorization"""
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        signed = {
+            **headers,
+            "host": urlsplit(url).netloc,
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_hash,
+        }
+        canonical_request, signed_headers = self._canonical_request(
+            method, urlsplit(url).path or "/", query, signed, payload_hash
+        )
+        signed["Authorization"] = (
+            f"{self.ALGORITHM} Credential={self.access_key}/{self._scope(amz_date[:8])}, "
+            f"SignedHeaders={signed_headers}, Signature={self._signature(amz_date, canonical_request)}"
+        )
+        return signed
+
+    def presign(self, method: str, url: str, expires: int, query: Dict[str, str] = None,
+                now: datetime = None) -> str:
+        """URL with the signature in its query string, valid for `expires` seconds"""
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        query = {
+            **(query or {}),
+            "X-Amz-Algorithm": self.ALGORITHM,
+            "X-Amz-Credential": f"{self.access_key}/{self._scope(amz_date[:8])}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires),
+            "X-Amz-SignedHeaders": "host",
+        }
+        canonical_request, _ = self._canonical_request(
+            method, urlsplit(url).path or "/", query, {"host": urlsplit(url).netloc}, UNSIGNED_PAYLOAD
+        )
+        query["X-Amz-Signature"] = self._signature(amz_date, canonical_request)
+        return f"{url}?{_encode_query(query)}"
+
+
+def _encode_query(query: Dict[str, str]) -> str:
+    return "&".join(f"{_uri_encode(name)}={_uri_encode(value)}" for name, value in sorted(query.items()))
+
+
+class S3ObjectStore(ObjectStore):
+    """Objects in an S3-compatible bucket (AWS S3, MinIO, Ceph, R2, ...)
+
+    Files above the multipart threshold are uploaded in parts; downloads go
+    to presigned URLs (or a public base URL such as a CDN) so the API never
+    streams the bytes.
+    """
+
+    serves_downloads = True
+
+    def __init__(self, endpoint_url: str, bucket: str, region: str, access_key: str, secret_key: str,
+                 prefix: str = "", addressing_style: str = "path", public_base_url: str = "",
+                 presign_expires: int = 900, multipart_threshold: int = None, part_size: int = None,
+                 transport: httpx.BaseTransport = None):
+        if not bucket:
+            raise ValueError("S3 object store needs a bucket")
+        if addressing_style not in ("path", "virtual"):
+            raise ValueError(f"Unknown S3 addressing style: {addressing_style}")
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.addressing_style = addressing_style
+        self.public_base_url = public_base_url.rstrip("/")
+        self.presign_expires = presign_expires
+        self.multipart_threshold = multipart_threshold or settings.S3_MULTIPART_THRESHOLD
+        self.part_size = part_size or settings.S3_MULTIPART_PART_SIZE
+        self.signer = SigV4Signer(access_key, secret_key, region)
+        self._client = httpx.Client(timeout=settings.REQUEST_TIMEOUT, transport=transport)
+
+    def object_url(self, key: str) -> str:
+        """Unsigned URL of an object, without a query string"""
+        object_name = quote(self.prefix + key, safe="/-_.~")
+        if self.addressing_style == "virtual":
+            parts = urlsplit(self.endpoint_url)
+            return f"{parts.scheme}://{self.bucket}.{parts.netloc}/{object_name}"
+        return f"{self.endpoint_url}/{self.bucket}/{object_name}"
+
+    def _request(self, operation: str, method: str, key: str, query: Dict[str, str] = None,
+                 content: bytes = b"", headers: Dict[str, str] = None, ok=(200,),
+                 stream: bool = False) -> httpx.Response:
+        query = query or {}
+        url = self.object_url(key)
+        signed = self.signer.sign(method, url, query, headers or {}, hashlib.sha256(content).hexdigest())
+        if query:
+            url = f"{url}?{_encode_query(query)}"
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            request = self._client.build_request(method, url, content=content, headers=signed)
+            response = self._client.send(request, stream=stream)
+            if response.status_code in ok:
+                outcome = "success"
+                return response
+            if stream:
+                response.read()
+            raise StorageError(f"S3 {operation} {key} failed: {response.status_code} {_s3_error(response)}")
+        except httpx.HTTPError as e:
+            raise StorageError(f"S3 {operation} {key} failed: {e}") from e
+        finally:
+            OBJECT_STORE_REQUEST_SECONDS.observe(time.perf_counter() - started, operation=operation, outcome=outcome)
+
+    def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        if os.path.getsize(path) < self.multipart_threshold:
+            with open(path, "rb") as f:
+                content = f.read()
+            self._request("put", "PUT", key, content=content, headers={"content-type": content_type})
+        else:
+            self._multipart_upload(key, path, content_type)
+
+    def _multipart_upload(self, key: str, path: str, content_type: str):
+        response = self._request("create_multipart", "POST", key, query={"uploads": ""},
+                                 headers={"content-type": content_type})
+        upload_id = _xml_text(response, "UploadId")
+        try:
+            etags = []
+            with open(path, "rb") as f:
+                while True:
+                    part = f.read(self.part_size)
+                    if not part:
+                        break
+                    number = len(etags) + 1
+                    response = self._request("upload_part", "PUT", key, content=part,
+                                             query={"partNumber": str(number), "uploadId": upload_id})
+                    etags.append(response.headers["etag"])
+            body = "<CompleteMultipartUpload>" + "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for number, etag in enumerate(etags, start=1)
+            ) + "</CompleteMultipartUpload>"
+            response = self._request("complete_multipart", "POST", key, query={"uploadId": upload_id},
+                                     content=body.encode("utf-8"))
+            # S3 can report a failed completion in a 200 response
+            if b"<Error>" in response.content:
+                raise StorageError(f"S3 complete_multipart {key} failed: {_s3_error(response)}")
+        except BaseException:
+            try:
+                self._request("abort_multipart", "DELETE", key, query={"uploadId": upload_id}, ok=(204, 404))
+            except StorageError:
+                pass
+            raise
+
+    def get_file(self, key: str, path: str) -> bool:
+        response = self._request("get", "GET", key, ok=(200, 404), stream=True)
+        try:
+            if response.status_code == 404:
+                return False
+            partial_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+            try:
+                with open(partial_path, "wb") as f:
+                    for chunk in response.iter_bytes(settings.PDF_STREAM_CHUNK_BYTES):
+                        f.write(chunk)
+                os.replace(partial_path, path)
+            finally:
+                try:
+                    os.remove(partial_path)
+                except FileNotFoundError:
+                    pass
+            return True
+        finally:
+            response.close()
+
+    def exists(self, key: str) -> bool:
+        return self._request("head", "HEAD", key, ok=(200, 404)).status_code == 200
+
+    def delete(self, key: str):
+        self._request("delete", "DELETE", key, ok=(200, 204, 404))
+
+    def download_url(self, key: str, filename: str = None) -> Optional[str]:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{quote(self.prefix + key, safe='/-_.~')}"
+        query = {"response-content-disposition": f'attachment; filename="{filename}"'} if filename else {}
+        return self.signer.presign("GET", self.object_url(key), self.presign_expires, query)
+
+    def close(self):
+        self._client.close()
+
+
+def _xml_text(response: httpx.Response, tag: str) -> str:
+    root = ElementTree.fromstring(response.content)
+    element = root.find(f"{S3_XML_NAMESPACE}{tag}")
+    if element is None:
+        element = root.find(tag)
+    if element is None or not element.text:
+        raise StorageError(f"S3 response has no {tag}")
+    return element.text
+
+
+def _s3_error(response: httpx.Response) -> str:
+    """Error code and message from an S3 error body, if there is one"""
+    try:
+        root = ElementTree.fromstring(response.content)
+    except ElementTree.ParseError:
+        return ""
+    return " ".join(filter(None, (root.findtext("Code"), root.findtext("Message"))))
+
+
+def build_object_store(root: str) -> ObjectStore:
+    """Object store selected by settings.ARTIFACT_BACKEND; `root` is the local directory"""
+    if settings.ARTIFACT_BACKEND == "local":
+        return LocalObjectStore(root)
+    if settings.ARTIFACT_BACKEND == "s3":
+        return S3ObjectStore(
+            settings.S3_ENDPOINT_URL, settings.S3_BUCKET, settings.S3_REGION,
+            settings.S3_ACCESS_KEY_ID, settings.S3_SECRET_ACCESS_KEY,
+            prefix=settings.S3_PREFIX, addressing_style=settings.S3_ADDRESSING_STYLE,
+            public_base_url=settings.S3_PUBLIC_BASE_URL, presign_expires=settings.S3_PRESIGN_EXPIRES,
+        )
+    raise ValueError(f"Unknown artifact backend: {settings.ARTIFACT_BACKEND}")
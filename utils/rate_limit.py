@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket: `rate` acquisitions per second with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def try_acquire_async(self) -> bool:
+        return self.try_acquire()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        while not await self.try_acquire_async():
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket kept in a KVStore, so every process using the store shares the limit
+
+    Uses wall-clock time, which unlike the monotonic clock is comparable
+    across processes.
+    """
+
+    NAMESPACE = "rate_limits"
+
+    def __init__(self, kv_store, name: str, rate: float, burst: int = 1, clock=time.time):
+        super().__init__(rate, burst, clock)
+        self.store = kv_store
+        self.name = name
+
+    def try_acquire(self) -> bool:
+        acquired = False
+
+        def take(state):
+            nonlocal acquired
+            now = self.clock()
+            tokens, updated = (state["tokens"], state["updated"]) if state else (self.burst, now)
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            acquired = tokens >= 1
+            if acquired:
+                tokens -= 1
+            # Local copy lets acquire() estimate how long to wait
+            self.tokens = tokens
+            return {"tokens": tokens, "updated": now}
+
+        self.store.update(self.NAMESPACE, self.name, take)
+        return acquired
+
+    async def try_acquire_async(self) -> bool:
+        # The update takes the store's write lock, which may be held by another process
+        if self.store.blocking:
+            return await asyncio.to_thread(self.try_acquire)
+        return self.try_acquire()
@@ -0,0 +1,189 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from utils.compression import available_encodings
+from utils.http_headers import etag_matches, negotiate_encoding
+from utils.metrics import RESPONSE_CACHE_REQUESTS_TOTAL
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*(?:s-)?max-age\s*=\s*(\d+)")
+# Per-response headers that must not be replayed from the cache
+_UNCACHED_HEADERS = {b"date", b"server", b"set-cookie", b"etag", b"cache-control", settings.TRACE_ID_HEADER.lower().encode("latin-1")}
+
+
+@dataclass
+class CachedResponse:
+    """A response body ready to be replayed, with its strong ETag"""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+    cache_control: str
+    expires_at: Optional[float]
+
+
+class ResponseCache:
+    """GET responses keyed by path, query string and content coding, least recently used evicted first"""
+
+    def __init__(self, max_entries: int = None, clock=time.monotonic):
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.clock = clock
+        self._entries: "OrderedDict[Tuple[str, bytes, str], CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, query_string: bytes = b"", encoding: str = "") -> Optional[CachedResponse]:
+        key = (path, query_string, encoding)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, path: str, query_string: bytes, status: int, headers: List[Tuple[bytes, bytes]],
+            body: bytes, max_age: int, cache_control: str, encoding: str = "") -> CachedResponse:
+        """Store a response for max_age seconds (0: until invalidated)
+
+        `encoding` is the content coding the client negotiated; each coding
+        is cached, and gets its ETag, separately.
+        """
+        entry = CachedResponse(
+            status=status,
+            headers=[(name, value) for name, value in headers if name.lower() not in _UNCACHED_HEADERS],
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            cache_control=cache_control,
+            expires_at=self.clock() + max_age if max_age else None,
+        )
+        with self._lock:
+            key = (path, query_string, encoding)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, path_prefix: str):
+        """Drop every cached response under a path, whatever its query string"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0].startswith(path_prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def max_age_of(cache_control: str) -> int:
+    """Seconds a shared cache may reuse a response, from its Cache-Control header"""
+    directives = cache_control.lower()
+    if any(word in directives for word in ("no-store", "no-cache", "private")):
+        return 0
+    match = _MAX_AGE.search(directives)
+    return int(match.group(1)) if match else 0
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving read-only GET endpoints from memory with strong ETags
+
+    `paths` maps static endpoints to how long their body is reused (0: until
+    restart). Responses under `dynamic_prefixes` (GraphQL GET queries) are
+    cached for the `max-age` of their own `Cache-Control` header, per query
+    string. Every cached response carries an ETag and answers a matching
+    `If-None-Match` with 304. It sits outside CompressionMiddleware, so
+    `encodings` lists the codings that may be negotiated below it: bodies are
+    cached compressed, per coding.
+    """
+
+    def __init__(self, app, cache: ResponseCache = None, paths: Dict[str, int] = None,
+                 dynamic_prefixes: Tuple[str, ...] = None, encodings: List[str] = None):
+        self.app = app
+        if encodings is None:
+            encodings = available_encodings() if settings.COMPRESSION_ENABLED else []
+        self.encodings = encodings
+        self.cache = cache or response_cache
+        self.paths = settings.RESPONSE_CACHE_PATHS if paths is None else paths
+        self.dynamic_prefixes = ("/graphql",) if dynamic_prefixes is None else dynamic_prefixes
+
+    def _cacheable(self, scope) -> bool:
+        path = scope["path"]
+        if path in self.paths:
+            return True
+        return bool(scope.get("query_string")) and path.startswith(self.dynamic_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not self._cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        path, query_string = scope["path"], scope.get("query_string", b"")
+        request_headers = dict(scope.get("headers") or [])
+        encoding = ""
+        if self.encodings:
+            accept_encoding = request_headers.get(b"accept-encoding", b"").decode("latin-1")
+            encoding = negotiate_encoding(accept_encoding, self.encodings) or ""
+        entry = self.cache.get(path, query_string, encoding)
+        if entry is not None:
+            RESPONSE_CACHE_REQUESTS_TOTAL.inc(outcome="hit")
+            await self._send_cached(entry, scope, send)
+            return
+
+        # Buffer the response to decide whether it can be cached
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        headers = list(start.get("headers", []))
+        body = b"".join(chunks)
+        if path in self.paths:
+            max_age, cache_control = self.paths[path], "no-cache"
+        else:
+            cache_control = next(
+                (value.decode("latin-1") for name, value in headers if name.lower() == b"cache-control"), ""
+            )
+            max_age = max_age_of(cache_control)
+            if not max_age:
+                cache_control = ""
+
+        if start.get("status") != 200 or not cache_control or any(name.lower() == b"set-cookie" for name, _ in headers):
+            RESPONSE_CACHE_REQUESTS_TOTAL.inc(outcome="uncacheable")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        RESPONSE_CACHE_REQUESTS_TOTAL.inc(outcome="miss")
+        entry = self.cache.put(path, query_string, 200, headers, body, max_age, cache_control, encoding)
+        await self._send_cached(entry, scope, send)
+
+    @staticmethod
+    async def _send_cached(entry: CachedResponse, scope, send):
+        request_headers = dict(scope.get("headers") or [])
+        validators = [(b"etag", entry.etag.encode("latin-1")), (b"cache-control", entry.cache_control.encode("latin-1"))]
+        if etag_matches(request_headers.get(b"if-none-match", b"").decode("latin-1"), entry.etag):
+            vary = [(name, value) for name, value in entry.headers if name.lower() == b"vary"]
+            await send({"type": "http.response.start", "status": 304, "headers": validators + vary})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers + validators})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+# Global cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,315 @@
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("edubot_current_span", default=None)
+
+TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """A timed unit of work within a trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_ns",
+                 "end_ns", "status", "status_message", "root", "children", "_token")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Dict[str, Any] = None, root: "Span" = None):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        # The local root collects its finished descendants and exports them together
+        self.root = root or self
+        self.children: List["Span"] = []
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = str(error)
+        self.attributes["exception.type"] = type(error).__name__
+        self.attributes["exception.message"] = str(error)
+
+    @property
+    def duration(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    """Wrap spans in an OTLP/JSON ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.TRACE_SERVICE_NAME}},
+                {"key": "service.version", "value": {"stringValue": settings.API_VERSION}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "edubot"},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+class SpanExporter:
+    """Base class for span exporters; export runs on the background export thread"""
+
+    def export(self, spans: List[Span]):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one OTLP/JSON payload per trace to a local JSONL file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(otlp_payload(spans)) + "\n")
+
+
+class OTLPHTTPSpanExporter(SpanExporter):
+    """Posts OTLP/JSON payloads to a collector's /v1/traces endpoint"""
+
+    def __init__(self, endpoint: str, transport: httpx.BaseTransport = None):
+        self.endpoint = endpoint
+        self.client = httpx.Client(timeout=settings.REQUEST_TIMEOUT, transport=transport)
+
+    def export(self, spans: List[Span]):
+        response = self.client.post(self.endpoint, json=otlp_payload(spans))
+        response.raise_for_status()
+
+    def shutdown(self):
+        self.client.close()
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps exported spans in memory; useful in tests"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]):
+        self.spans.extend(spans)
+
+
+class BackgroundExportProcessor:
+    """Hands finished traces to an exporter on a daemon thread, off the event loop"""
+
+    def __init__(self, exporter: SpanExporter, max_queue_size: int = 1000):
+        self.exporter = exporter
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(max_queue_size)
+        self._thread = threading.Thread(target=self._run, name="edubot-trace-export", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: List[Span]):
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning("Trace export queue full; dropping trace %s", spans[0].trace_id)
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                break
+            try:
+                self.exporter.export(spans)
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0):
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def shutdown(self):
+        self.flush()
+        self._queue.put(None)
+        self.exporter.shutdown()
+
+
+class _SpanContext:
+    """Context manager activating a span for the current task"""
+
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.span._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and self.span.status != STATUS_ERROR:
+            self.span.record_exception(exc)
+        _current_span.reset(self.span._token)
+        self.tracer._finish(self.span)
+        return False
+
+
+class Tracer:
+    """Creates spans and ships completed traces to the configured exporter"""
+
+    def __init__(self, processor: Optional[BackgroundExportProcessor] = None):
+        self.processor = processor
+
+    def set_exporter(self, exporter: Optional[SpanExporter]):
+        if self.processor:
+            self.processor.shutdown()
+        self.processor = BackgroundExportProcessor(exporter) if exporter else None
+
+    def start_span(self, name: str, trace_id: str = None, parent_id: str = None,
+                   **attributes) -> _SpanContext:
+        """Start a child of the current span, or a new root when there is none"""
+        parent = _current_span.get()
+        if parent is not None and trace_id is None:
+            span = Span(name, parent.trace_id, parent.span_id, attributes, root=parent.root)
+        else:
+            span = Span(name, trace_id or secrets.token_hex(16), parent_id, attributes)
+        return _SpanContext(self, span)
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    def _finish(self, span: Span):
+        span.end_ns = time.time_ns()
+        if span.status == STATUS_UNSET:
+            span.status = STATUS_OK
+        if span.root is span:
+            if self.processor:
+                self.processor.submit([span] + span.children)
+            span.children = []
+        elif self.processor:
+            span.root.children.append(span)
+
+    def trace(self, name: str):
+        """Decorator wrapping an async function in a span"""
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.start_span(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def parse_traceparent(header: Optional[str]):
+    """Return (trace_id, parent_span_id) from a W3C traceparent header, if valid"""
+    match = TRACEPARENT_RE.match(header or "")
+    if not match or match.group(1) == "0" * 32:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+class TracingMiddleware:
+    """ASGI middleware giving every HTTP request a root span and an X-Trace-Id header"""
+
+    def __init__(self, app, tracer: "Tracer" = None):
+        self.app = app
+        self.tracer = tracer or _default_tracer()
+        self.header = settings.TRACE_ID_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        trace_id, parent_id = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        with self.tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            trace_id=trace_id,
+            parent_id=parent_id,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        ) as span:
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (self.header, span.trace_id.encode("latin-1"))
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
+
+
+def _default_tracer() -> "Tracer":
+    return tracer
+
+
+def build_exporter() -> Optional[SpanExporter]:
+    """Span exporter selected by settings.TRACE_EXPORTER"""
+    if settings.TRACE_EXPORTER == "file":
+        return FileSpanExporter(settings.TRACE_FILE_PATH)
+    if settings.TRACE_EXPORTER == "otlp":
+        return OTLPHTTPSpanExporter(settings.OTLP_ENDPOINT)
+    return None
+
+
+# Global tracer instance
+tracer = Tracer()
+tracer.set_exporter(build_exporter())
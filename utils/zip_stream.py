@@ -0,0 +1,53 @@
+import io
+import shutil
+import zipfile
+
+from config import settings
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable buffer; zipfile then emits data descriptors"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.offset
+
+
+class ZipStream:
+    """ZIP archive built entry by entry, handed out as bytes for streaming
+
+    Call drain() after each entry to take the bytes written so far; only
+    the entry being added is ever held in memory.
+    """
+
+    def __init__(self, compresslevel: int = 1):
+        self._sink = _Sink()
+        # PDFs are already compressed; a low level just trims their text streams
+        self._zip = zipfile.ZipFile(self._sink, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+
+    def write_file(self, path: str, arcname: str):
+        with open(path, "rb") as src, self._zip.open(arcname, "w") as dest:
+            shutil.copyfileobj(src, dest, settings.PDF_STREAM_CHUNK_BYTES)
+
+    def write_bytes(self, arcname: str, data: bytes):
+        self._zip.writestr(arcname, data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._sink.chunks)
+        self._sink.chunks.clear()
+        return data
+
+    def close(self):
+        """Write the central directory; drain() afterwards for the final bytes"""
+        self._zip.close()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+EduBot Catalogue Warm-up
+Pre-generates courses for a list of topics (one per line) into the course
+catalogue, so matching educate requests are served without LLM calls:
+
+    python warm_catalogue.py topics.txt
+    python warm_catalogue.py topics.txt --modules-count 5 --pdf --concurrency 4 --rate 0.5
+
+Use STORE_BACKEND=sqlite so the catalogue outlives this process and is
+visible to the API server.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from config import settings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pre-generate the EduBot course catalogue")
+    parser.add_argument("topics_file", help="File with one topic per line (# starts a comment)")
+    parser.add_argument("--modules-count", type=int, default=settings.CATALOGUE_MODULES_COUNT)
+    parser.add_argument("--pdf", action="store_true", default=settings.CATALOGUE_INCLUDE_PDF,
+                        help="Also pre-render each course PDF")
+    parser.add_argument("--concurrency", type=int, default=settings.CATALOGUE_CONCURRENCY,
+                        help="Topics generated at once")
+    parser.add_argument("--rate", type=float, default=settings.CATALOGUE_RATE_PER_SECOND,
+                        help="New topics started per second (0 = unlimited)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Regenerate topics even if their catalogue entry is fresh")
+    parser.add_argument("--api-key", default=None, help="API key for the LLM providers")
+    args = parser.parse_args()
+
+    if settings.STORE_BACKEND == "memory":
+        print("Warning: STORE_BACKEND=memory, the catalogue is discarded when this script exits",
+              file=sys.stderr)
+
+    from services.warmup_service import read_topics, warm_catalogue
+
+    topics = read_topics(args.topics_file)
+    progress = asyncio.run(warm_catalogue(
+        topics,
+        modules_count=args.modules_count,
+        include_pdf=args.pdf,
+        concurrency=args.concurrency,
+        rate_per_second=args.rate,
+        max_age=0 if args.refresh else None,
+        api_key=args.api_key,
+        on_progress=lambda p: print(f"\r{p.summary()}", end="", file=sys.stderr, flush=True),
+    ))
+    print(file=sys.stderr)
+    print(progress.summary())
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())